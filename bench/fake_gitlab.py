@@ -0,0 +1,382 @@
+"""
+A local fake GitLab REST API serving a synthetic organisation.
+
+The org is a root group with 'groups' subgroups holding 'projects_per_group'
+projects each, every project having a latest pipeline with a random status.
+Only the endpoints the app calls are implemented, with GitLab's pagination
+headers, ETags/304s and optional per-request latency. /api/graphql answers
+the group projects query of api.graphql (aliased pipelines(ref:) fields,
+cursor paging), or only errors while 'graphql_enabled' is off. With a rate limit
+it also sends RateLimit-* headers and answers 429 with Retry-After once a
+window's requests are used up, like GitLab.com does.
+
+Usage (standalone): python bench/fake_gitlab.py [--groups 50] [--projects 200] [--port 8080]
+                                                [--rate-limit 100 --rate-window 1]
+"""
+import re
+import json
+import math
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote, urlencode
+
+API_PREFIX = "/api/v4"
+GRAPHQL_PATH = "/api/graphql"
+ROOT_GROUP_ID = 1
+MAX_PER_PAGE = 100
+
+# Rough share of each latest-pipeline status; None means no pipeline at all
+STATUS_WEIGHTS = {
+  "success": 70,
+  "failed": 12,
+  "running": 5,
+  "pending": 3,
+  "canceled": 3,
+  "manual": 3,
+  "skipped": 2,
+  None: 2,
+}
+
+def _timestamp(dt):
+  return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def _parse_timestamp(value):
+  return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class FakeOrg:
+  """The groups, projects and pipelines served by the fake API."""
+  def __init__(self, groups=50, projects_per_group=200, seed=1, root_path="bench-org", refs=("main",)):
+    self.random = random.Random(seed)
+    self.refs = list(refs)
+    self.lock = threading.Lock()
+    # When off, /api/graphql only answers errors (to exercise the REST fallback)
+    self.graphql_enabled = True
+    self.next_pipeline_id = 1
+    self.groups = {}
+    self.projects = {}
+    self.pipelines = {}
+
+    long_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    self.root = self._add_group(ROOT_GROUP_ID, root_path, root_path, None)
+    project_id = 1000
+    for g in range(groups):
+      group = self._add_group(ROOT_GROUP_ID + 1 + g, f"group-{g}", f"{root_path}/group-{g}", self.root)
+      for p in range(projects_per_group):
+        project_id += 1
+        self.projects[project_id] = {
+          "id": project_id,
+          "name": f"project-{g}-{p}",
+          "path": f"project-{g}-{p}",
+          "web_url": f"https://gitlab.example.com/{group['full_path']}/project-{g}-{p}",
+          "last_activity_at": _timestamp(long_ago),
+          "namespace": {"id": group["id"], "name": group["name"], "full_path": group["full_path"],
+                        "web_url": group["web_url"]},
+          "description": "Synthetic project for benchmarking",
+        }
+        self.pipelines[project_id] = {}
+        self._new_pipelines(project_id)
+
+  def _add_group(self, gid, path, full_path, parent):
+    group = {
+      "id": gid,
+      "name": path,
+      "path": path,
+      "full_name": path if parent is None else f"{parent['full_name']} / {path}",
+      "full_path": full_path,
+      "parent_id": parent["id"] if parent else None,
+      "web_url": f"https://gitlab.example.com/groups/{full_path}",
+    }
+    self.groups[gid] = group
+    return group
+
+  def _random_status(self):
+    statuses = list(STATUS_WEIGHTS)
+    return self.random.choices(statuses, weights=[STATUS_WEIGHTS[s] for s in statuses])[0]
+
+  def _new_pipelines(self, project_id):
+    """Give a project a fresh latest pipeline on each ref (or none)."""
+    for ref in self.refs:
+      status = self._random_status()
+      if status is None:
+        self.pipelines[project_id].pop(ref, None)
+        continue
+      self.pipelines[project_id][ref] = {"id": self.next_pipeline_id, "status": status, "ref": ref}
+      self.next_pipeline_id += 1
+
+  def mutate(self, fraction):
+    """Start new pipelines in a random 'fraction' of projects. Returns their ids."""
+    with self.lock:
+      ids = self.random.sample(sorted(self.projects), int(len(self.projects) * fraction))
+      now = _timestamp(datetime.now(timezone.utc))
+      for project_id in ids:
+        self._new_pipelines(project_id)
+        self.projects[project_id]["last_activity_at"] = now
+      return ids
+
+  def find_group(self, key):
+    if key.isdigit():
+      return self.groups.get(int(key))
+    return next((g for g in self.groups.values() if g["full_path"] == key), None)
+
+  def project_count(self):
+    return len(self.projects)
+
+
+# The aliased pipelines fields of api.graphql's projects query
+_PIPELINES_FIELD = re.compile(r'(\w+):\s*pipelines\(first:\s*(\d+)(?:,\s*ref:\s*("(?:[^"\\]|\\.)*"))?\)')
+
+def _cursor(offset):
+  return base64.b64encode(f"offset:{offset}".encode()).decode()
+
+def _offset(cursor):
+  return int(base64.b64decode(cursor).decode().split(":", 1)[1]) if cursor else 0
+
+def graphql_projects(org, query, variables):
+  """
+  Answer api.graphql's PROJECTS_QUERY: a group's direct projects, paged by
+  cursor, each with its aliased pipelines(first:, ref:) connections and
+  the repository's root ref when asked for. Returns the response payload.
+  """
+  if not org.graphql_enabled:
+    return {"errors": [{"message": "GraphQL is disabled on this fake"}]}
+  group = org.find_group(str(variables.get("fullPath", "")))
+  if group is None:
+    return {"data": {"group": None}}
+
+  projects = sorted((p for p in org.projects.values() if p["namespace"]["id"] == group["id"]),
+                    key=lambda p: p["id"])
+  first = min(MAX_PER_PAGE, int(variables.get("first") or MAX_PER_PAGE))
+  start = _offset(variables.get("after"))
+  page = projects[start:start + first]
+  end = start + len(page)
+  fields = _PIPELINES_FIELD.findall(query)
+
+  nodes = []
+  for project in page:
+    node = {"id": f"gid://gitlab/Project/{project['id']}", "name": project["name"], "webUrl": project["web_url"]}
+    if "rootRef" in query:
+      node["repository"] = {"rootRef": org.refs[0]}
+    pipelines = sorted(org.pipelines[project["id"]].values(), key=lambda p: p["id"], reverse=True)
+    for alias, count, ref in fields:
+      matching = [p for p in pipelines if ref == "" or p["ref"] == json.loads(ref)][:int(count)]
+      node[alias] = {"nodes": [
+        {"id": f"gid://gitlab/Ci::Pipeline/{p['id']}", "status": p["status"].upper(), "ref": p["ref"]}
+        for p in matching
+      ]}
+    nodes.append(node)
+
+  return {"data": {"group": {"projects": {
+    "pageInfo": {"hasNextPage": end < len(projects), "endCursor": _cursor(end) if page else None},
+    "nodes": nodes,
+  }}}}
+
+
+class FixedWindowLimit:
+  """
+  GitLab-style rate limit: 'limit' requests per 'window' seconds. Every
+  response carries RateLimit-Limit/-Remaining/-Reset; requests beyond the
+  limit get a 429 with Retry-After until the window ends.
+  """
+  def __init__(self, limit, window=1.0):
+    self.limit = limit
+    self.window = window
+    self.lock = threading.Lock()
+    self.window_end = 0.0
+    self.used = 0
+    self.rejected = 0
+
+  def check(self):
+    """Count a request. Returns (allowed, headers)."""
+    with self.lock:
+      now = time.time()
+      if now >= self.window_end:
+        self.window_end = now + self.window
+        self.used = 0
+      self.used += 1
+      allowed = self.used <= self.limit
+      if not allowed:
+        self.rejected += 1
+      headers = {
+        "RateLimit-Limit": str(self.limit),
+        "RateLimit-Remaining": str(max(0, self.limit - self.used)),
+        "RateLimit-Reset": str(math.ceil(self.window_end)),
+      }
+      if not allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(self.window_end - now)))
+      return allowed, headers
+
+
+def make_handler(org, latency=0.0, jitter=0.0, rate_limit=None):
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+      pass
+
+    def send_json(self, data, status=200, headers=None):
+      body = json.dumps(data).encode("utf-8")
+      etag = '"' + hashlib.md5(body).hexdigest() + '"'
+      headers = {**self.rate_headers, **(headers or {})}
+      if status == 200 and self.headers.get("If-None-Match") == etag:
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        for name, value in headers.items():
+          self.send_header(name, value)
+        self.end_headers()
+        return
+      self.send_response(status)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Length", str(len(body)))
+      if status == 200:
+        self.send_header("ETag", etag)
+      for name, value in headers.items():
+        self.send_header(name, value)
+      self.end_headers()
+      self.wfile.write(body)
+
+    def not_found(self):
+      self.send_json({"message": "404 Not found"}, status=404)
+
+    def send_page(self, url, query, items):
+      per_page = min(MAX_PER_PAGE, int(query.get("per_page", ["20"])[0]))
+      page = max(1, int(query.get("page", ["1"])[0]))
+      total_pages = max(1, (len(items) + per_page - 1) // per_page)
+      headers = {
+        "X-Page": str(page),
+        "X-Per-Page": str(per_page),
+        "X-Total": str(len(items)),
+        "X-Total-Pages": str(total_pages),
+        "X-Next-Page": str(page + 1) if page < total_pages else "",
+      }
+      if page < total_pages:
+        params = {k: v[0] for k, v in query.items()}
+        params["page"] = page + 1
+        headers["Link"] = f'<http://{self.headers.get("Host")}{url.path}?{urlencode(params)}>; rel="next"'
+      start = (page - 1) * per_page
+      self.send_json(items[start:start + per_page], headers=headers)
+
+    def do_GET(self):
+      delay = latency + (random.uniform(0, jitter) if jitter else 0)
+      if delay:
+        time.sleep(delay)
+      self.rate_headers = {}
+      if rate_limit is not None:
+        allowed, self.rate_headers = rate_limit.check()
+        if not allowed:
+          return self.send_json({"message": "429 Too Many Requests"}, status=429)
+
+      url = urlparse(self.path)
+      query = parse_qs(url.query)
+      if not url.path.startswith(API_PREFIX):
+        return self.not_found()
+      parts = [unquote(p) for p in url.path[len(API_PREFIX):].strip("/").split("/")]
+
+      with org.lock:
+        if parts == ["groups"]:
+          search = query.get("search", [""])[0].lower()
+          return self.send_json([g for g in org.groups.values() if search in g["path"].lower()])
+
+        if parts[0] == "groups" and len(parts) >= 2:
+          group = org.find_group(parts[1])
+          if group is None:
+            return self.not_found()
+          if len(parts) == 2:
+            return self.send_json(group)
+          if parts[2] == "subgroups":
+            children = [g for g in org.groups.values() if g["parent_id"] == group["id"]]
+            return self.send_page(url, query, children)
+          if parts[2] == "descendant_groups":
+            prefix = group["full_path"] + "/"
+            descendants = [g for g in org.groups.values() if g["full_path"].startswith(prefix)]
+            return self.send_page(url, query, descendants)
+          if parts[2] == "projects":
+            subgroups = query.get("include_subgroups", ["false"])[0] == "true"
+            after = query.get("last_activity_after", [None])[0]
+            prefix = group["full_path"] + "/"
+            projects = [
+              p for p in org.projects.values()
+              if p["namespace"]["id"] == group["id"]
+              or (subgroups and p["namespace"]["full_path"].startswith(prefix))
+            ]
+            if after:
+              after = _parse_timestamp(after)
+              projects = [p for p in projects if _parse_timestamp(p["last_activity_at"]) > after]
+            return self.send_page(url, query, projects)
+
+        if parts[0] == "projects" and len(parts) >= 3 and parts[1].isdigit() and parts[2] == "pipelines":
+          pipelines = org.pipelines.get(int(parts[1]))
+          if pipelines is None:
+            return self.not_found()
+          ref = query.get("ref", [None])[0]
+          if len(parts) == 4 and parts[3] == "latest":
+            candidates = [pipelines[ref]] if ref in pipelines else ([] if ref else list(pipelines.values()))
+            if not candidates:
+              return self.not_found()
+            return self.send_json(max(candidates, key=lambda p: p["id"]))
+          if len(parts) == 3:
+            listing = sorted(pipelines.values(), key=lambda p: p["id"], reverse=True)
+            if ref:
+              listing = [p for p in listing if p["ref"] == ref]
+            return self.send_page(url, query, listing)
+
+      self.not_found()
+
+    def do_POST(self):
+      body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+      self.rate_headers = {}
+      if rate_limit is not None:
+        allowed, self.rate_headers = rate_limit.check()
+        if not allowed:
+          return self.send_json({"message": "429 Too Many Requests"}, status=429)
+      if urlparse(self.path).path != GRAPHQL_PATH:
+        return self.not_found()
+      request = json.loads(body or b"{}")
+      with org.lock:
+        payload = graphql_projects(org, request.get("query", ""), request.get("variables") or {})
+      self.send_json(payload)
+
+  return Handler
+
+def start_server(org, latency=0.0, jitter=0.0, host="127.0.0.1", port=0, rate_limit=None):
+  """
+  Serve 'org' on a background thread, rate limited by 'rate_limit' (a
+  FixedWindowLimit) if given. Returns (server, api_url).
+  """
+  server = ThreadingHTTPServer((host, port), make_handler(org, latency, jitter, rate_limit))
+  server.daemon_threads = True
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server, f"http://{host}:{server.server_address[1]}{API_PREFIX}"
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--groups", type=int, default=50)
+  parser.add_argument("--projects", type=int, default=200, help="Projects per group")
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--latency-ms", type=float, default=0)
+  parser.add_argument("--jitter-ms", type=float, default=0)
+  parser.add_argument("--port", type=int, default=8080)
+  parser.add_argument("--rate-limit", type=int, default=0, help="Requests allowed per window (0 = unlimited)")
+  parser.add_argument("--rate-window", type=float, default=1.0, help="Rate limit window in seconds")
+  args = parser.parse_args()
+
+  org = FakeOrg(args.groups, args.projects, args.seed)
+  rate_limit = FixedWindowLimit(args.rate_limit, args.rate_window) if args.rate_limit else None
+  server, api_url = start_server(org, args.latency_ms / 1000, args.jitter_ms / 1000, port=args.port,
+                                 rate_limit=rate_limit)
+  print(f"Serving {org.project_count()} projects in group '{org.root['full_path']}' at {api_url}")
+  try:
+    while True:
+      time.sleep(3600)
+  except KeyboardInterrupt:
+    server.shutdown()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,144 @@
+"""
+Peak RSS of a large project crawl, before and after streaming decoding.
+
+Serves a fake group with N projects carrying GitLab's full project
+representation from a local HTTP server, then crawls it in two child
+processes:
+  before - page-by-page r.json() keeping every full project dict
+  after  - GitLabClient.get_paginated with PROJECT_FIELDS (stream + trim)
+
+Usage: python bench/listing_memory.py [--projects 5000] [--output result.json]
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+PER_PAGE = 100
+
+def fat_project(i):
+  """Roughly the size and shape of a full GitLab project object."""
+  path = f"project-{i}"
+  return {
+    "id": i,
+    "name": f"Project {i}",
+    "path": path,
+    "web_url": f"https://gitlab.example.com/org/{path}",
+    "last_activity_at": "2024-01-01T00:00:00.000Z",
+    "namespace": {"id": 1, "name": "Org", "path": "org", "kind": "group", "full_path": "org",
+                  "parent_id": None, "avatar_url": None, "web_url": "https://gitlab.example.com/groups/org"},
+    "description": "x" * 2000,
+    "_links": {k: f"https://gitlab.example.com/api/v4/projects/{i}/{k}" for k in
+               ("self", "issues", "merge_requests", "repo_branches", "labels", "events", "members", "cluster_agents")},
+    "permissions": {"project_access": {"access_level": 40, "notification_level": 3}, "group_access": None},
+    "container_expiration_policy": {"cadence": "1d", "enabled": False, "keep_n": 10, "older_than": "90d",
+                                    "name_regex": ".*", "name_regex_keep": None},
+    "topics": [f"topic-{t}" for t in range(20)],
+    "import_error": None,
+    "ci_config_path": "",
+    "compliance_frameworks": [],
+    "custom_attributes": [{"key": f"k{a}", "value": "v" * 200} for a in range(20)],
+    "statistics": {k: i * 1024 for k in ("commit_count", "storage_size", "repository_size", "wiki_size",
+                                          "lfs_objects_size", "job_artifacts_size", "packages_size", "snippets_size")},
+  }
+
+def start_server(total):
+  pages = (total + PER_PAGE - 1) // PER_PAGE
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+      pass
+
+    def do_GET(self):
+      query = parse_qs(urlparse(self.path).query)
+      page = int(query.get("page", ["1"])[0])
+      start = (page - 1) * PER_PAGE
+      items = [fat_project(i) for i in range(start, min(total, start + PER_PAGE))]
+      body = json.dumps(items).encode("utf-8")
+      self.send_response(200)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Length", str(len(body)))
+      self.send_header("X-Total-Pages", str(pages))
+      self.send_header("X-Total", str(total))
+      self.end_headers()
+      self.wfile.write(body)
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+def crawl_before(base_url):
+  import requests
+  session = requests.Session()
+  projects = []
+  page = 1
+  while True:
+    r = session.get(f"{base_url}/groups/1/projects", params={"page": page, "per_page": PER_PAGE})
+    r.raise_for_status()
+    data = r.json()
+    if not data:
+      break
+    projects.extend(data)
+    page += 1
+  return projects
+
+def crawl_after(base_url):
+  from api.client import GitLabClient
+  from api.stream import PROJECT_FIELDS
+  client = GitLabClient(base_url, "token", cache_size=0)
+  projects = client.get_paginated(
+    "/groups/1/projects",
+    params={"simple": "true", "with_custom_attributes": "false"},
+    fields=PROJECT_FIELDS
+  )
+  client.close()
+  return projects
+
+def child(mode, base_url):
+  baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  projects = (crawl_before if mode == "before" else crawl_after)(base_url)
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  print(json.dumps({"mode": mode, "projects": len(projects), "baseline_rss_kb": baseline,
+                    "peak_rss_kb": peak, "delta_rss_kb": peak - baseline}))
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--projects", type=int, default=5000)
+  parser.add_argument("--output", help="Write the results to this JSON file")
+  parser.add_argument("--child", help=argparse.SUPPRESS)
+  parser.add_argument("--url", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    child(args.child, args.url)
+    return
+
+  server = start_server(args.projects)
+  base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v4"
+  results = []
+  for mode in ("before", "after"):
+    out = subprocess.run(
+      [sys.executable, os.path.abspath(__file__), "--child", mode, "--url", base_url],
+      check=True, capture_output=True, text=True
+    )
+    results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+  server.shutdown()
+
+  report = {"benchmark": "listing_memory", "projects": args.projects, "results": results}
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,277 @@
+"""
+End-to-end benchmark of the app against a synthetic large organisation.
+
+Starts bench/fake_gitlab.py's server with a generated org, builds the real
+PipelineCheckerApp window against it (from a temporary working directory
+with its own settings.json and cache.json) and times each phase:
+
+  startup            - window construction, including load_root_group
+  load_root_group    - resolving and inserting the root group again
+  expand_root        - expanding the root group
+  expand_all         - expanding every subgroup
+  save_tree_to_json  - writing the whole tree to the JSON cache
+  refresh_groups     - a full refresh after 'change_fraction' of the
+                       projects started a new pipeline
+  load_tree_from_json- rebuilding the tree from the JSON cache
+  status_dispatch    - pushing a status change through update_project_node
+                       (pipeline_status_changed + row update) for every project
+  evict_collapsed    - collapsing every subgroup of the root and evicting
+                       their subtrees from the tree
+  rehydrate          - expanding them again from the evicted data
+
+Each phase reports wall time, API calls, status-change events and memory
+(peak RSS, and with --tracemalloc the peak Python heap of the phase). OS
+notifications are not shown; status-change events are only counted.
+
+Needs a display; on a headless Linux box run it under xvfb-run.
+
+Usage: python bench/org_bench.py [--groups 50] [--projects 200] [--latency-ms 20]
+                                 [--set crawl_mode='"flat"'] [--output result.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import resource
+import tempfile
+import importlib
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from fake_gitlab import FakeOrg, FixedWindowLimit, start_server
+
+FLIPPED_STATUS = {"success": "failed", "failed": "success"}
+
+def peak_rss_kb():
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def parse_overrides(pairs):
+  """Turn ["key=<json>", ...] into a settings dict."""
+  overrides = {}
+  for pair in pairs or []:
+    key, _, value = pair.partition("=")
+    try:
+      overrides[key] = json.loads(value)
+    except ValueError:
+      overrides[key] = value
+  return overrides
+
+def prepare_workdir(api_url, root_path, overrides):
+  """A working directory with the app's assets and a settings.json pointing at the fake server."""
+  workdir = tempfile.mkdtemp(prefix="gitlab-pipelines-bench-")
+  shutil.copytree(os.path.join(ROOT, "assets"), os.path.join(workdir, "assets"))
+  settings = {
+    "debug": False,
+    "gitlab_api_url": api_url,
+    "group_name": root_path,
+    "ignored_groups": [],
+    "dark_mode": True,
+    # The benchmark drives refreshes itself
+    "refresh_rate_seconds": 24 * 60 * 60,
+    "cache_refresh_seconds": 24 * 60 * 60,
+    **overrides,
+  }
+  with open(os.path.join(workdir, "settings.json"), "w", encoding="utf-8") as f:
+    json.dump(settings, f, indent=2)
+  return workdir, settings
+
+
+class Bench:
+  def __init__(self, app, util, use_tracemalloc):
+    self.app = app
+    self.util = util
+    self.use_tracemalloc = use_tracemalloc
+    self.events = 0
+    self.phases = []
+    # Count status changes instead of showing a notification for each
+    app.event_bus.listeners.pop("pipeline_status_changed", None)
+    app.event_bus.subscribe("pipeline_status_changed", self.on_status_changed)
+
+  def on_status_changed(self, **kwargs):
+    self.events += 1
+
+  def phase(self, name, fn, *args, **kwargs):
+    # Drop the delayed cache saves earlier phases queued up
+    self.util.cancel_delay_timers()
+    self.app.update()
+    self.app.api.reset_stats()
+    self.events = 0
+    rss_before = peak_rss_kb()
+    if self.use_tracemalloc:
+      tracemalloc.start()
+
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    wait_for_background(self.app)
+    # Include the redraw the phase caused
+    self.app.update_idletasks()
+    seconds = time.perf_counter() - start
+
+    entry = {
+      "name": name,
+      "seconds": round(seconds, 4),
+      "api_calls": self.app.api.stats()["calls"],
+      "events": self.events,
+      "tree_items": count_items(self.app.tree),
+      "peak_rss_kb": peak_rss_kb(),
+      "peak_rss_growth_kb": peak_rss_kb() - rss_before,
+    }
+    if self.use_tracemalloc:
+      entry["python_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+      tracemalloc.stop()
+    self.phases.append(entry)
+    print(f"{name:<20} {seconds:8.3f}s  {entry['api_calls']:6d} calls  {entry['events']:6d} events", file=sys.stderr)
+    return result
+
+
+def wait_for_background(app):
+  """Pump the Tk event loop until the app's background jobs have been applied."""
+  while app.jobs_in_flight or not app.ui_queue.empty():
+    app.update()
+    time.sleep(0.001)
+
+def count_items(tree, parent=""):
+  children = tree.get_children(parent)
+  return len(children) + sum(count_items(tree, child) for child in children)
+
+def expand(app, group):
+  app.fetch_subgroups_and_projects(group)
+  app.tree.item(group.item_id, open=True)
+
+def expand_all(app, parent):
+  """Expand every group below parent, one level of the hierarchy at a time."""
+  level = [parent]
+  while level:
+    expanded = []
+    for group in level:
+      for child in group.children:
+        if child.kind == "group" and child.state == "unfetched":
+          expand(app, child)
+          expanded.append(child)
+    wait_for_background(app)
+    level = expanded
+
+def dispatch_status_changes(app):
+  """Flip every project's status through the normal update path."""
+  changed = 0
+  for nodes in app.index_visible_projects().values():
+    for node in nodes:
+      status = FLIPPED_STATUS.get(node.status.lower(), "success")
+      if app.update_project_node(node, status, node.web_url, node.ref, node.pipeline_id):
+        changed += 1
+  return changed
+
+def collapse_and_evict(app, parent):
+  """Collapse every subgroup of parent and evict its subtree."""
+  evicted = 0
+  for child in parent.children:
+    if child.kind == "group" and child.children:
+      app.tree.item(child.item_id, open=False)
+      evicted += app.evict_subtree(child)
+  return evicted
+
+def rehydrate(app, parent):
+  for child in parent.children:
+    if child.kind == "group" and child.evicted is not None:
+      app.rehydrate_group(child)
+      app.tree.item(child.item_id, open=True)
+
+def run(args):
+  org = FakeOrg(args.groups, args.projects, args.seed)
+  rate_limit = FixedWindowLimit(args.rate_limit, args.rate_window) if args.rate_limit else None
+  server, api_url = start_server(org, args.latency_ms / 1000, args.jitter_ms / 1000, rate_limit=rate_limit)
+  workdir, settings = prepare_workdir(api_url, org.root["full_path"], parse_overrides(args.set))
+  cwd = os.getcwd()
+  os.chdir(workdir)
+  os.environ["GITLAB_TOKEN"] = "bench-token"
+
+  try:
+    # main reads settings.json from the working directory on import
+    util = importlib.import_module("util")
+    start = time.perf_counter()
+    main = importlib.import_module("main")
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app = main.PipelineCheckerApp(event_loop=asyncio.new_event_loop())
+    wait_for_background(app)
+    startup_seconds = time.perf_counter() - start
+    bench = Bench(app, util, args.tracemalloc)
+    bench.phases.append({"name": "startup", "seconds": round(startup_seconds, 4),
+                         "import_seconds": round(import_seconds, 4), "peak_rss_kb": peak_rss_kb()})
+
+    bench.phase("load_root_group", app.load_root_group)
+    root = app.model.roots[0]
+    bench.phase("expand_root", expand, app, root)
+    bench.phase("expand_all", expand_all, app, root)
+    cache_file = os.path.join(workdir, "cache.json")
+    bench.phase("save_tree_to_json", app.save_tree_to_json, cache_file)
+
+    changed = org.mutate(args.change_fraction)
+    bench.phase("refresh_groups", app.refresh_groups, save_json=False)
+    bench.phase("load_tree_from_json", app.load_tree_from_json, cache_file)
+    bench.phase("status_dispatch", dispatch_status_changes, app)
+    bench.phase("evict_collapsed", collapse_and_evict, app, app.model.roots[0])
+    bench.phase("rehydrate", rehydrate, app, app.model.roots[0])
+
+    report = {
+      "benchmark": "org",
+      "config": {
+        "groups": args.groups,
+        "projects_per_group": args.projects,
+        "projects": org.project_count(),
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "rate_limit": args.rate_limit,
+        "rate_window": args.rate_window,
+        "change_fraction": args.change_fraction,
+        "changed_projects": len(changed),
+        "seed": args.seed,
+        "settings": {k: v for k, v in settings.items() if k != "gitlab_api_url"},
+      },
+      "python": sys.version.split()[0],
+      "platform": sys.platform,
+      "phases": bench.phases,
+      "api": {k: v for k, v in app.api.stats().items() if isinstance(v, (int, float, str))},
+      "rate_limited_responses": rate_limit.rejected if rate_limit else 0,
+    }
+    app.on_closing()
+    return report
+  finally:
+    util.cancel_delay_timers()
+    os.chdir(cwd)
+    server.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--groups", type=int, default=50)
+  parser.add_argument("--projects", type=int, default=200, help="Projects per group")
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every API response")
+  parser.add_argument("--jitter-ms", type=float, default=0, help="Extra random latency of up to this much")
+  parser.add_argument("--rate-limit", type=int, default=0,
+                      help="Have the fake API allow this many requests per window and answer 429 beyond (0 = unlimited)")
+  parser.add_argument("--rate-window", type=float, default=1.0, help="Rate limit window in seconds")
+  parser.add_argument("--change-fraction", type=float, default=0.1,
+                      help="Share of projects with a new pipeline before refresh_groups")
+  parser.add_argument("--set", action="append", metavar="KEY=JSON", help="Override an app setting")
+  parser.add_argument("--tracemalloc", action="store_true", help="Also record each phase's peak Python heap (slower)")
+  parser.add_argument("--output", help="Write the results to this JSON file")
+  args = parser.parse_args()
+
+  report = run(args)
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+  main()
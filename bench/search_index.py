@@ -0,0 +1,127 @@
+"""
+Cost of the filter box's SearchIndex on a large tree.
+
+Builds a TreeModel of N projects (20,000 by default) spread over nested
+groups, with realistic dash/underscore names, and measures:
+  build   - indexing every node as it is added to the model
+  queries - the time per query for short, long, multi-word and missing prefixes
+  updates - re-indexing renamed nodes, removing and re-adding nodes
+  memory  - what the index holds on to (tracemalloc)
+
+Needs no display.
+
+Usage: python bench/search_index.py [--projects 20000] [--output result.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from model import TreeModel, GroupNode, ProjectNode
+from search import SearchIndex
+
+WORDS = ("api", "payments", "billing", "web", "frontend", "backend", "service", "worker", "auth",
+         "gateway", "infra", "deploy", "docs", "mobile", "ios", "android", "data", "pipeline",
+         "search", "core", "shared", "lib", "tools", "admin", "report", "events", "queue", "cache")
+QUERIES = ("p", "pay", "payments", "pay api", "web front", "serv 12", "zzz", "billing-worker")
+
+def project_name(rng, i):
+  return "-".join(rng.sample(WORDS, rng.randint(1, 3))) + ("_" + str(i) if rng.random() < 0.5 else "")
+
+def build_model(rng, projects, groups):
+  model = TreeModel()
+  parents = [model.add(GroupNode(1, "org"), "g1")]
+  for gid in range(2, groups + 2):
+    parent = rng.choice(parents)
+    parents.append(model.add(GroupNode(gid, rng.choice(WORDS) + "-" + str(gid), parent.name), f"g{gid}", parent))
+  for pid in range(projects):
+    name = project_name(rng, pid)
+    node = ProjectNode(pid, name, "success", f"https://gitlab.example.com/org/{name}", "main", pid)
+    model.add(node, f"p{pid}", rng.choice(parents))
+  return model
+
+def timed(fn, repeat):
+  start = time.perf_counter()
+  for _ in range(repeat):
+    result = fn()
+  return (time.perf_counter() - start) / repeat, result
+
+def run(args):
+  rng = random.Random(args.seed)
+
+  tracemalloc.start()
+  start = time.perf_counter()
+  model = build_model(rng, args.projects, args.groups)
+  build_seconds = time.perf_counter() - start
+  with_index = tracemalloc.get_traced_memory()[0]
+  # The same tree without an index, for the difference
+  model.search = SearchIndex()
+  baseline = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+
+  model = build_model(random.Random(args.seed), args.projects, args.groups)
+  index = model.search
+  queries = {}
+  for query in QUERIES:
+    seconds, matches = timed(lambda: index.search(query), args.repeat)
+    queries[query] = {"ms": round(seconds * 1000, 3), "matches": len(matches)}
+
+  projects = [node for node in model.by_item.values() if node.kind == "project"]
+  sample = rng.sample(projects, min(1000, len(projects)))
+  start = time.perf_counter()
+  for node in sample:
+    node.name = project_name(rng, node.id)
+    node.web_url = f"https://gitlab.example.com/org/{node.name}"
+    index.update(node)
+  update_us = (time.perf_counter() - start) / len(sample) * 1e6
+  start = time.perf_counter()
+  for node in sample:
+    index.remove(node)
+  remove_us = (time.perf_counter() - start) / len(sample) * 1e6
+  start = time.perf_counter()
+  for node in sample:
+    index.add(node)
+  add_us = (time.perf_counter() - start) / len(sample) * 1e6
+  assert all(node in index.search(node.name) for node in sample)
+
+  for query, entry in queries.items():
+    print(f"{query!r:<18} {entry['ms']:8.3f} ms {entry['matches']:6d} matches", file=sys.stderr)
+  return {
+    "benchmark": "search_index",
+    "config": {"projects": args.projects, "groups": args.groups, "repeat": args.repeat, "seed": args.seed},
+    "python": sys.version.split()[0],
+    "results": {
+      "nodes": len(index),
+      "words": len(index.sorted_words),
+      "build_seconds": round(build_seconds, 4),
+      "index_mb": round((with_index - baseline) / 2 ** 20, 2),
+      "queries": queries,
+      "update_us": round(update_us, 2),
+      "remove_us": round(remove_us, 2),
+      "add_us": round(add_us, 2),
+    },
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--projects", type=int, default=20000)
+  parser.add_argument("--groups", type=int, default=500)
+  parser.add_argument("--repeat", type=int, default=20, help="Runs averaged per query")
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--output", help="Write the results to this JSON file")
+  args = parser.parse_args()
+
+  report = run(args)
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,143 @@
+"""
+Tcl calls made when re-populating a group, before and after reconciling.
+
+Builds a bare ttk.Treeview with one group of N projects (and a few
+subgroups) and counts the Tcl round-trips of each scenario:
+  replace     - the old populate_group: delete every child, insert again
+  no_change   - reconcile_children with an identical listing
+  status_flip - reconcile with 'change_fraction' of the statuses changed,
+                which also moves those rows to their new sorted position
+  add_remove  - reconcile with a few projects removed and a few added
+
+Needs a display; on a headless Linux box run it under xvfb-run.
+
+Usage: python bench/tcl_calls.py [--projects 1000] [--output result.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tkinter as tk
+from tkinter import ttk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from model import TreeModel, GroupNode, ProjectNode, PLACEHOLDER_TEXT, sort_key
+from reconcile import reconcile_children
+
+STATUSES = ("success", "failed", "running", "skipped")
+TAGS = {"success": "success_tag", "failed": "fail_tag", "running": "skipped_tag", "skipped": "skipped_tag"}
+
+
+class CountingTk:
+  """Stands in for a widget's tkapp and counts the calls going through it."""
+  def __init__(self, tk):
+    self._tk = tk
+    self.calls = 0
+
+  def call(self, *args):
+    self.calls += 1
+    return self._tk.call(*args)
+
+  def __getattr__(self, name):
+    return getattr(self._tk, name)
+
+
+def row_style(node):
+  if node.kind != "project":
+    return "", ""
+  return "", TAGS.get(node.status, "")
+
+def listing(projects, subgroups):
+  """Fresh nodes for a group listing, sorted as populate_group builds them."""
+  children = [GroupNode(gid, f"subgroup-{gid}", parent_name="bench") for gid in subgroups]
+  children.extend(ProjectNode(pid, f"project-{pid}", status, f"https://gitlab.example.com/p/{pid}", "main", pid)
+                  for pid, status in projects)
+  children.sort(key=sort_key)
+  return children
+
+def replace_children(tree, model, group, children):
+  """The delete-and-reinsert populate_group this replaces."""
+  tree.delete(*tree.get_children(group.item_id))
+  model.remove_children(group)
+  for node in children:
+    image, tag = row_style(node)
+    item_id = tree.insert(group.item_id, "end", text=node.text(), image=image, tags=(tag,) if tag else ())
+    model.add(node, item_id, group)
+    if node.kind == "group":
+      tree.insert(item_id, "end", text=PLACEHOLDER_TEXT)
+
+def measure(counter, fn, *args):
+  counter.calls = 0
+  start = time.perf_counter()
+  result = fn(*args)
+  return result, {"tcl_calls": counter.calls, "seconds": round(time.perf_counter() - start, 4)}
+
+def run(args):
+  rng = random.Random(args.seed)
+  root = tk.Tk()
+  root.withdraw()
+  tree = ttk.Treeview(root)
+  counter = CountingTk(tree.tk)
+  tree.tk = counter
+
+  model = TreeModel()
+  group = model.add(GroupNode(1, "bench"), tree.insert("", "end", text="Group: bench", open=True))
+  tree.insert(group.item_id, "end", text=PLACEHOLDER_TEXT)
+
+  subgroups = list(range(2, 2 + args.subgroups))
+  projects = [(1000 + i, rng.choice(STATUSES)) for i in range(args.projects)]
+  reconcile_children(tree, model, group, listing(projects, subgroups), row_style)
+  # Something the replace scenario loses
+  tree.selection_set(group.children[-1].item_id)
+
+  results = {}
+  _, results["replace"] = measure(counter, replace_children, tree, model, group, listing(projects, subgroups))
+  reconcile_children(tree, model, group, listing(projects, subgroups), row_style)
+  tree.selection_set(group.children[-1].item_id)
+
+  changes, results["no_change"] = measure(
+    counter, reconcile_children, tree, model, group, listing(projects, subgroups), row_style)
+  assert not changes, "an identical listing should not change anything"
+
+  changed = set(rng.sample(range(len(projects)), int(len(projects) * args.change_fraction)))
+  projects = [(pid, "failed" if status != "failed" else "success") if i in changed else (pid, status)
+              for i, (pid, status) in enumerate(projects)]
+  _, results["status_flip"] = measure(
+    counter, reconcile_children, tree, model, group, listing(projects, subgroups), row_style)
+
+  projects = projects[5:] + [(10 ** 6 + i, "running") for i in range(5)]
+  _, results["add_remove"] = measure(
+    counter, reconcile_children, tree, model, group, listing(projects, subgroups), row_style)
+
+  results["selection_kept"] = bool(tree.selection())
+  root.destroy()
+  return {
+    "benchmark": "tcl_calls",
+    "config": {"projects": args.projects, "subgroups": args.subgroups,
+               "change_fraction": args.change_fraction, "seed": args.seed},
+    "python": sys.version.split()[0],
+    "tk": tk.TkVersion,
+    "results": results,
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--projects", type=int, default=1000)
+  parser.add_argument("--subgroups", type=int, default=10)
+  parser.add_argument("--change-fraction", type=float, default=0.05)
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--output", help="Write the results to this JSON file")
+  args = parser.parse_args()
+
+  report = run(args)
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+  main()
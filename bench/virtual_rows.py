@@ -0,0 +1,148 @@
+"""
+Materializing every row of a huge group versus a VirtualWindow.
+
+Builds a ttk.Treeview with one open group of N projects (10,000 by
+default) and, for a fully materialized group and for a virtual one,
+measures wall time, Tcl calls and Treeview items of:
+  populate - filling the group from a listing, including the redraw
+  statuses - a 'change_fraction' of the projects changing status, each
+             going through the app's row update and reposition path
+  scroll   - (virtual only) sliding the window from the top to the
+             bottom of the group and back
+
+Needs a display; on a headless Linux box run it under xvfb-run.
+
+Usage: python bench/virtual_rows.py [--projects 10000] [--window 200] [--output result.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tkinter as tk
+from tkinter import ttk
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from model import TreeModel, GroupNode, sort_key
+from reconcile import reconcile_children, merge_children
+from virtual import VirtualWindow
+from tcl_calls import CountingTk, row_style, listing, STATUSES
+
+def count_items(tree, parent=""):
+  children = tree.get_children(parent)
+  return len(children) + sum(count_items(tree, child) for child in children)
+
+class Scenario:
+  def __init__(self, root, virtual, window_rows):
+    self.root = root
+    self.tree = ttk.Treeview(root, show="tree")
+    self.tree.pack(fill="both", expand=True)
+    self.counter = CountingTk(self.tree.tk)
+    self.tree.tk = self.counter
+    self.model = TreeModel()
+    self.group = self.model.add(GroupNode(1, "bench"), self.tree.insert("", "end", text="Group: bench", open=True))
+    self.window = VirtualWindow(self.tree, self.model, self.group, row_style, window_rows) if virtual else None
+
+  def measure(self, fn, *args):
+    self.counter.calls = 0
+    start = time.perf_counter()
+    fn(*args)
+    self.root.update()
+    return {
+      "seconds": round(time.perf_counter() - start, 4),
+      "tcl_calls": self.counter.calls,
+    }
+
+  def populate(self, children):
+    if self.window:
+      merge_children(self.tree, self.model, self.group, children)
+      self.window.render()
+    else:
+      reconcile_children(self.tree, self.model, self.group, children, row_style)
+
+  def set_status(self, node, status):
+    """What update_project_node + reposition_project do for one project."""
+    self.model.set_status(node, status)
+    index = self.model.reposition(node)
+    if self.window:
+      self.window.update(node, moved=index is not None)
+      return
+    image, tag = row_style(node)
+    self.tree.item(node.item_id, text=node.text(), image=image, tags=(tag,) if tag else ())
+    if index is not None:
+      self.tree.move(node.item_id, self.group.item_id, index)
+
+  def change_statuses(self, changes):
+    for node, status in changes:
+      self.set_status(node, status)
+
+  def scroll_through(self):
+    slides = 0
+    while self.window.slide(self.window.size // 2):
+      slides += 1
+    while self.window.slide(-(self.window.size // 2)):
+      slides += 1
+    return slides
+
+  def destroy(self):
+    self.tree.destroy()
+
+def run(args):
+  rng = random.Random(args.seed)
+  root = tk.Tk()
+  root.geometry("800x900")
+  projects = [(1000 + i, rng.choice(STATUSES)) for i in range(args.projects)]
+  picks = sorted(rng.sample(range(args.projects), int(args.projects * args.change_fraction)))
+
+  results = {}
+  for name, virtual in (("materialized", False), ("virtual", True)):
+    scenario = Scenario(root, virtual, args.window)
+    entry = {"populate": scenario.measure(scenario.populate, listing(projects, []))}
+    entry["tree_items"] = count_items(scenario.tree)
+
+    by_id = {node.id: node for node in scenario.group.children}
+    changes = [(by_id[str(projects[i][0])], "failed" if projects[i][1] != "failed" else "success") for i in picks]
+    entry["statuses"] = scenario.measure(scenario.change_statuses, changes)
+    assert [n.order_key for n in scenario.group.children] == sorted(sort_key(n) for n in scenario.group.children)
+
+    if virtual:
+      slides = []
+      entry["scroll"] = scenario.measure(lambda: slides.append(scenario.scroll_through()))
+      entry["scroll"]["slides"] = slides[0]
+    results[name] = entry
+    scenario.destroy()
+    print(f"{name:<13} populate {entry['populate']['seconds']:8.3f}s {entry['populate']['tcl_calls']:7d} calls "
+          f"{entry['tree_items']:6d} items", file=sys.stderr)
+
+  root.destroy()
+  return {
+    "benchmark": "virtual_rows",
+    "config": {"projects": args.projects, "window_rows": args.window,
+               "change_fraction": args.change_fraction, "seed": args.seed},
+    "python": sys.version.split()[0],
+    "tk": tk.TkVersion,
+    "results": results,
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--projects", type=int, default=10000)
+  parser.add_argument("--window", type=int, default=200, help="Rows materialized by the virtual window")
+  parser.add_argument("--change-fraction", type=float, default=0.05)
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--output", help="Write the results to this JSON file")
+  args = parser.parse_args()
+
+  report = run(args)
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+  main()
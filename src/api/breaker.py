@@ -0,0 +1,113 @@
+import time
+import threading
+
+import requests
+
+# internal imports
+import util
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+  """Raised instead of calling GitLab while the circuit breaker is open."""
+  pass
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+  """Raised when a call would start after the current deadline budget ran out."""
+  pass
+
+
+class CircuitBreaker:
+  """
+  Stops sending requests to GitLab after 'failure_threshold' consecutive
+  failures (connection errors, timeouts, 5xx). After 'reset_timeout'
+  seconds a single trial request is let through; if it succeeds the
+  circuit closes again, otherwise it stays open for another period.
+  """
+  def __init__(self, failure_threshold=5, reset_timeout=60, on_state_change=None):
+    """
+    :param failure_threshold: Consecutive failures that open the circuit.
+    :param reset_timeout: Seconds to wait before letting a trial request through.
+    :param on_state_change: Optional callable(old_state, new_state), called
+                            on whichever thread caused the change.
+    """
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self.on_state_change = on_state_change
+    self.state = CLOSED
+    self.failures = 0
+    self.opened_at = 0.0
+    self.trial_in_flight = False
+    self.lock = threading.Lock()
+
+  def _set_state(self, state):
+    old = self.state
+    self.state = state
+    if old != state:
+      util.debug(f"Circuit breaker: {old} -> {state}")
+    return old
+
+  def _notify(self, old, new):
+    if old != new and self.on_state_change:
+      self.on_state_change(old, new)
+
+  def before_call(self):
+    """
+    Raise CircuitOpenError if calls are currently not allowed. Returns True
+    when the call is the half-open trial: its caller must then end it with
+    record_success, record_failure or release_trial.
+    """
+    with self.lock:
+      if self.state == CLOSED:
+        return False
+      if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+        old = self._set_state(HALF_OPEN)
+        self.trial_in_flight = False
+      else:
+        old = self.state
+      if self.state == HALF_OPEN and not self.trial_in_flight:
+        self.trial_in_flight = True
+        allowed = True
+      else:
+        allowed = False
+    self._notify(old, self.state)
+    if not allowed:
+      raise CircuitOpenError("GitLab appears to be unavailable, skipping request.")
+    return True
+
+  def release_trial(self):
+    """Let another trial through after one that ended without a result (e.g. an exception)."""
+    with self.lock:
+      self.trial_in_flight = False
+
+  def record_success(self):
+    with self.lock:
+      self.failures = 0
+      self.trial_in_flight = False
+      old = self._set_state(CLOSED)
+    self._notify(old, CLOSED)
+
+  def record_failure(self):
+    with self.lock:
+      self.failures += 1
+      self.trial_in_flight = False
+      if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+        self.opened_at = time.monotonic()
+        old = self._set_state(OPEN)
+      else:
+        old = self.state
+    self._notify(old, self.state)
+
+  @property
+  def is_open(self):
+    return self.state != CLOSED
+
+  def stats(self):
+    with self.lock:
+      return {
+        "circuit_state": self.state,
+        "consecutive_failures": self.failures,
+      }
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+from requests.structures import CaseInsensitiveDict
+
+class CacheEntry:
+  """
+  A cached response body along with the validators needed to revalidate it.
+  """
+  __slots__ = ("etag", "last_modified", "data", "headers")
+
+  def __init__(self, etag, last_modified, data, headers):
+    self.etag = etag
+    self.last_modified = last_modified
+    self.data = data
+    self.headers = headers
+
+
+class ConditionalCache:
+  """
+  A bounded LRU cache of parsed GET responses keyed by URL + params.
+
+  Entries keep the ETag / Last-Modified validators of the response so the
+  next request for the same resource can be sent conditionally; a 304
+  answer then reuses the stored body without decoding anything.
+  """
+  def __init__(self, max_entries=2000):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  @staticmethod
+  def make_key(url, params, variant=None):
+    return (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())), variant)
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is not None:
+        self.entries.move_to_end(key)
+      return entry
+
+  def conditional_headers(self, entry):
+    """Headers that turn a GET for this entry into a revalidation request."""
+    headers = {}
+    if entry is not None:
+      if entry.etag:
+        headers["If-None-Match"] = entry.etag
+      if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+  def store(self, key, response, data):
+    """Remember the parsed body if the response carries any validator."""
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+      return
+    with self.lock:
+      self.entries[key] = CacheEntry(etag, last_modified, data, CaseInsensitiveDict(response.headers))
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+  def record_hit(self):
+    with self.lock:
+      self.hits += 1
+
+  def record_miss(self):
+    with self.lock:
+      self.misses += 1
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+
+  def stats(self):
+    with self.lock:
+      return {
+        "cache_entries": len(self.entries),
+        "cache_hits": self.hits,
+        "cache_misses": self.misses,
+      }
@@ -0,0 +1,422 @@
+import time
+import json
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import parse_header_links
+
+# internal imports
+import util
+from api.cache import ConditionalCache
+from api.ratelimit import RateLimiter, parse_retry_after
+from api.stream import decode_listing
+from api.singleflight import SingleFlight
+from api.breaker import CircuitBreaker, DeadlineExceeded
+from api.transport import make_transport
+
+# Responses worth retrying: the server (or a proxy in front of it) is struggling
+RETRY_STATUSES = (500, 502, 503, 504)
+
+class CallStats:
+  """
+  Timing and transfer details for a single API call.
+  """
+  __slots__ = ("method", "path", "status_code", "latency", "bytes", "reused")
+
+  def __init__(self, method, path, status_code, latency, bytes, reused):
+    self.method = method
+    self.path = path
+    self.status_code = status_code
+    self.latency = latency
+    self.bytes = bytes
+    self.reused = reused
+
+  def __repr__(self):
+    conn = "reused" if self.reused else "new"
+    return (f"{self.method} {self.path} -> {self.status_code} "
+            f"({self.latency * 1000:.0f} ms, {self.bytes} bytes, {conn} connection)")
+
+
+class JsonResponse:
+  """
+  The decoded body of a GET request plus the bits of the response callers
+  still need. 'not_modified' is True when the body came from the cache.
+  """
+  __slots__ = ("data", "headers", "status_code", "not_modified")
+
+  def __init__(self, data, headers, status_code, not_modified=False):
+    self.data = data
+    self.headers = headers
+    self.status_code = status_code
+    self.not_modified = not_modified
+
+
+class GitLabClient:
+  """
+  A small GitLab REST client that owns a pooled, keep-alive requests.Session.
+
+  All API calls made by the app go through one instance of this class so the
+  TCP/TLS connections and the auth headers are shared across the whole
+  refresh loop instead of being rebuilt on every request.
+  """
+  def __init__(self, api_url, token="", pool_size=10, stats_history=500, cache_size=2000,
+               rate_limiter=None, max_rate_limit_retries=8, page_concurrency=4,
+               timeout=(5, 30), max_retries=3, retry_backoff=0.5, circuit_breaker=None,
+               transport="live", cassette_dir="cassettes", replay_latency=0.0):
+    """
+    :param api_url: Base URL of the REST API, e.g. https://gitlab.com/api/v4
+    :param token: Personal Access Token sent as the Private-Token header.
+    :param pool_size: Max number of keep-alive connections kept per host.
+    :param stats_history: How many recent CallStats entries to keep around.
+    :param cache_size: Max number of GET responses kept for ETag revalidation.
+    :param rate_limiter: RateLimiter pacing every call (a default one if None).
+    :param max_rate_limit_retries: How many times a 429 is waited out and
+                                   retried before it is handed to the caller.
+    :param page_concurrency: How many listing pages are fetched in parallel.
+    :param timeout: (connect, read) timeout in seconds applied to every call.
+    :param max_retries: Retries for idempotent calls failing with a
+                        connection error, timeout or 5xx.
+    :param retry_backoff: Base delay of the jittered exponential backoff.
+    :param circuit_breaker: CircuitBreaker guarding every call (a default one if None).
+    :param transport: "live" to talk to GitLab, "record" to also save every
+                      response to 'cassette_dir', "replay" to serve them from
+                      there without touching the network.
+    :param cassette_dir: Directory of recorded responses.
+    :param replay_latency: Seconds each replayed response is delayed by.
+    """
+    self.api_url = api_url.rstrip("/")
+    self.pool_size = pool_size
+    self.session = requests.Session()
+    self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    self.session.mount("https://", self.adapter)
+    self.session.mount("http://", self.adapter)
+    self.transport = make_transport(transport, self.session, cassette_dir, replay_latency)
+    self.cache = ConditionalCache(cache_size)
+    # Concurrent identical GETs share one request
+    self.single_flight = SingleFlight()
+    self.rate_limiter = rate_limiter or RateLimiter()
+    self.max_rate_limit_retries = max_rate_limit_retries
+    self.page_executor = ThreadPoolExecutor(max_workers=max(1, page_concurrency), thread_name_prefix="api-pages")
+    self.timeout = timeout
+    self.max_retries = max_retries
+    self.retry_backoff = retry_backoff
+    self.breaker = circuit_breaker or CircuitBreaker()
+    self.token = None
+    self.set_token(token)
+
+    self._stats_lock = threading.Lock()
+    self.recent_calls = deque(maxlen=stats_history)
+    self.total_calls = 0
+    self.total_bytes = 0
+    self.total_latency = 0.0
+    self.reused_connections = 0
+    self.new_connections = 0
+
+  def set_token(self, token):
+    """Update the shared Private-Token header used by every request."""
+    token = (token or "").strip()
+    if token == self.token:
+      return
+    if self.token is not None:
+      # Cached bodies belong to the previous user
+      self.cache.clear()
+    self.token = token
+    if token:
+      self.session.headers["Private-Token"] = token
+    else:
+      self.session.headers.pop("Private-Token", None)
+
+  def url(self, path):
+    """Build an absolute API URL from a path like '/groups/1/projects'."""
+    if path.startswith("http://") or path.startswith("https://"):
+      return path
+    return self.api_url + "/" + path.lstrip("/")
+
+  def _connection_count(self):
+    """
+    Number of connections the adapter's urllib3 pools have opened so far.
+    Comparing it before and after a call tells us if a connection was reused.
+    """
+    try:
+      pools = self.adapter.poolmanager.pools
+      return sum(pools[key].num_connections for key in pools.keys())
+    except Exception:
+      return None
+
+  def _remaining(self, path, deadline):
+    """Seconds left until 'deadline' (None without one)."""
+    if deadline is None:
+      return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+      raise DeadlineExceeded(f"Deadline exceeded before calling {path}")
+    return remaining
+
+  def _timeout(self, path, deadline):
+    remaining = self._remaining(path, deadline)
+    if remaining is None:
+      return self.timeout
+    connect, read = self.timeout
+    return (min(connect, remaining), min(read, remaining))
+
+  def _retry_delay(self, attempt, path, deadline):
+    """Full-jitter exponential backoff, clipped to the deadline."""
+    delay = random.uniform(0, self.retry_backoff * (2 ** attempt))
+    remaining = self._remaining(path, deadline)
+    return delay if remaining is None else min(delay, remaining)
+
+  def request(self, method, path, token=None, retry=None, deadline=None, **kwargs):
+    """
+    Send a request through the transport (normally the pooled session) and
+    record its stats.
+
+    Every call has a connect/read timeout and goes through the circuit
+    breaker. Calls are paced by the rate limiter and 429 responses are
+    retried after their Retry-After delay, so they queue up rather than
+    fail. Connection errors, timeouts and 5xx responses are retried with
+    jittered exponential backoff when 'retry' is set (the default for GET).
+    'deadline' (a time.monotonic() value) bounds a batch of calls such as
+    one refresh: attempts starting after it raise DeadlineExceeded, and
+    timeouts and backoff delays are clipped to what is left of it.
+    Returns the raw requests.Response; callers decide how to handle errors.
+    """
+    if token is not None:
+      self.set_token(token)
+    if retry is None:
+      retry = method == "GET"
+
+    url = self.url(path)
+    attempts = (self.max_retries + 1) if retry else 1
+    failures = 0
+    rate_limited = 0
+    while True:
+      # Before the breaker, so running out of time never strands a trial
+      kwargs["timeout"] = self._timeout(path, deadline)
+      trial = self.breaker.before_call()
+      # Whether the call told the breaker how it went
+      recorded = False
+      try:
+        self.rate_limiter.acquire()
+        try:
+          r = self._send(method, url, path, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+          self.breaker.record_failure()
+          recorded = True
+          failures += 1
+          if failures >= attempts:
+            raise
+          delay = self._retry_delay(failures, path, deadline)
+          util.debug(f"{type(e).__name__} calling {path}, retrying in {delay:.1f}s (attempt {failures})")
+          time.sleep(delay)
+          continue
+
+        self.rate_limiter.update_from_headers(r.headers)
+        if r.status_code == 429 and rate_limited < self.max_rate_limit_retries:
+          # GitLab answered, so it is up: a 429 is no reason to keep the circuit open
+          self.breaker.record_success()
+          recorded = True
+          wait = parse_retry_after(r.headers.get("Retry-After"))
+          if wait is None:
+            wait = min(60.0, 2.0 ** rate_limited)
+          rate_limited += 1
+          util.debug(f"429 from {path}, retrying in {wait:.1f}s (attempt {rate_limited})")
+          r.close()
+          self.rate_limiter.backoff(wait)
+          continue
+
+        if r.status_code in RETRY_STATUSES:
+          self.breaker.record_failure()
+          recorded = True
+          failures += 1
+          if failures < attempts:
+            delay = self._retry_delay(failures, path, deadline)
+            util.debug(f"{r.status_code} from {path}, retrying in {delay:.1f}s (attempt {failures})")
+            r.close()
+            time.sleep(delay)
+            continue
+          return r
+
+        self.breaker.record_success()
+        recorded = True
+        return r
+      finally:
+        if trial and not recorded:
+          self.breaker.release_trial()
+
+  def _send(self, method, url, path, **kwargs):
+    before = self._connection_count()
+    start = time.perf_counter()
+    r = self.transport.send(method, url, **kwargs)
+    latency = time.perf_counter() - start
+    after = self._connection_count()
+
+    # With several threads sharing a pool this is a best-effort estimate.
+    reused = before is not None and after is not None and after == before
+    size = len(r.content) if not kwargs.get("stream") else int(r.headers.get("Content-Length", 0) or 0)
+    self._record(CallStats(method, path, r.status_code, latency, size, reused))
+    return r
+
+  def get(self, path, token=None, **kwargs):
+    return self.request("GET", path, token=token, **kwargs)
+
+  def post(self, path, token=None, **kwargs):
+    return self.request("POST", path, token=token, **kwargs)
+
+  def get_json(self, path, token=None, params=None, fields=None, deadline=None):
+    """
+    GET a JSON resource, revalidating any cached copy with
+    If-None-Match / If-Modified-Since. On a 304 the cached body is
+    returned as-is and nothing is decoded.
+
+    For list endpoints, 'fields' (see api.stream) makes the body be
+    stream-decoded one item at a time, keeping only those fields, so a
+    page of large objects is never held in memory all at once.
+    Concurrent calls for the same URL + params are coalesced, so they
+    share a single request and its result; calls with a 'deadline' (see
+    request) only share with each other, so no other caller can fail
+    because that deadline ran out.
+    Raises requests.HTTPError for error responses.
+    """
+    if token is not None:
+      self.set_token(token)
+    variant = json.dumps(fields, sort_keys=True) if fields else None
+    key = ConditionalCache.make_key(self.url(path), params, variant)
+    flight_key = key if deadline is None else (key, "deadline")
+    return self.single_flight.do(flight_key, lambda: self._get_json(key, path, params, fields, deadline))
+
+  def _get_json(self, key, path, params, fields, deadline):
+    entry = self.cache.get(key)
+    r = self.get(path, params=params, headers=self.cache.conditional_headers(entry), stream=bool(fields),
+                 deadline=deadline)
+
+    if r.status_code == 304 and entry is not None:
+      r.close()
+      self.cache.record_hit()
+      return JsonResponse(entry.data, entry.headers, r.status_code, not_modified=True)
+
+    try:
+      r.raise_for_status()
+      self.cache.record_miss()
+      data = decode_listing(r, fields) if fields else r.json()
+    finally:
+      r.close()
+    self.cache.store(key, r, data)
+    return JsonResponse(data, r.headers, r.status_code)
+
+  def get_paginated(self, path, token=None, params=None, per_page=100, fields=None, deadline=None):
+    """
+    GET every page of a list endpoint and return the concatenated items.
+
+    The first page tells us how many pages there are (X-Total-Pages), so
+    the rest are fetched in parallel and no empty trailing page is ever
+    requested. When GitLab leaves the total out (very large collections),
+    we walk X-Next-Page / the Link rel="next" header instead.
+    'fields' and 'deadline' are passed on to get_json for every page.
+    """
+    params = dict(params or {})
+    params["per_page"] = per_page
+    first = self.get_json(path, token=token, params={**params, "page": 1}, fields=fields, deadline=deadline)
+    items = list(first.data or [])
+
+    total_pages = _int_header(first.headers, "X-Total-Pages")
+    if total_pages is not None:
+      if total_pages > 1:
+        pages = self.page_executor.map(
+          lambda page: self.get_json(
+            path, token=token, params={**params, "page": page}, fields=fields, deadline=deadline
+          ).data or [],
+          range(2, total_pages + 1)
+        )
+        for page_items in pages:
+          items.extend(page_items)
+      util.debug(f"{path}: {len(items)} items in {total_pages} page(s).")
+      return items
+
+    response = first
+    while True:
+      next_link = response_next_link(response)
+      if next_link:
+        response = self.get_json(next_link, token=token, fields=fields, deadline=deadline)
+      else:
+        next_page = _int_header(response.headers, "X-Next-Page")
+        if not next_page:
+          break
+        response = self.get_json(path, token=token, params={**params, "page": next_page}, fields=fields,
+                                 deadline=deadline)
+      items.extend(response.data or [])
+    util.debug(f"{path}: {len(items)} items (unknown page count).")
+    return items
+
+  def _record(self, call):
+    with self._stats_lock:
+      self.recent_calls.append(call)
+      self.total_calls += 1
+      self.total_bytes += call.bytes
+      self.total_latency += call.latency
+      if call.reused:
+        self.reused_connections += 1
+      else:
+        self.new_connections += 1
+    util.debug(f"API {call}")
+
+  def stats(self):
+    """Return aggregate call stats as a plain dict."""
+    with self._stats_lock:
+      calls = self.total_calls
+      return {
+        "calls": calls,
+        "bytes": self.total_bytes,
+        "total_latency": self.total_latency,
+        "avg_latency": self.total_latency / calls if calls else 0.0,
+        "reused_connections": self.reused_connections,
+        "new_connections": self.new_connections,
+        **self.cache.stats(),
+        **self.rate_limiter.stats(),
+        **self.single_flight.stats(),
+        **self.breaker.stats(),
+      }
+
+  def reset_stats(self):
+    with self._stats_lock:
+      self.recent_calls.clear()
+      self.total_calls = 0
+      self.total_bytes = 0
+      self.total_latency = 0.0
+      self.reused_connections = 0
+      self.new_connections = 0
+
+  def close(self):
+    self.page_executor.shutdown(wait=False, cancel_futures=True)
+    self.transport.close()
+    self.session.close()
+
+
+def encode_id(value):
+  """
+  URL-encode a GitLab id for use in a path. Numeric ids pass through
+  unchanged, full paths like 'group/sub' become 'group%2Fsub'.
+  """
+  return quote(str(value), safe="")
+
+def _int_header(headers, name):
+  value = headers.get(name) if headers is not None else None
+  try:
+    return int(value) if value not in (None, "") else None
+  except ValueError:
+    return None
+
+def response_next_link(response):
+  """The URL of the Link rel="next" header, if the response has one."""
+  link = response.headers.get("Link") if response.headers is not None else None
+  if not link:
+    return None
+  for entry in parse_header_links(link):
+    if entry.get("rel") == "next":
+      return entry.get("url")
+  return None
+
@@ -0,0 +1,124 @@
+# internal imports
+import util
+
+class Namespace:
+  """
+  One group in a flat crawl. Groups missing from the descendant group
+  listing (e.g. when it failed) and owning no projects directly are only
+  known from their path, so their id falls back to the full path (GitLab
+  accepts a URL-encoded full path wherever it takes a group id).
+  """
+  __slots__ = ("id", "name", "full_name", "full_path", "web_url", "parent", "children", "projects")
+
+  def __init__(self, id, name, full_name, full_path, web_url, parent=None):
+    self.id = id
+    self.name = name
+    self.full_name = full_name
+    self.full_path = full_path
+    self.web_url = web_url
+    self.parent = parent
+    self.children = {}
+    self.projects = []
+
+  def get_full_name(self):
+    """'Root / Sub / Leaf', built from the names known so far."""
+    if self.parent is None:
+      return self.full_name
+    return f"{self.parent.get_full_name()} / {self.name}"
+
+  def as_group_dict(self):
+    """The REST-shaped subgroup dict the tree code expects."""
+    return {
+      "id": self.id,
+      "name": self.name,
+      "full_name": self.get_full_name(),
+      "full_path": self.full_path,
+      "web_url": self.web_url,
+    }
+
+
+class NamespaceIndex:
+  """
+  The group hierarchy below a root group, rebuilt from a single
+  include_subgroups=true project listing using each project's
+  namespace.full_path, plus a descendant_groups listing that gives every
+  group its real id (so ids in ignored_groups match) and brings in groups
+  without projects.
+  """
+  def __init__(self, root_group, projects, groups=()):
+    """
+    :param root_group: The root group as returned by GET /groups/:id.
+    :param projects: Every project below it, including subgroups.
+    :param groups: Every group below it (GET /groups/:id/descendant_groups).
+    """
+    self.root = Namespace(
+      root_group["id"],
+      root_group.get("name", ""),
+      root_group.get("full_name", root_group.get("name", "")),
+      root_group["full_path"],
+      root_group.get("web_url", "")
+    )
+    # e.g. "https://gitlab.com/groups/" so path-only groups still get a URL
+    web_url = self.root.web_url
+    self.web_prefix = web_url[:-len(self.root.full_path)] if web_url.endswith(self.root.full_path) else ""
+    self.by_path = {self.root.full_path: self.root}
+    self.by_id = {str(self.root.id): self.root}
+    for group in groups:
+      self.add_group(group)
+    for project in projects:
+      self.add_project(project)
+    util.debug(f"Flat crawl indexed {len(projects)} projects in {len(self.by_path)} groups.")
+
+  def ensure_namespace(self, full_path):
+    """Return the namespace for full_path, creating it and its parents."""
+    ns = self.by_path.get(full_path)
+    if ns is not None:
+      return ns
+    parent_path, _, name = full_path.rpartition("/")
+    if not full_path.startswith(self.root.full_path + "/"):
+      return None
+    parent = self.ensure_namespace(parent_path)
+    ns = Namespace(full_path, name, None, full_path, self.web_prefix + full_path, parent)
+    parent.children[full_path] = ns
+    self.by_path[full_path] = ns
+    self.by_id[full_path] = ns
+    return ns
+
+  def identify(self, ns, group_id, name=None, web_url=None):
+    """Give a namespace known only by its path its real id, name and URL."""
+    if ns is self.root or ns.id != ns.full_path or group_id is None:
+      return
+    ns.id = group_id
+    ns.name = name or ns.name
+    ns.web_url = web_url or ns.web_url
+    self.by_id[str(group_id)] = ns
+
+  def add_group(self, group):
+    full_path = group.get("full_path")
+    ns = self.ensure_namespace(full_path) if full_path else None
+    if ns is not None:
+      self.identify(ns, group.get("id"), group.get("name"), group.get("web_url"))
+
+  def add_project(self, project):
+    namespace = project.get("namespace") or {}
+    full_path = namespace.get("full_path")
+    if not full_path:
+      return
+    ns = self.ensure_namespace(full_path)
+    if ns is None:
+      util.debug(f"Project {project.get('id')} is outside {self.root.full_path}, skipping.")
+      return
+    # Without the group listing, the first project seen in a group tells its real id and name
+    self.identify(ns, namespace.get("id"), namespace.get("name"), namespace.get("web_url"))
+    ns.projects.append(project)
+
+  def get(self, group_id):
+    return self.by_id.get(str(group_id))
+
+  def subgroups(self, group_id):
+    ns = self.get(group_id)
+    return [child.as_group_dict() for child in ns.children.values()] if ns else []
+
+  def projects(self, group_id):
+    ns = self.get(group_id)
+    return list(ns.projects) if ns else []
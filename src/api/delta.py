@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+# internal imports
+import util
+from api.client import encode_id
+
+# Pipelines in these states can change without any new project activity
+ACTIVE_STATUSES = ("created", "waiting_for_resource", "preparing", "pending", "running", "scheduled")
+
+class DeltaPoller:
+  """
+  Finds which projects below a group had activity since the last cycle,
+  using one last_activity_after listing per cycle instead of one pipeline
+  request per project.
+
+  GitLab only bumps a project's last_activity_at about once an hour, and a
+  pipeline finishing does not bump it at all, so the watermark trails the
+  clock by 'margin_seconds', pipelines that are still active are always
+  re-checked by the caller, and every 'full_refresh_every' cycles the
+  caller is told to re-check everything.
+  """
+  def __init__(self, client, margin_seconds=3600, full_refresh_every=12):
+    self.client = client
+    self.margin = timedelta(seconds=margin_seconds)
+    self.full_refresh_every = max(1, full_refresh_every)
+    self.watermarks = {}
+    self.cycles = {}
+
+  def reset(self):
+    self.watermarks.clear()
+    self.cycles.clear()
+
+  def changed_project_ids(self, token, group_id, deadline=None):
+    """
+    Return the ids (as strings) of projects below group_id with activity
+    after the stored watermark, or None when every project should be
+    re-checked (first cycle, periodic full refresh, or a failed listing).
+    'deadline' is passed on to the listing (see GitLabClient.request).
+    """
+    key = str(group_id)
+    watermark = self.watermarks.get(key)
+    cycle = self.cycles.get(key, 0)
+    self.cycles[key] = cycle + 1
+    next_watermark = (datetime.now(timezone.utc) - self.margin).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    if watermark is None or cycle % self.full_refresh_every == 0:
+      util.debug(f"Delta poll: full refresh of group {group_id} (cycle {cycle}).")
+      self.watermarks[key] = next_watermark
+      return None
+
+    try:
+      projects = self.client.get_paginated(
+        f"/groups/{encode_id(group_id)}/projects",
+        token=token,
+        params={
+          "include_subgroups": "true",
+          "last_activity_after": watermark,
+          "order_by": "last_activity_at",
+          "simple": "true",
+        },
+        fields={"id": None},
+        deadline=deadline
+      )
+    except Exception as e:
+      util.debug(f"Delta poll failed for group {group_id}, re-checking everything: {e}")
+      return None
+
+    self.watermarks[key] = next_watermark
+    changed = {str(p["id"]) for p in projects}
+    util.debug(f"Delta poll: {len(changed)} projects active in group {group_id} since {watermark}.")
+    return changed
@@ -0,0 +1,159 @@
+import json
+
+# internal imports
+import util
+from api.client import encode_id
+
+PROJECTS_QUERY = """
+query($fullPath: ID!, $first: Int!, $after: String) {
+  group(fullPath: $fullPath) {
+    projects(includeSubgroups: false, first: $first, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        id
+        name
+        webUrl
+        %s
+      }
+    }
+  }
+}
+"""
+
+PIPELINE_FIELDS = "nodes { id status ref }"
+
+class GraphQLError(RuntimeError):
+  """Raised when the GraphQL endpoint answers with an 'errors' payload."""
+  pass
+
+
+def graphql_url_for(api_url):
+  """
+  Derive the GraphQL endpoint from the REST base URL,
+  e.g. https://gitlab.com/api/v4 -> https://gitlab.com/api/graphql
+  """
+  api_url = api_url.rstrip("/")
+  if api_url.endswith("/v4"):
+    return api_url[:-len("/v4")] + "/graphql"
+  return api_url + "/graphql"
+
+def parse_gid(gid):
+  """Turn a global id like 'gid://gitlab/Project/42' into 42."""
+  tail = str(gid).rsplit("/", 1)[-1]
+  return int(tail) if tail.isdigit() else tail
+
+
+class GraphQLBackend:
+  """
+  Fetches a group's projects together with their latest pipeline in
+  batches of up to 100 projects per request, using GitLab's GraphQL API.
+
+  Every project returned carries a "pipeline" entry (status, ref, id) when
+  its pipeline could be resolved from the batch, so callers can skip the
+  per-project REST lookup for it.
+  """
+  def __init__(self, client, graphql_url, page_size=100, pipeline_window=20):
+    """
+    :param client: The shared GitLabClient used to send the requests.
+    :param graphql_url: Full URL of the GraphQL endpoint.
+    :param page_size: Projects per GraphQL request (GitLab caps this at 100).
+    :param pipeline_window: When no refs are configured, how many recent
+                            pipelines to scan for one on the default branch.
+    """
+    self.client = client
+    self.graphql_url = graphql_url
+    self.page_size = min(max(1, page_size), 100)
+    self.pipeline_window = pipeline_window
+    self.group_paths = {}
+
+  def query(self, token, query, variables):
+    # Queries are read-only, so they are safe to retry like a GET
+    r = self.client.post(self.graphql_url, token=token, retry=True, json={"query": query, "variables": variables})
+    r.raise_for_status()
+    payload = r.json()
+    if payload.get("errors"):
+      raise GraphQLError("; ".join(e.get("message", str(e)) for e in payload["errors"]))
+    return payload.get("data") or {}
+
+  def get_group_full_path(self, token, group_id):
+    """GraphQL looks groups up by full path, so resolve (and remember) it once."""
+    key = str(group_id)
+    if key not in self.group_paths:
+      group = self.client.get_json(f"/groups/{encode_id(group_id)}", token=token, params={"with_projects": "false"}).data
+      self.group_paths[key] = group["full_path"]
+    return self.group_paths[key]
+
+  def build_query(self, refs):
+    """
+    Build the projects query. Each configured ref becomes an aliased
+    pipelines(first: 1, ref: ...) field so one request covers all of them.
+    """
+    if refs:
+      fields = "\n        ".join(
+        f"p{i}: pipelines(first: 1, ref: {json.dumps(ref)}) {{ {PIPELINE_FIELDS} }}"
+        for i, ref in enumerate(refs)
+      )
+    else:
+      fields = (
+        "repository { rootRef }\n        "
+        f"p0: pipelines(first: {self.pipeline_window}) {{ {PIPELINE_FIELDS} }}"
+      )
+    return PROJECTS_QUERY % fields
+
+  def resolve_pipeline(self, node, refs):
+    """
+    Pick the pipeline for a project node, honouring the order of refs.
+    Returns (status, ref, id), or None if the batch could not decide.
+    """
+    if refs:
+      for i in range(len(refs)):
+        pipelines = (node.get(f"p{i}") or {}).get("nodes") or []
+        if pipelines:
+          p = pipelines[0]
+          return p["status"].lower(), p["ref"], parse_gid(p["id"])
+      return "No pipeline found", "", ""
+
+    # Without configured refs the REST API reports the default branch pipeline
+    root_ref = ((node.get("repository") or {}).get("rootRef")) or None
+    pipelines = (node.get("p0") or {}).get("nodes") or []
+    if not pipelines:
+      return "No pipeline found", "", ""
+    for p in pipelines:
+      if root_ref and p["ref"] == root_ref:
+        return p["status"].lower(), p["ref"], parse_gid(p["id"])
+    # Not in the recent window, let the REST path look it up
+    return None
+
+  def get_group_projects(self, token, group_id, refs=None):
+    """
+    Return the group's direct projects as REST-shaped dicts
+    ({"id", "name", "web_url"}), each with a "pipeline" tuple when resolved.
+    """
+    full_path = self.get_group_full_path(token, group_id)
+    query = self.build_query(refs)
+    projects = []
+    after = None
+    while True:
+      data = self.query(token, query, {"fullPath": full_path, "first": self.page_size, "after": after})
+      group = data.get("group")
+      if not group:
+        raise GraphQLError(f"Group not found: {full_path}")
+
+      connection = group["projects"]
+      for node in connection.get("nodes") or []:
+        project = {
+          "id": parse_gid(node["id"]),
+          "name": node["name"],
+          "web_url": node.get("webUrl", ""),
+        }
+        pipeline = self.resolve_pipeline(node, refs)
+        if pipeline is not None:
+          project["pipeline"] = pipeline
+        projects.append(project)
+
+      page_info = connection.get("pageInfo") or {}
+      util.debug(f"GraphQL: {len(projects)} projects fetched for {full_path}.")
+      if not page_info.get("hasNextPage"):
+        break
+      after = page_info.get("endCursor")
+    return projects
@@ -0,0 +1,118 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+# internal imports
+import util
+
+def parse_retry_after(value):
+  """
+  Parse a Retry-After header (delta seconds or an HTTP date) into seconds.
+  Returns None if the header is missing or unreadable.
+  """
+  if not value:
+    return None
+  value = value.strip()
+  if value.isdigit():
+    return float(value)
+  try:
+    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+  except (TypeError, ValueError):
+    return None
+
+
+class RateLimiter:
+  """
+  A thread-safe token bucket that paces every outgoing API call.
+
+  The bucket refills at 'rate' tokens per second up to 'burst'; with a
+  rate of 0 (the default) calls aren't paced until GitLab asks for it.
+  GitLab's RateLimit-* headers can lower the pace, and a 429 Retry-After
+  pauses the whole bucket, so callers queue up instead of failing.
+  """
+  def __init__(self, rate=0.0, burst=20, reserve=5):
+    """
+    :param rate: Sustained requests per second allowed by default (0 = unpaced).
+    :param burst: Max number of requests that can go out back to back.
+    :param reserve: When RateLimit-Remaining drops to this many requests,
+                    spread the rest evenly until RateLimit-Reset.
+    """
+    self.rate = float(rate)
+    self.burst = float(burst)
+    self.reserve = reserve
+    self.tokens = float(burst)
+    self.current_rate = self.rate
+    self.last_refill = time.monotonic()
+    self.pause_until = 0.0
+    self.lock = threading.Lock()
+    self.throttled = 0
+    self.total_wait = 0.0
+
+  def _refill(self, now):
+    elapsed = now - self.last_refill
+    self.last_refill = now
+    self.tokens = min(self.burst, self.tokens + elapsed * self.current_rate)
+
+  def acquire(self):
+    """Block until a request may be sent."""
+    waited = 0.0
+    while True:
+      with self.lock:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.pause_until:
+          wait = self.pause_until - now
+        elif not self.current_rate:
+          return waited
+        elif self.tokens >= 1:
+          self.tokens -= 1
+          if waited:
+            self.throttled += 1
+            self.total_wait += waited
+          return waited
+        else:
+          wait = (1 - self.tokens) / self.current_rate
+      time.sleep(wait)
+      waited += wait
+
+  def backoff(self, seconds):
+    """Pause all callers for 'seconds' (e.g. from a 429 Retry-After)."""
+    with self.lock:
+      self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+      self.tokens = 0.0
+    util.debug(f"Rate limited, pausing requests for {seconds:.1f}s")
+
+  def update_from_headers(self, headers):
+    """
+    Adjust the pace from GitLab's RateLimit-Remaining / RateLimit-Reset
+    headers. Once the remaining budget gets close to the reserve, the
+    remaining requests are spread over the time left in the window.
+    """
+    remaining = headers.get("RateLimit-Remaining")
+    reset = headers.get("RateLimit-Reset")
+    if remaining is None or reset is None:
+      return
+    try:
+      remaining = int(remaining)
+      window = max(1.0, float(reset) - time.time())
+    except ValueError:
+      return
+
+    with self.lock:
+      if remaining <= 0:
+        self.pause_until = max(self.pause_until, time.monotonic() + window)
+        self.tokens = 0.0
+      elif remaining <= self.reserve * 10:
+        # At least one call per window, so the window can't outlast a tiny rate
+        spread = max(1, remaining - self.reserve) / window
+        self.current_rate = min(self.rate, spread) if self.rate else spread
+      else:
+        self.current_rate = self.rate
+
+  def stats(self):
+    with self.lock:
+      return {
+        "throttled_calls": self.throttled,
+        "throttled_seconds": self.total_wait,
+        "current_rate": self.current_rate,
+      }
@@ -0,0 +1,56 @@
+import threading
+
+class _Call:
+  __slots__ = ("done", "result", "error")
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.result = None
+    self.error = None
+
+
+class SingleFlight:
+  """
+  Coalesces concurrent calls that share a key: the first caller runs the
+  function, everyone who asks for the same key while it is in flight
+  waits for and shares that one result (or exception).
+  """
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.calls = {}
+    self.executed = 0
+    self.saved = 0
+
+  def do(self, key, fn):
+    with self.lock:
+      call = self.calls.get(key)
+      leader = call is None
+      if leader:
+        call = self.calls[key] = _Call()
+        self.executed += 1
+      else:
+        self.saved += 1
+
+    if not leader:
+      call.done.wait()
+      if call.error is not None:
+        raise call.error
+      return call.result
+
+    try:
+      call.result = fn()
+      return call.result
+    except BaseException as e:
+      call.error = e
+      raise
+    finally:
+      with self.lock:
+        del self.calls[key]
+      call.done.set()
+
+  def stats(self):
+    with self.lock:
+      return {
+        "coalesced_calls": self.saved,
+        "in_flight": len(self.calls),
+      }
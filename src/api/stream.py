@@ -0,0 +1,103 @@
+import codecs
+import json
+
+# Fields the app actually reads from listing responses. A nested dict keeps
+# only those sub-fields, None keeps the value as is.
+PROJECT_FIELDS = {
+  "id": None,
+  "name": None,
+  "web_url": None,
+  "last_activity_at": None,
+  "namespace": {"id": None, "name": None, "full_path": None, "web_url": None},
+}
+
+GROUP_FIELDS = {
+  "id": None,
+  "name": None,
+  "full_name": None,
+  "full_path": None,
+  "web_url": None,
+}
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = ",]" + _WHITESPACE
+
+def slim(item, fields):
+  """Keep only the given fields of a decoded JSON object."""
+  if fields is None or not isinstance(item, dict):
+    return item
+  out = {}
+  for name, sub_fields in fields.items():
+    if name in item:
+      out[name] = slim(item[name], sub_fields)
+  return out
+
+def iter_json_array(chunks):
+  """
+  Incrementally decode a top-level JSON array from an iterable of byte
+  chunks, yielding one element at a time. Only the element being decoded
+  and the unread part of the current chunk are held in memory.
+  """
+  decoder = json.JSONDecoder()
+  text_decoder = codecs.getincrementaldecoder("utf-8")()
+  buffer = ""
+  pos = 0
+  started = False
+  finished = False
+  chunks = iter(chunks)
+
+  while not finished:
+    chunk = next(chunks, None)
+    if chunk is None:
+      buffer += text_decoder.decode(b"", final=True)
+    else:
+      buffer = buffer[pos:] + text_decoder.decode(chunk)
+      pos = 0
+
+    while True:
+      while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+      if pos >= len(buffer):
+        break
+
+      if not started:
+        if buffer[pos] != "[":
+          raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+        started = True
+        pos += 1
+        continue
+
+      if buffer[pos] == "]":
+        finished = True
+        break
+      if buffer[pos] == ",":
+        pos += 1
+        continue
+
+      try:
+        item, end = decoder.raw_decode(buffer, pos)
+      except json.JSONDecodeError:
+        # The element continues in the next chunk
+        if chunk is None:
+          raise
+        break
+      if chunk is not None and not isinstance(item, (dict, list, str)) \
+          and (end >= len(buffer) or buffer[end] not in _DELIMITERS):
+        # A bare number like "2." could still continue in the next chunk
+        break
+      pos = end
+      yield item
+
+    if chunk is None and not finished:
+      raise ValueError("Truncated JSON array")
+
+def decode_listing(response, fields):
+  """Stream-decode a JSON list response, keeping only 'fields' of each item."""
+  chunks = response.iter_content(CHUNK_SIZE)
+  items = [slim(item, fields) for item in iter_json_array(chunks)]
+  # Read to the end so the keep-alive connection goes back to the pool
+  for _ in chunks:
+    pass
+  return items
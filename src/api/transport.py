@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# internal imports
+import util
+
+# Never written to a cassette
+SENSITIVE_HEADERS = ("set-cookie", "private-token", "authorization", "cookie")
+SENSITIVE_PARAMS = ("private_token", "access_token", "job_token")
+
+def _params_list(url, params):
+  """Query parameters from both the URL and 'params', minus anything secret."""
+  query = parse_qsl(urlsplit(url).query, keep_blank_values=True)
+  if isinstance(params, dict):
+    query.extend((str(k), str(v)) for k, v in params.items() if v is not None)
+  elif params:
+    query.extend((str(k), str(v)) for k, v in params)
+  return sorted((k, v) for k, v in query if k.lower() not in SENSITIVE_PARAMS)
+
+def request_key(method, url, params=None, json_body=None):
+  """
+  Identify a request independently of host, headers and token, so a
+  cassette recorded against one instance replays against any base URL.
+  """
+  path = urlsplit(url).path
+  query = urlencode(_params_list(url, params))
+  body = json.dumps(json_body, sort_keys=True) if json_body is not None else ""
+  return f"{method.upper()} {path}?{query} {body}"
+
+def cassette_name(key):
+  return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+
+
+class LiveTransport:
+  """Sends requests to GitLab over the client's pooled session."""
+  def __init__(self, session):
+    self.session = session
+
+  def send(self, method, url, **kwargs):
+    return self.session.request(method, url, **kwargs)
+
+  def close(self):
+    pass
+
+
+class RecordingTransport:
+  """
+  Wraps another transport and writes every response it gets to a cassette
+  file (one per distinct request) with secrets stripped out.
+  """
+  def __init__(self, inner, cassette_dir):
+    self.inner = inner
+    self.cassette_dir = cassette_dir
+    self.lock = threading.Lock()
+    os.makedirs(cassette_dir, exist_ok=True)
+
+  def send(self, method, url, **kwargs):
+    r = self.inner.send(method, url, **kwargs)
+    if r.status_code == 304:
+      # Keep the full recording we already have for this request
+      return r
+
+    key = request_key(method, url, kwargs.get("params"), kwargs.get("json"))
+    record = {
+      "request": {
+        "method": method.upper(),
+        "path": urlsplit(url).path,
+        "params": _params_list(url, kwargs.get("params")),
+        "json": kwargs.get("json"),
+      },
+      "response": {
+        "status_code": r.status_code,
+        "headers": {k: v for k, v in r.headers.items() if k.lower() not in SENSITIVE_HEADERS},
+        # Reading .content here still lets callers stream it afterwards
+        "body": r.content.decode(r.encoding or "utf-8", errors="replace"),
+      },
+    }
+    path = os.path.join(self.cassette_dir, cassette_name(key))
+    with self.lock:
+      with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    util.debug(f"Recorded {key} -> {path}")
+    return r
+
+  def close(self):
+    self.inner.close()
+
+
+class ReplayTransport:
+  """
+  Serves responses from cassette files instead of the network, with
+  optional latency injection. Conditional requests get a 304 when their
+  If-None-Match matches the recorded ETag; unknown requests get a 404.
+  """
+  def __init__(self, cassette_dir, latency=0.0, jitter=0.0):
+    """
+    :param cassette_dir: Directory written by RecordingTransport.
+    :param latency: Seconds to wait before answering each request.
+    :param jitter: Extra random delay of up to this many seconds.
+    """
+    self.cassette_dir = cassette_dir
+    self.latency = latency
+    self.jitter = jitter
+    self.records = {}
+    self.lock = threading.Lock()
+
+  def load(self, key):
+    with self.lock:
+      if key not in self.records:
+        path = os.path.join(self.cassette_dir, cassette_name(key))
+        try:
+          with open(path, "r", encoding="utf-8") as f:
+            self.records[key] = json.load(f)["response"]
+        except FileNotFoundError:
+          self.records[key] = None
+      return self.records[key]
+
+  def send(self, method, url, **kwargs):
+    delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+    if delay:
+      time.sleep(delay)
+
+    key = request_key(method, url, kwargs.get("params"), kwargs.get("json"))
+    recorded = self.load(key)
+
+    r = requests.Response()
+    r.url = url
+    r.encoding = "utf-8"
+    r.request = requests.Request(method, url, params=kwargs.get("params")).prepare()
+    # Lets iter_content() (streamed listings) slice the in-memory body
+    r._content_consumed = True
+    if recorded is None:
+      util.debug(f"Replay: no recording for {key}")
+      r.status_code = 404
+      r.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+      r._content = b'{"message": "404 Not recorded"}'
+      return r
+
+    r.headers = CaseInsensitiveDict(recorded["headers"])
+    if_none_match = (kwargs.get("headers") or {}).get("If-None-Match")
+    if if_none_match and if_none_match == r.headers.get("ETag"):
+      r.status_code = 304
+      r._content = b""
+      return r
+
+    r.status_code = recorded["status_code"]
+    r._content = recorded["body"].encode("utf-8")
+    # The body was re-encoded, so the recorded length may no longer match
+    r.headers["Content-Length"] = str(len(r._content))
+    r.headers.pop("Content-Encoding", None)
+    r.headers.pop("Transfer-Encoding", None)
+    return r
+
+  def close(self):
+    pass
+
+
+TRANSPORT_MODES = ("live", "record", "replay")
+
+def make_transport(mode, session, cassette_dir="cassettes", replay_latency=0.0):
+  """Build the transport for a 'transport' setting value."""
+  mode = (mode or "live").lower()
+  if mode not in TRANSPORT_MODES:
+    raise ValueError(f"Unknown transport '{mode}', expected one of {', '.join(TRANSPORT_MODES)}")
+  if mode == "replay":
+    util.debug(f"Replaying GitLab responses from {cassette_dir}")
+    return ReplayTransport(cassette_dir, latency=replay_latency)
+  live = LiveTransport(session)
+  if mode == "record":
+    util.debug(f"Recording GitLab responses to {cassette_dir}")
+    return RecordingTransport(live, cassette_dir)
+  return live
@@ -6,8 +6,11 @@ import requests
 import os
 import time
 import json
+import zlib
+import queue
 import asyncio
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 if sys.platform == "win32":
   dwmapi = ctypes.WinDLL("dwmapi")
@@ -20,6 +23,21 @@ util.DEBUG_ENABLED = settings.get("debug", False)
 from tray.trayapp import TrayApp
 from notification import Notification
 from event import EventBus
+from webhook import WebhookServer
+from scheduler import PollScheduler
+from model import (
+  TreeModel, GroupNode, ProjectNode, node_from_values, sort_key,
+  UNFETCHED, FETCHED, REFRESH, PLACEHOLDER_TEXT, PENDING_STATUS
+)
+from reconcile import reconcile_children, merge_children
+from virtual import VirtualWindow
+from api.client import GitLabClient, encode_id
+from api.crawl import NamespaceIndex
+from api.delta import DeltaPoller, ACTIVE_STATUSES
+from api.stream import PROJECT_FIELDS, GROUP_FIELDS
+from api.ratelimit import RateLimiter
+from api.breaker import CircuitBreaker
+from api.graphql import GraphQLBackend, GraphQLError, graphql_url_for
 
 # If you need image scaling, install Pillow (pip install pillow).
 try:
@@ -34,15 +52,75 @@ except ImportError:
 
 APP_NAME = "GitLab Pipelines"
 GITLAB_API_URL = settings.get("gitlab_api_url", "https://gitlab.com/api/v4")
+GITLAB_GRAPHQL_URL = settings.get("gitlab_graphql_url", graphql_url_for(GITLAB_API_URL))
+USE_GRAPHQL = settings.get("use_graphql", False)
+GRAPHQL_PAGE_SIZE = settings.get("graphql_page_size", 100)
 GROUP_NAME = settings.get("group_name", "insurance-insight")
 CACHE_FILE = "cache.json"
 CACHE_REFRESH_SECONDS = settings.get("cache_refresh_seconds", 10 * 60)
 REFRESH_RATE_SECONDS = settings.get("refresh_rate_seconds", 5 * 60)
 IGNORED_GROUPS = settings.get("ignored_groups", [ "10926345", "6622675" ])
+# "tree" lists every group on expand, "flat" crawls the whole org in one listing
+CRAWL_MODE = settings.get("crawl_mode", "tree")
+# Only re-check projects with recent activity (plus active pipelines) on refresh
+INCREMENTAL_POLLING = settings.get("incremental_polling", False)
+FULL_REFRESH_EVERY = settings.get("full_refresh_every", 12)
+# Per-project polling intervals driven by pipeline status instead of one fixed cycle
+ADAPTIVE_POLLING = settings.get("adaptive_polling", False)
+POLL_TICK_SECONDS = settings.get("poll_tick_seconds", 2)
+POLL_ACTIVE_SECONDS = settings.get("poll_active_seconds", 10)
+POLL_FAILED_SECONDS = settings.get("poll_failed_seconds", 60)
+POLL_STABLE_SECONDS = settings.get("poll_stable_seconds", 5 * 60)
+POLL_MAX_SECONDS = settings.get("poll_max_seconds", 60 * 60)
+POLL_BUDGET_PER_MINUTE = settings.get("poll_budget_per_minute", 60)
 BRANCHES = {
   "4241428": ["2.0-SNAPSHOT", "2.0.0-SNAPSHOT", "1.0-SNAPSHOT", "1.0.0-SNAPSHOT"]
 }
+# How many recent pipelines to list when resolving BRANCHES in one request
+# (GitLab caps per_page at 100)
+BRANCH_LISTING_SIZE = min(settings.get("branch_listing_size", 100), 100)
 DARK_MODE = settings.get("dark_mode", True)
+# Optional listener for GitLab "Pipeline events" webhooks
+WEBHOOK_ENABLED = settings.get("webhook_enabled", False)
+WEBHOOK_HOST = settings.get("webhook_host", "127.0.0.1")
+WEBHOOK_PORT = settings.get("webhook_port", 8765)
+WEBHOOK_SECRET = settings.get("webhook_secret", os.getenv("GITLAB_WEBHOOK_SECRET", ""))
+WEBHOOK_FALLBACK_REFRESH_SECONDS = settings.get("webhook_fallback_refresh_seconds", 30 * 60)
+MAX_CONCURRENCY = max(1, settings.get("max_concurrency", 8))
+POOL_SIZE = max(settings.get("pool_size", 10), MAX_CONCURRENCY)
+ETAG_CACHE_SIZE = settings.get("etag_cache_size", 2000)
+# Client-side pacing of API calls (0 = off: only GitLab's RateLimit-* headers and 429s slow us down)
+RATE_LIMIT_PER_SECOND = settings.get("rate_limit_per_second", 0)
+RATE_LIMIT_BURST = settings.get("rate_limit_burst", 20)
+PAGE_CONCURRENCY = settings.get("page_concurrency", 4)
+CONNECT_TIMEOUT_SECONDS = settings.get("connect_timeout_seconds", 5)
+READ_TIMEOUT_SECONDS = settings.get("read_timeout_seconds", 30)
+MAX_RETRIES = settings.get("max_retries", 3)
+RETRY_BACKOFF_SECONDS = settings.get("retry_backoff_seconds", 0.5)
+BREAKER_FAILURE_THRESHOLD = settings.get("breaker_failure_threshold", 5)
+BREAKER_RESET_SECONDS = settings.get("breaker_reset_seconds", 60)
+# Max time a single refresh may spend talking to GitLab
+REFRESH_DEADLINE_SECONDS = settings.get("refresh_deadline_seconds", 120)
+# "live", "record" (also save responses to cassette_dir) or "replay" (offline)
+TRANSPORT = settings.get("transport", "live")
+CASSETTE_DIR = settings.get("cassette_dir", "cassettes")
+REPLAY_LATENCY_MS = settings.get("replay_latency_ms", 0)
+# Threads running GitLab requests for the UI (results are applied on the Tk thread)
+WORKER_THREADS = max(1, settings.get("worker_threads", 4))
+# Groups with more projects than this only materialize a scrolling window of rows (0 = never)
+VIRTUAL_THRESHOLD = settings.get("virtual_threshold", 1000)
+VIRTUAL_WINDOW_ROWS = settings.get("virtual_window_rows", 200)
+# Collapsed subtrees idle this long are dropped from the tree until expanded again (0 = never)
+EVICT_IDLE_SECONDS = settings.get("evict_idle_seconds", 15 * 60)
+# Rows above which the longest collapsed subtrees are evicted even before that (0 = no limit)
+TREE_ROW_BUDGET = settings.get("tree_row_budget", 20000)
+EVICT_CHECK_SECONDS = 60
+# Most rows the filter box shows (matches beyond this are only counted)
+FILTER_MAX_RESULTS = settings.get("filter_max_results", 500)
+FILTER_DELAY_MS = 100
+# How often, and for how long at most, the Tk thread applies finished work
+UI_QUEUE_POLL_MS = 20
+UI_QUEUE_BUDGET_SECONDS = 0.03
 
 class PipelineCheckerApp(tk.Tk):
   def __init__(self, notif_icon_path="assets/images/notification", event_loop=asyncio.get_event_loop()):
@@ -52,7 +130,13 @@ class PipelineCheckerApp(tk.Tk):
     self._offsety = 0
     self.event_loop = event_loop
     self.title(APP_NAME)
-    self.iconbitmap("assets/images/logo.ico") 
+    try:
+      self.iconbitmap("assets/images/logo.ico")
+    except tk.TclError:
+      # .ico files are only supported on Windows
+      if ImageTk:
+        self.logo_image = ImageTk.PhotoImage(Image.open("assets/images/logo.png"))
+        self.iconphoto(True, self.logo_image)
     self.minsize(width=690, height=200)
     self.notification = Notification(
       app_name=APP_NAME,
@@ -65,6 +149,7 @@ class PipelineCheckerApp(tk.Tk):
     self.notifications = []
 
     self.after(10, self.try_dark_title_bar)
+    self.after(UI_QUEUE_POLL_MS, self.drain_ui_queue)
     self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     util.debug("Initializing main app window.")
@@ -73,6 +158,68 @@ class PipelineCheckerApp(tk.Tk):
     # Load token from environment
     self.token_var = tk.StringVar()
     self.token_var.set(os.getenv("GITLAB_TOKEN", ""))
+    if TRANSPORT == "replay" and not self.token_var.get():
+      # Recordings don't need a real token, but the UI insists on one
+      self.token_var.set("replay")
+
+    # Shared, pooled API client used by every GitLab helper
+    self.api = GitLabClient(
+      GITLAB_API_URL,
+      self.token_var.get(),
+      pool_size=POOL_SIZE,
+      cache_size=ETAG_CACHE_SIZE,
+      rate_limiter=RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST),
+      page_concurrency=PAGE_CONCURRENCY,
+      timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+      max_retries=MAX_RETRIES,
+      retry_backoff=RETRY_BACKOFF_SECONDS,
+      circuit_breaker=CircuitBreaker(
+        BREAKER_FAILURE_THRESHOLD,
+        BREAKER_RESET_SECONDS,
+        on_state_change=self.on_circuit_state_change
+      ),
+      transport=TRANSPORT,
+      cassette_dir=CASSETTE_DIR,
+      replay_latency=REPLAY_LATENCY_MS / 1000
+    )
+    self.stale_since = None
+    self.last_refresh_text = ""
+    # Bounded pool used to fan out per-project pipeline requests
+    self.executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="pipeline-fetch")
+    # Separate pool for per-branch probes, which run from inside the pool above
+    self.probe_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="branch-probe")
+    # All network I/O started from the UI runs here; results come back via ui_queue
+    self.worker_executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="ui-worker")
+    # Cache writes, one at a time so they land in order
+    self.save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-save")
+    self.ui_queue = queue.Queue()
+    # What the tree shows, indexed by item id and GitLab id
+    self.model = TreeModel()
+    # Group node -> VirtualWindow, for groups too large to materialize
+    self.virtual_windows = {}
+    # Group node -> when it was collapsed (time.monotonic), for eviction
+    self.collapsed_at = {}
+    self.jobs_in_flight = 0
+    self.refreshing = False
+    self.save_pending = False
+    # Optional batch backend: projects + latest pipelines, 100 per request
+    self.graphql = GraphQLBackend(self.api, GITLAB_GRAPHQL_URL, page_size=GRAPHQL_PAGE_SIZE) if USE_GRAPHQL else None
+    # Group hierarchy from the last flat crawl (crawl_mode = "flat")
+    self.namespace_index = None
+    # Per-group activity watermarks for incremental refreshes
+    self.delta_poller = DeltaPoller(
+      self.api,
+      margin_seconds=3600 + REFRESH_RATE_SECONDS,
+      full_refresh_every=FULL_REFRESH_EVERY
+    ) if INCREMENTAL_POLLING else None
+    # Next-due times per project when adaptive polling is on
+    self.poll_scheduler = PollScheduler(
+      active_interval=POLL_ACTIVE_SECONDS,
+      failed_interval=POLL_FAILED_SECONDS,
+      stable_interval=POLL_STABLE_SECONDS,
+      max_interval=POLL_MAX_SECONDS,
+      budget_per_minute=POLL_BUDGET_PER_MINUTE
+    ) if ADAPTIVE_POLLING else None
 
     def pipeline_status_changed(project_id, project_name, old_status, new_status):
       if old_status != "fetched":
@@ -138,6 +285,15 @@ class PipelineCheckerApp(tk.Tk):
     refresh_button = ttk.Button(input_frame, text="Refresh", command=self.refresh_groups)
     refresh_button.pack(side="left", padx=5)
 
+    # Filter box: narrows the tree to matching groups/projects (and their ancestors)
+    self.filter_var = tk.StringVar()
+    self.filter_after = None
+    self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+    ttk.Label(input_frame, text="Filter:", font=("Arial", 12)).pack(side="left", padx=(15, 0))
+    filter_entry = ttk.Entry(input_frame, textvariable=self.filter_var, width=30)
+    filter_entry.bind("<Escape>", lambda e: self.filter_var.set(""))
+    filter_entry.pack(side="left", padx=5)
+
     # Tree frame
     tree_frame = ttk.Frame(self)
     tree_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
@@ -148,14 +304,22 @@ class PipelineCheckerApp(tk.Tk):
     self.tree = ttk.Treeview(tree_frame, show="tree")
     self.tree.pack(side="left", fill="both", expand=True)
 
-    scrollbar = ttk.Scrollbar(
+    self.tree_scrollbar = scrollbar = ttk.Scrollbar(
       tree_frame, 
       orient="vertical", 
       command=self.tree.yview,
       style="Vertical.TScrollbar"
     )
     scrollbar.pack(side="right", fill="y")
-    self.tree.config(yscrollcommand=scrollbar.set)
+    self.tree.config(yscrollcommand=lambda first, last: self.on_tree_scroll(scrollbar, first, last))
+
+    # Shown instead of the tree while the filter box has a query
+    self.results_tree = ttk.Treeview(tree_frame, show="tree")
+    self.results_tree.config(yscrollcommand=scrollbar.set)
+    self.results_tree.bind("<Double-1>", self.on_results_double_click)
+    # Filter result row <-> node
+    self.filter_rows = {}
+    self.filter_nodes = {}
 
     self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
     self.tree.bind("<<TreeviewClose>>", self.on_tree_close)
@@ -174,9 +338,10 @@ class PipelineCheckerApp(tk.Tk):
       self.last_refresh_label.configure(background="#2e2e2e", foreground="#62afff")
 
     # Tags to color rows
-    self.tree.tag_configure("success_tag", foreground="green")
-    self.tree.tag_configure("fail_tag", foreground="red")
-    self.tree.tag_configure("skipped_tag", foreground="grey")
+    for tree in (self.tree, self.results_tree):
+      tree.tag_configure("success_tag", foreground="green")
+      tree.tag_configure("fail_tag", foreground="red")
+      tree.tag_configure("skipped_tag", foreground="grey")
 
     # Try loading and resizing images
     self.success_img = None
@@ -283,9 +448,10 @@ class PipelineCheckerApp(tk.Tk):
       self.loading_label.configure(background="#2e2e2e", foreground="#62afff")
       self.last_refresh_label.configure(background="#2e2e2e", foreground="#62afff")
 
-      self.tree.tag_configure("success_tag", foreground="#9cff9c")  # pastel green
-      self.tree.tag_configure("fail_tag", foreground="#ff8080")     # pastel red
-      self.tree.tag_configure("skipped_tag", foreground="#cccccc")  # lighter gray
+      for tree in (self.tree, self.results_tree):
+        tree.tag_configure("success_tag", foreground="#9cff9c")  # pastel green
+        tree.tag_configure("fail_tag", foreground="#ff8080")     # pastel red
+        tree.tag_configure("skipped_tag", foreground="#cccccc")  # lighter gray
 
     # Check for cached JSON at startup
     if os.path.exists(CACHE_FILE):
@@ -315,8 +481,27 @@ class PipelineCheckerApp(tk.Tk):
     self.project_menu.add_command(label="Retry Pipeline", command=self.menu_retry_pipeline)
     self.project_menu.add_command(label="Create Pipeline", command=self.menu_create_pipeline)
 
+    # Push pipeline updates from GitLab webhooks when enabled
+    self.webhook_server = None
+    if WEBHOOK_ENABLED:
+      try:
+        self.webhook_server = WebhookServer(WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET, self.on_webhook_pipeline_event)
+        self.webhook_server.start()
+      except (OSError, ValueError) as e:
+        util.debug(f"Could not start webhook listener, polling only: {e}")
+        self.webhook_server = None
+    if self.webhook_server and self.poll_scheduler:
+      # Webhooks push the updates, adaptive polling backs off like refresh_loop
+      self.poll_scheduler.min_interval = WEBHOOK_FALLBACK_REFRESH_SECONDS
+
     # Start the refresh loop
-    util.execute_after_delay(REFRESH_RATE_SECONDS, self.refresh_loop)
+    if self.poll_scheduler:
+      self.after(int(POLL_TICK_SECONDS * 1000), self.poll_loop)
+    else:
+      self.after(int(self.refresh_rate_seconds() * 1000), self.refresh_loop)
+
+    if EVICT_IDLE_SECONDS or TREE_ROW_BUDGET:
+      self.after(EVICT_CHECK_SECONDS * 1000, self.eviction_loop)
 
     self.loaded = True
     
@@ -424,9 +609,132 @@ class PipelineCheckerApp(tk.Tk):
     self.iconify()
   
   def refresh_loop(self):
-    """Start a refresh loop that runs every REFRESH_RATE_SECONDS."""
-    self.refresh_groups()
-    util.execute_after_delay(REFRESH_RATE_SECONDS, self.refresh_loop)
+    """Start a refresh loop that runs every refresh_rate_seconds() on the Tk thread."""
+    try:
+      self.refresh_groups()
+    finally:
+      self.after(int(self.refresh_rate_seconds() * 1000), self.refresh_loop)
+
+  def call_on_ui(self, fn, *args):
+    """Run fn(*args) on the Tk thread. Safe to call from any thread."""
+    self.ui_queue.put((fn, args))
+
+  def drain_ui_queue(self):
+    """Apply work handed over by other threads, a bounded amount per tick."""
+    deadline = time.perf_counter() + UI_QUEUE_BUDGET_SECONDS
+    try:
+      while time.perf_counter() < deadline:
+        fn, args = self.ui_queue.get_nowait()
+        try:
+          fn(*args)
+        except Exception as e:
+          util.debug(f"Error in UI callback {getattr(fn, '__name__', fn)}: {e}")
+    except queue.Empty:
+      pass
+    self.after(UI_QUEUE_POLL_MS, self.drain_ui_queue)
+
+  def run_in_background(self, fn, *args, on_done=None, on_error=None, loading=None):
+    """
+    Run fn(*args) on the worker pool, then on_done(result) or
+    on_error(exception) on the Tk thread. 'loading' is shown in the
+    loading label until every background job has finished.
+    """
+    self.jobs_in_flight += 1
+    if loading:
+      self.loading_label.config(text=loading)
+
+    def job():
+      try:
+        result = fn(*args)
+      except Exception as e:
+        self.call_on_ui(self.finish_background_job, on_error, e, True)
+      else:
+        self.call_on_ui(self.finish_background_job, on_done, result, False)
+
+    self.worker_executor.submit(job)
+
+  def finish_background_job(self, callback, value, failed):
+    self.jobs_in_flight -= 1
+    if self.jobs_in_flight == 0:
+      self.loading_label.config(text="")
+    if callback:
+      callback(value)
+    elif failed:
+      util.debug(f"Background job failed: {value}")
+
+  def show_error(self, context, error):
+    util.debug(f"{context}: {error}")
+    messagebox.showerror("Error", str(error))
+
+  def on_circuit_state_change(self, old_state, new_state):
+    """Called from whichever thread tripped the breaker; update the UI on the Tk thread."""
+    self.call_on_ui(self.update_stale_indicator)
+
+  def update_stale_indicator(self):
+    """Show that the tree holds stale data while GitLab is unreachable."""
+    if self.api.breaker.is_open:
+      if self.stale_since is None:
+        self.stale_since = time.strftime("%I:%M:%S %p")
+      self.last_refresh_label.config(
+        text=f"Stale data - GitLab unreachable since {self.stale_since}",
+        foreground="#ffb060" if DARK_MODE else "#c05000"
+      )
+    else:
+      self.stale_since = None
+      self.last_refresh_label.config(
+        text=self.last_refresh_text,
+        foreground="#62afff" if DARK_MODE else "black"
+      )
+
+  def set_last_refresh(self, stale=0):
+    """Record the time we finished a refresh and how many projects it couldn't fetch."""
+    now = time.strftime("%Y-%m-%d %I:%M:%S %p")
+    self.last_refresh_text = f"Last refresh: {now}"
+    if stale:
+      self.last_refresh_text += f" ({stale} projects stale)"
+    self.update_stale_indicator()
+
+  def poll_loop(self):
+    """
+    Adaptive polling: every POLL_TICK_SECONDS, refresh the visible projects
+    the scheduler says are due, then re-arm.
+    """
+    due = []
+    try:
+      next_due = self.poll_scheduler.next_due_in()
+      if next_due is not None and next_due <= 0:
+        visible = self.index_visible_projects()
+        # Projects under collapsed groups wait for their next turn
+        due = self.poll_scheduler.pop_due(
+          accept=lambda pid: pid in visible,
+          defer=lambda pid: bool(self.model.find_projects(pid))
+        )
+        targets = [self.project_target(node) for pid in due for node in visible[pid]]
+        if targets:
+          util.debug(f"Adaptive poll refreshing {len(due)} projects.")
+          self.refresh_project_targets(
+            targets, save_json=True, on_done=self.set_last_refresh,
+            on_error=lambda e: self.on_poll_failed(due, e)
+          )
+    except Exception as e:
+      self.on_poll_failed(due, e)
+    finally:
+      self.after(int(POLL_TICK_SECONDS * 1000), self.poll_loop)
+
+  def schedule_project_poll(self, project_id, status):
+    """Tell the adaptive scheduler about a project's current status."""
+    if self.poll_scheduler:
+      self.poll_scheduler.schedule(project_id, status)
+
+  def on_poll_failed(self, project_ids, error):
+    util.debug(f"Adaptive poll of {len(project_ids)} projects failed, rescheduling them: {error}")
+    self.retry_project_polls(project_ids)
+
+  def retry_project_polls(self, project_ids):
+    """Put projects whose poll failed back on the schedule, with their last status."""
+    if self.poll_scheduler:
+      for project_id in project_ids:
+        self.poll_scheduler.retry(project_id)
 
   def show_notification(self, title, message, duration=5):
     """
@@ -459,43 +767,89 @@ class PipelineCheckerApp(tk.Tk):
       if token:
         util.debug("Token entered. Loading root group.")
         util.set_env_var('GITLAB_TOKEN', token)
+        self.api.set_token(token)
         self.load_root_group()
       else:
         messagebox.showerror("Error", "Please provide a valid token.")
 
+  def clear_tree(self):
+    for window in self.virtual_windows.values():
+      window.destroy()
+    self.virtual_windows.clear()
+    self.tree.delete(*self.tree.get_children())
+    self.model.clear()
+    self.collapsed_at.clear()
+
   def load_root_group(self):
     """Fetch the root group from GitLab and populate the tree."""
     util.debug("load_root_group called.")
-    self.tree.delete(*self.tree.get_children())
+    self.clear_tree()
     token = self.token_var.get().strip()
     if not token:
       messagebox.showerror("Error", "Please provide a valid token.")
       util.debug("No token provided. Aborting load_root_group.")
       return
 
-    # Show "Loading..." label
-    self.loading_label.config(text="Loading root group...")
-    self.update_idletasks()
+    util.debug(f"Getting group ID for {GROUP_NAME}.")
+    self.run_in_background(
+      self.get_group_id, token, GROUP_NAME,
+      on_done=self.insert_root_group,
+      on_error=lambda e: self.show_error("Error loading root group", e),
+      loading="Loading root group..."
+    )
 
-    try:
-      util.debug(f"Getting group ID for {GROUP_NAME}.")
-      gid = self.get_group_id(token, GROUP_NAME)
-      util.debug(f"Root group ID is {gid}. Inserting into tree.")
-      root_node = self.tree.insert(
-        "",
-        "end",
-        text=f"Group: {GROUP_NAME}",
-        values=(gid, "group", "unfetched", "", ""),  # (id, type, fetched-status, web_url)
-        open=False
-      )
-      # Dummy child so we can expand
-      self.tree.insert(root_node, "end", text="Loading...")
-    except Exception as ex:
-      util.debug(f"Error loading root group: {ex}")
-      messagebox.showerror("Error", str(ex))
-    finally:
-      # Hide loading label
-      self.loading_label.config(text="")
+  def insert_root_group(self, gid):
+    util.debug(f"Root group ID is {gid}. Inserting into tree.")
+    # Reset may have been clicked again while the group was being resolved
+    self.clear_tree()
+    root = self.insert_node(None, GroupNode(gid, GROUP_NAME))
+    # Dummy child so we can expand
+    self.tree.insert(root.item_id, "end", text=PLACEHOLDER_TEXT)
+
+  def row_style(self, node):
+    """The (image, tag) a node's row is drawn with; a group's is that of the worst status below it."""
+    if node.kind != "project":
+      counts = node.counts
+      if counts.get("failed") or counts.get("canceled"):
+        return self.failed_img, "fail_tag"
+      elif counts.get("running") or counts.get("pending"):
+        return self.skipped_img, "skipped_tag"
+      return "", ""
+    ps_lower = node.status.lower()
+    if ps_lower in ("success", "manual"):
+      return self.success_img, "success_tag"
+    elif ps_lower in ("failed", "canceled"):
+      return self.failed_img, "fail_tag"
+    elif ps_lower in ("skipped", "running", "pending"):
+      return self.skipped_img, "skipped_tag"
+    return "", ""
+
+  def insert_node(self, parent, node):
+    """Insert a row for node under parent (a GroupNode, None for the top level) and add it to the model."""
+    icon, tag = self.row_style(node)
+    position = self.model.insertion_index(parent, node)
+    item_id = self.tree.insert(
+      parent.item_id if parent else "",
+      position,
+      text=node.text(),
+      image=icon,
+      tags=(tag,) if tag else ()
+    )
+    return self.model.add(node, item_id, parent, position)
+
+  def redraw_rollups(self):
+    """
+    Redraw the group rows whose status rollup changed. The model keeps
+    the counts up to date along the parent chain of each change, so this
+    only touches those ancestors.
+    """
+    for group in self.model.take_rollup_changes():
+      icon, tag = self.row_style(group)
+      tags = (tag,) if tag else ()
+      if group.item_id is not None:
+        self.tree.item(group.item_id, text=group.text(), image=icon, tags=tags)
+      if group in self.filter_rows:
+        self.results_tree.item(self.filter_rows[group], text=group.text(), image=icon, tags=tags)
 
   def on_tree_open(self, event):
     """Handler triggered when user expands a node in the TreeView."""
@@ -505,21 +859,22 @@ class PipelineCheckerApp(tk.Tk):
 
     util.debug("Tree node expanded.")
     item_id = self.tree.focus()
-    vals = self.tree.item(item_id, "values")
-    if len(vals) < 3:
-      util.debug(f"on_tree_open: Node has insufficient values to process. ({vals})")
+    node = self.model.get(item_id)
+    if node is None:
+      util.debug(f"on_tree_open: Node {item_id} is not in the model.")
       return
-    node_type = vals[1]
-    status_flag = vals[2]
-    if node_type == "group":
-      if status_flag == "unfetched":
+    if node.kind == "group":
+      self.collapsed_at.pop(node, None)
+      if node.evicted is not None:
+        self.rehydrate_group(node)
+      if node.state == UNFETCHED:
         util.debug(f"Expanding a group node that hasn't been fetched yet ({item_id}).")
-        self.fetch_subgroups_and_projects(item_id, vals[0])
-      elif status_flag == "refresh":
+        self.fetch_subgroups_and_projects(node)
+      elif node.state == REFRESH:
         util.debug("Refreshing a group node.")
-        self.refresh_all_project_pipelines_below(item_id)
+        self.refetch_group(node)
 
-      util.execute_after_delay(0.05, self.save_tree_to_json)
+      self.schedule_save()
 
   def on_tree_close(self, event):
     """Handler triggered when user collapses a node in the TreeView."""
@@ -528,7 +883,108 @@ class PipelineCheckerApp(tk.Tk):
       return
     
     util.debug("Tree node collapsed.")
-    self.save_tree_to_json()
+    node = self.model.get(self.tree.focus())
+    if node is not None and node.kind == "group":
+      self.collapsed_at[node] = time.monotonic()
+    self.schedule_save()
+
+  def eviction_loop(self):
+    """Every EVICT_CHECK_SECONDS, evict idle collapsed subtrees, then re-arm."""
+    try:
+      self.evict_idle_subtrees()
+    except Exception as e:
+      util.debug(f"Error in eviction loop: {e}")
+    finally:
+      self.after(EVICT_CHECK_SECONDS * 1000, self.eviction_loop)
+
+  def evict_idle_subtrees(self, now=None):
+    """
+    Evict the subtrees of groups collapsed for EVICT_IDLE_SECONDS, then,
+    while the model holds more than TREE_ROW_BUDGET rows, the ones
+    collapsed longest. Returns how many subtrees were evicted.
+    """
+    now = time.monotonic() if now is None else now
+    evicted = 0
+    for group in list(self.collapsed_at):
+      if not self.model.contains(group):
+        # Removed, or evicted along with an ancestor
+        del self.collapsed_at[group]
+      elif EVICT_IDLE_SECONDS and now - self.collapsed_at[group] >= EVICT_IDLE_SECONDS:
+        evicted += self.evict_subtree(group)
+
+    if TREE_ROW_BUDGET and len(self.model.by_item) > TREE_ROW_BUDGET:
+      for group in sorted(self.collapsed_at, key=self.collapsed_at.get):
+        if len(self.model.by_item) <= TREE_ROW_BUDGET:
+          break
+        if self.model.contains(group):
+          evicted += self.evict_subtree(group)
+    if evicted:
+      util.debug(f"Evicted {evicted} collapsed subtrees, {len(self.model.by_item)} rows left.")
+    return evicted
+
+  def evict_subtree(self, group):
+    """
+    Drop a collapsed group's descendants from the tree and the model,
+    keeping them only as compressed cache dicts in group.evicted until
+    the group is expanded again. Returns True if anything was evicted.
+    """
+    self.collapsed_at.pop(group, None)
+    if not group.children or self.tree.item(group.item_id, "open"):
+      return False
+    data = [self.build_node_dict(child) for child in group.children]
+    for window_group in list(self.virtual_windows):
+      if self.is_within(window_group, group):
+        self.virtual_windows.pop(window_group).destroy()
+    self.tree.delete(*self.tree.get_children(group.item_id))
+    # The evicted projects keep counting towards the group's rollup, and
+    # can still be found by the filter box
+    counts = dict(group.counts)
+    self.model.remove_children(group, searchable=True)
+    self.model.add_counts(group, counts)
+    self.redraw_rollups()
+    group.evicted = zlib.compress(json.dumps(data).encode("utf-8"), 1)
+    # Dummy child so it can still be expanded
+    self.tree.insert(group.item_id, "end", text=PLACEHOLDER_TEXT)
+    return True
+
+  def is_within(self, node, ancestor):
+    while node is not None:
+      if node is ancestor:
+        return True
+      node = node.parent
+    return False
+
+  def rehydrate_group(self, group):
+    """Put an evicted subtree back into the tree, as it was when evicted."""
+    data = json.loads(zlib.decompress(group.evicted))
+    group.evicted = None
+    util.debug(f"Rehydrating {len(data)} children of group {group.name}.")
+    self.tree.delete(*self.tree.get_children(group.item_id))
+    # Counted and indexed again as the children go back in
+    self.model.add_counts(group, group.counts, -1)
+    self.model.drop_detached(group)
+    self.insert_children_from_dicts(group, data)
+    self.redraw_rollups()
+
+  def rehydrate_path(self, node):
+    """
+    The node in the model for a search match, rehydrating the evicted
+    group it was detached from first. None if it is no longer there.
+    """
+    path = []
+    while not self.model.contains(node):
+      path.append(node)
+      node = node.parent
+      if node is None:
+        return None
+    for detached in reversed(path):
+      if node.evicted is not None:
+        self.collapsed_at.pop(node, None)
+        self.rehydrate_group(node)
+      node = next((c for c in node.children if c.kind == detached.kind and c.id == detached.id), None)
+      if node is None:
+        return None
+    return node
 
   def on_tree_double_click(self, event):
     """
@@ -540,19 +996,94 @@ class PipelineCheckerApp(tk.Tk):
     if not item_id:
       return  # No valid item was clicked
 
-    # You can get the row text or values. For example:
-    row_text = self.tree.item(item_id, "text")
-    row_values = self.tree.item(item_id, "values")
+    node = self.model.get(item_id)
+    if node and node.kind == "project":
+      self.open_pipeline(node)
+
+  def open_pipeline(self, node):
+    pipeline = node.pipeline_id
+    webbrowser.open(node.web_url + "/-/pipelines" + ("/" + str(pipeline) if pipeline else ""))
+
+  # -------------------------------------------------------------------------
+  #  Filter
+  # -------------------------------------------------------------------------
+
+  def schedule_filter(self):
+    """Apply the filter box once typing pauses for FILTER_DELAY_MS."""
+    if self.filter_after is not None:
+      self.after_cancel(self.filter_after)
+    self.filter_after = self.after(FILTER_DELAY_MS, self.apply_filter)
+
+  def apply_filter(self):
+    """
+    Show the groups and projects matching the filter box (see SearchIndex)
+    with their ancestors in the results tree, or the full tree again when
+    it is empty. Evicted subtrees are searched too; subtrees that were
+    never fetched are not.
+    """
+    self.filter_after = None
+    query = self.filter_var.get().strip()
+    self.results_tree.delete(*self.results_tree.get_children())
+    self.filter_rows = {}
+    self.filter_nodes = {}
+    if not query:
+      self.show_tree(self.tree)
+      return
 
-    # row_values is typically (id, type, pipeline_status) from your code
-    if len(row_values) < 2:
+    start = time.perf_counter()
+    matches = self.model.search.search(query)
+    search_ms = (time.perf_counter() - start) * 1000
+    shown = sorted(matches, key=lambda node: (node.kind != "group", node.name.lower(), node.id))
+    for node in shown[:FILTER_MAX_RESULTS]:
+      self.insert_filter_row(node)
+    if len(matches) > FILTER_MAX_RESULTS:
+      self.results_tree.insert("", "end", text=f"  ... {len(matches) - FILTER_MAX_RESULTS} more matches")
+    if not matches:
+      self.results_tree.insert("", "end", text="  No matching groups or projects")
+    util.debug(f"Filter '{query}': {len(matches)} matches in {search_ms:.2f} ms.")
+    self.show_tree(self.results_tree)
+
+  def insert_filter_row(self, node):
+    """Add a node to the results tree below its ancestors (added first). Returns its row."""
+    row = self.filter_rows.get(node)
+    if row is not None:
+      return row
+    parent_row = self.insert_filter_row(node.parent) if node.parent else ""
+    icon, tag = self.row_style(node)
+    row = self.results_tree.insert(parent_row, "end", text=node.text(), image=icon,
+                                   tags=(tag,) if tag else (), open=True)
+    self.filter_rows[node] = row
+    self.filter_nodes[row] = node
+    return row
+
+  def show_tree(self, tree):
+    """Show either the main tree or the filter results next to the scrollbar."""
+    other = self.results_tree if tree is self.tree else self.tree
+    if other.winfo_ismapped() or not tree.winfo_ismapped():
+      other.pack_forget()
+      tree.pack(side="left", fill="both", expand=True)
+      self.tree_scrollbar.config(command=tree.yview)
+
+  def on_results_double_click(self, event):
+    """Open a matching project's pipeline, or clear the filter and go to a matching group."""
+    node = self.filter_nodes.get(self.results_tree.focus())
+    if node is None or node not in self.model.search:
       return
-    
-    node_type = row_values[1]
-    
-    if node_type == "project":
-      pipeline = row_values[5]
-      webbrowser.open(row_values[3] + "/-/pipelines" + ("/" + str(pipeline) if pipeline else ""))
+    if node.kind == "project":
+      self.open_pipeline(node)
+      return
+    node = self.rehydrate_path(node)
+    if node is None:
+      return
+    self.filter_var.set("")
+    self.apply_filter()
+    ancestor = node.parent
+    while ancestor is not None:
+      self.tree.item(ancestor.item_id, open=True)
+      ancestor = ancestor.parent
+    self.tree.see(node.item_id)
+    self.tree.selection_set(node.item_id)
+    self.tree.focus(node.item_id)
   
   def on_tree_right_click(self, event):
     """
@@ -567,13 +1098,13 @@ class PipelineCheckerApp(tk.Tk):
     
     util.debug(f"Right-clicked row ID: {row_id}")
     
-    row_values = self.tree.item(row_id, "values")
-    if len(row_values) < 2:
+    node = self.model.get(row_id)
+    if node is None:
       return
     
-    util.debug(f"Row values: {row_values}")
+    util.debug(f"Row values: {node.values()}")
     
-    node_type = row_values[1]
+    node_type = node.kind
 
     # Select the row so it's highlighted
     self.tree.selection_set(row_id)
@@ -587,7 +1118,7 @@ class PipelineCheckerApp(tk.Tk):
     elif node_type == "group":
       self.group_menu.tk_popup(event.x_root, event.y_root)
 
-  def get_single_project_pipeline_info(self, token, group_id, project):
+  def get_single_project_pipeline_info(self, token, group_id, project, deadline=None):
     """
     Common logic to fetch the pipeline status for a single project.
     'project' can be a GitLab project dict with at least:
@@ -601,328 +1132,571 @@ class PipelineCheckerApp(tk.Tk):
 
     If you have branches configured in BRANCHES for that group_id,
     it tries get_branches_pipeline_status; otherwise get_latest_pipeline_status.
+    Projects that already carry a "pipeline" entry (from the GraphQL batch
+    listing) are answered without another request. 'deadline' bounds the
+    calls made (see GitLabClient.request).
     """
     pid = project["id"]
     pweb = project.get("web_url", "")
     pname = project.get("name", "")
+
+    if "pipeline" in project:
+      pstatus, pref, pipeline_id = project["pipeline"]
+      return (pstatus, pweb, pref, pipeline_id)
     
     # Check if we have custom branches
     branches = BRANCHES.get(str(group_id), None)
     if branches:
-      pstatus, pref, pipeline_id = self.get_branches_pipeline_status(token, pid, branches)
+      pstatus, pref, pipeline_id = self.get_branches_pipeline_status(token, pid, branches, deadline)
     else:
       # Call get_latest_pipeline_status with optional branch=None
-      pstatus, pref, pipeline_id = self.get_latest_pipeline_status(token, pid, None)
+      pstatus, pref, pipeline_id = self.get_latest_pipeline_status(token, pid, None, deadline)
 
     return (pstatus, pweb, pref, pipeline_id)
 
 
-  def fetch_pipeline_info_for_projects(self, token, group_id, projects):
+  def fetch_subgroups_and_projects(self, group):
     """
-    Common logic to gather pipeline info for multiple projects at once.
-    Returns a *sorted* list of (project, pstatus, pweb, pref, pipeline_id),
-    with failed/canceled first, then success/manual, etc.
+    List a group's subgroups and projects on the worker pool and show them
+    right away on the Tk thread; pipelines that weren't part of the listing
+    are then streamed in (see stream_project_targets).
     """
-    projects_with_status = []
+    util.debug(f"Fetching subgroups/projects for group_id={group.id}.")
+    # Mark it as 'fetched' now
+    group.state = FETCHED
 
-    for proj in projects:
-      # Use the single-project helper above
-      pstatus, pweb, pref, pipeline_id = self.get_single_project_pipeline_info(token, group_id, proj)
+    token = self.token_var.get().strip()
+    self.run_in_background(
+      self.fetch_group_contents, token, group.id,
+      on_done=lambda contents: self.populate_group(group, *contents),
+      on_error=lambda e: self.on_group_fetch_failed(group, e),
+      loading="Loading subgroups and projects..."
+    )
 
-      if pstatus == "No pipeline found":
-        # Decide if you want to *skip* these or still include them
-        # For now, we'll skip them just like in your original code
-        continue
+  def fetch_group_contents(self, token, group_id):
+    """Worker thread: a group's subgroups and project listing."""
+    util.debug("Getting subgroups.")
+    subgroups = self.get_subgroups(token, group_id)
+    util.debug("Getting projects.")
+    projects = self.get_group_projects(token, group_id)
+    util.debug(f"Found {len(subgroups)} subgroups and {len(projects)} projects in group {group_id}.")
+    return subgroups, projects
+
+  def on_group_fetch_failed(self, group, error):
+    # Let the next expand try again
+    group.state = UNFETCHED
+    self.show_error("Error fetching subgroups/projects", error)
+
+  def populate_group(self, group, subgroups, projects):
+    """
+    Tk thread: make a group's children match its listing. The first fetch
+    replaces the dummy child; later fetches only touch the rows that were
+    added, removed, reordered or changed. Projects whose pipeline wasn't
+    listed keep their last known status (new ones show PENDING_STATUS)
+    until stream_project_targets fills it in. Projects known to have no
+    pipeline get no row; probe_projects checks them again in the background.
+    """
+    if not self.model.contains(group) or group.evicted is not None:
+      # Gone, or evicted while the listing was on its way
+      return
+    util.debug(f"Populating group {group.name}.")
 
-      projects_with_status.append((proj, pstatus, pweb, pref, pipeline_id))
-
-    # Define priority so failed/canceled appear first
-    def get_priority(status: str):
-      ps_lower = status.lower()
-      if ps_lower in ("running", "pending"):
-        return 0
-      elif ps_lower in ("failed", "canceled"):
-        return 1
-      elif ps_lower in ("success", "manual"):
-        return 2
+    children = []
+    for sg in subgroups:
+      sid = sg["id"]
+      if str(sid) in IGNORED_GROUPS or sg.get("full_path") in IGNORED_GROUPS:
+        util.debug(f"Ignoring group {sid}.")
+        continue
+      sname = sg["full_name"].replace(f"{group.name} / ", "")
+      children.append(GroupNode(sid, sname, sg.get("web_url", ""), group.name))
+
+    shown = {child.id: child for child in group.children if child.kind == "project"}
+    group.no_pipeline.intersection_update(str(proj["id"]) for proj in projects)
+    project_nodes = []
+    to_fetch = set()
+    to_probe = []
+    for proj in projects:
+      pid = str(proj["id"])
+      if "pipeline" in proj:
+        # The GraphQL batch listing already carries the pipeline
+        pstatus, pref, pipeline = proj["pipeline"]
+        if pstatus == "No pipeline found":
+          group.no_pipeline.add(pid)
+          continue
+        group.no_pipeline.discard(pid)
+      elif pid in group.no_pipeline:
+        to_probe.append(proj)
+        continue
+      elif pid in shown:
+        old = shown[pid]
+        pstatus, pref, pipeline = old.status, old.ref, old.pipeline_id
+        to_fetch.add(pid)
       else:
-        # for "skipped", etc.
-        return 3
+        pstatus, pref, pipeline = PENDING_STATUS, "", ""
+        to_fetch.add(pid)
+      project_nodes.append(ProjectNode(pid, proj["name"], pstatus, proj.get("web_url", ""), pref, pipeline))
 
-    # Sort by priority
-    projects_with_status.sort(key=lambda x: get_priority(x[1]))
+    children.extend(project_nodes)
+    # Subgroups, then failed pipelines at the top and the ones still being
+    # fetched at the bottom
+    children.sort(key=sort_key)
 
-    return projects_with_status
-
-  def fetch_subgroups_and_projects(self, tree_item_id, group_id):
-    """Fetch child subgroups/projects for a group, removing any dummy children."""
-    # Show loading label
-    self.loading_label.config(text="Loading subgroups and projects...")
-    self.update_idletasks()
+    if group in self.virtual_windows or (VIRTUAL_THRESHOLD and len(project_nodes) > VIRTUAL_THRESHOLD):
+      changes = self.populate_virtual_group(group, children)
+    else:
+      changes = reconcile_children(self.tree, self.model, group, children, self.row_style)
+    self.redraw_rollups()
+    util.debug(
+      f"Group {group.name}: {len(changes.inserted)} inserted, {len(changes.updated)} updated, "
+      f"{len(changes.removed)} removed{', reordered' if changes.moved else ''}."
+    )
 
-    try:
-      util.debug(f"Fetching subgroups/projects for group_id={group_id}. Removing dummy child.")
-      for child in self.tree.get_children(tree_item_id):
-        self.tree.delete(child)
-
-      old_vals = list(self.tree.item(tree_item_id, "values"))
-      node_id = old_vals[0]
-      old_vals[2] = "fetched"
-      old_status = old_vals[2]
-      # Mark it as 'fetched' now
-      self.tree.item(tree_item_id, values=tuple(old_vals))
-      
-
-      token = self.token_var.get().strip()
-      util.debug("Getting subgroups.")
-      subgroups = self.get_subgroups(token, group_id)
-      util.debug("Getting projects.")
-      projects = self.get_group_projects(token, group_id)
-
-      util.debug(f"Found {len(subgroups)} subgroups and {len(projects)} projects in group {group_id}.")
-
-      group_name = self.tree.item(tree_item_id, "text").replace("Group: ", "")
-      util.debug(f"Group name: {group_name}")
-
-      # --------------------------------------------------------------------
-      # Insert subgroups (unmodified):
-      # --------------------------------------------------------------------
-      for sg in subgroups:
-        sid = sg["id"]
-        if str(sid) in IGNORED_GROUPS:
-          util.debug(f"Ignoring group {sid}.")
-          continue
-        sname = sg["full_name"].replace(f"{group_name} / ", "")
-        sweb = sg.get("web_url", "")
-        sub_node_id = self.tree.insert(
-          tree_item_id,
-          "end",
-          text=f"Group: {sname}",
-          values=(sid, "group", "unfetched", sweb, group_name),
-          open=False
+    # Fire events for new projects and for status changes of existing ones
+    status_changes = [(node, FETCHED) for node in changes.inserted if node.kind == "project"]
+    status_changes.extend(changes.status_changed)
+    for node, old_status in status_changes:
+      if node.status not in (old_status, PENDING_STATUS):
+        self.event_bus.publish(
+          "pipeline_status_changed",
+          project_id=node.id,
+          project_name=node.name,
+          old_status=old_status,
+          new_status=node.status
         )
-        # Insert a dummy child so it can be expanded
-        self.tree.insert(sub_node_id, "end", text="Loading...")
-
-      # --------------------------------------------------------------------
-      # Build a list of (project, pipeline_status), then sort so failed
-      # pipelines appear at the top.
-      # --------------------------------------------------------------------
-      projects_with_status = self.fetch_pipeline_info_for_projects(token, group_id, projects)
-
-      # --------------------------------------------------------------------
-      # Now insert the projects in sorted order
-      # --------------------------------------------------------------------
-      for proj, pstatus, pweb, pref, pipeline in projects_with_status:
-        pid = proj["id"]
-        pname = proj["name"]
-        pname_clean = pname.split(" Project: ", 1)[-1].split(" (")[0].strip()
-        ps_lower = pstatus.lower()
-
-        if old_status != pstatus:
-          # Fire event on change
-          self.event_bus.publish(
-            "pipeline_status_changed",
-            project_id=node_id,
-            project_name=pname_clean,
-            old_status=old_status,
-            new_status=pstatus
-          )
 
-        icon = None
-        tag = ""
-        if ps_lower in ("success", "manual"):
-          icon = self.success_img
-          tag = "success_tag"
-        elif ps_lower in ("failed", "canceled"):
-          icon = self.failed_img
-          tag = "fail_tag"
-        elif ps_lower in ("skipped", "running", "pending"):
-          icon = self.skipped_img
-          tag = "skipped_tag"
-
-        text = f" Project: {pname} ({pstatus})" # - Pipeline: {pstatus}
-        util.debug(f"Inserting project node with text='{text}'.")
-
-        self.tree.insert(
-          tree_item_id,
-          "end",
-          text=text,
-          image=icon,
-          values=(pid, "project", pstatus, pweb, pref, pipeline, pname),
-          tags=(tag,)
-        )
+    targets = []
+    for node in group.children:
+      if node.kind != "project":
+        continue
+      if node.id in to_fetch:
+        targets.append(self.project_target(node))
+      else:
+        self.schedule_project_poll(node.id, node.status)
+    self.stream_project_targets(targets, loading=f"Fetching {len(targets)} pipelines..." if targets else None)
+    self.probe_projects(group, to_probe)
 
-    except Exception as e:
-      util.debug(f"Error fetching subgroups/projects: {e}")
-      messagebox.showerror("Error", str(e))
-      raise e
-    finally:
-      # Hide loading label
-      self.loading_label.config(text="")
+    if changes:
+      self.schedule_save()
 
-  def refresh_project(self, item_id, save_json=False):
-    """Refresh the clicked project node."""
-    values = self.tree.item(item_id, "values")
-    if len(values) < 4:
-      # Not enough data (id, type, status, web_url, branch, pipeline_id)
-      util.debug(f"refresh_project: Node {item_id} has insufficient values to process. ({values})")
+  def populate_virtual_group(self, group, children):
+    """
+    Like reconcile_children, for a group shown through a VirtualWindow:
+    the model takes every child but only a window of project rows exists.
+    """
+    window = self.virtual_windows.get(group)
+    if window is None:
+      util.debug(f"Group {group.name} has too many projects, showing it through a window of rows.")
+      # Drop the project rows (and dummy child), subgroup rows are kept
+      rows = set(self.tree.get_children(group.item_id))
+      for child in group.children:
+        if child.kind == "group":
+          rows.discard(child.item_id)
+        else:
+          self.model.unbind(child)
+      if rows:
+        self.tree.delete(*rows)
+      window = self.virtual_windows[group] = VirtualWindow(
+        self.tree, self.model, group, self.row_style, VIRTUAL_WINDOW_ROWS
+      )
+    changes = merge_children(self.tree, self.model, group, children)
+    window.render()
+    return changes
+
+  def on_tree_scroll(self, scrollbar, first, last):
+    """The tree's yscrollcommand: update the scrollbar and slide the windows of open virtual groups."""
+    scrollbar.set(first, last)
+    for group, window in list(self.virtual_windows.items()):
+      if not self.model.contains(group):
+        del self.virtual_windows[group]
+        window.destroy()
+      elif self.tree.item(group.item_id, "open"):
+        window.on_scroll()
+
+  def stream_project_targets(self, targets, loading=None):
+    """
+    Fetch the pipelines of the given project targets and apply each one on
+    the Tk thread as soon as it arrives, rather than once all are done.
+    """
+    if not targets:
       return
+    token = self.token_var.get().strip()
 
-    node_id = values[0]
-    node_type = values[1]
+    def fetch():
+      futures = {
+        self.executor.submit(self.get_single_project_pipeline_info, token, t[2], t[1]): t[0]
+        for t in targets
+      }
+      failed = 0
+      for future in as_completed(futures):
+        try:
+          info = future.result()
+        except Exception as e:
+          # The row keeps its last status until the next refresh
+          util.debug(f"Error fetching pipeline for project {futures[future].id}: {e}")
+          failed += 1
+          continue
+        self.call_on_ui(self.apply_streamed_result, futures[future], info)
+      return failed
+
+    self.run_in_background(
+      fetch,
+      on_done=lambda failed: self.schedule_save(),
+      on_error=lambda e: util.debug(f"Error streaming pipelines: {e}"),
+      loading=loading
+    )
 
-    if node_type == "project":
-      old_status = values[2]
-      util.debug(f"Refreshing project node {node_id}, old status={old_status}")
-      # Build a minimal project dict so we can call our helper method
-      pname = self.tree.item(item_id, "text")  
-      # "Project: SomeName - Pipeline: X" => we just want "SomeName"
-      pname_clean = pname.split(" Project: ", 1)[-1].split(" (")[0].strip()
-      
-      project = {
-        "id": node_id,
-        "web_url": values[3],  # existing
-        "name": pname_clean
+  def apply_streamed_result(self, node, info):
+    """Tk thread: fill in one streamed pipeline (update_project_node moves the row into place)."""
+    if not self.model.contains(node):
+      return
+    pstatus, pweb, pref, pipeline_id = info
+    if pstatus == "No pipeline found":
+      # Projects without pipelines aren't listed
+      node.parent.no_pipeline.add(node.id)
+      self.remove_project_node(node)
+      return
+
+    self.update_project_node(node, pstatus, pweb, pref, pipeline_id)
+    self.schedule_project_poll(node.id, pstatus)
+
+  def probe_projects(self, group, projects):
+    """
+    Check listed projects that had no pipeline in the background, without
+    a row; one only gets a row once a pipeline shows up (see apply_probed_result).
+    """
+    if not projects:
+      return
+    token = self.token_var.get().strip()
+
+    def fetch():
+      futures = {
+        self.executor.submit(self.get_single_project_pipeline_info, token, group.id, proj): proj
+        for proj in projects
       }
+      for future in as_completed(futures):
+        try:
+          info = future.result()
+        except Exception as e:
+          util.debug(f"Error probing project {futures[future]['id']}: {e}")
+          continue
+        if info[0] != "No pipeline found":
+          self.call_on_ui(self.apply_probed_result, group, futures[future], info)
 
-      # If we need the group_id for branches:
-      group_id = self.get_parent_group_id(item_id)
+    self.run_in_background(fetch, on_error=lambda e: util.debug(f"Error probing projects: {e}"))
 
-      token = self.token_var.get().strip()
-      pstatus, pweb, pref, pipeline_id = self.get_single_project_pipeline_info(token, group_id, project)
+  def apply_probed_result(self, group, project, info):
+    """Tk thread: give a project that now has a pipeline its row."""
+    pid = str(project["id"])
+    if not self.model.contains(group) or group.evicted is not None or pid not in group.no_pipeline:
+      return
+    group.no_pipeline.discard(pid)
+    pstatus, pweb, pref, pipeline_id = info
+    node = ProjectNode(pid, project["name"], pstatus, pweb, pref, pipeline_id)
+    window = self.virtual_windows.get(group)
+    if window:
+      self.model.add(node, None, group, self.model.insertion_index(group, node))
+      window.render()
+    else:
+      self.insert_node(group, node)
+    self.redraw_rollups()
+    self.event_bus.publish(
+      "pipeline_status_changed",
+      project_id=node.id,
+      project_name=node.name,
+      old_status=FETCHED,
+      new_status=node.status
+    )
+    self.schedule_project_poll(node.id, pstatus)
+    self.schedule_save()
+
+  def remove_project_node(self, node):
+    window = self.virtual_windows.get(node.parent)
+    if window is None:
+      self.tree.delete(node.item_id)
+    self.model.remove(node)
+    if window:
+      window.render()
+    self.redraw_rollups()
+
+  def reposition_project(self, node):
+    """Move a project's row to its sorted position after a status change, with a single tree.move."""
+    index = self.model.reposition(node)
+    window = self.virtual_windows.get(node.parent)
+    if window:
+      window.update(node, moved=index is not None)
+    elif index is not None:
+      self.tree.move(node.item_id, node.parent.item_id, index)
+
+  def refetch_group(self, group, loading=None):
+    """
+    Re-list a fetched group, picking up added and removed subgroups and
+    projects, and refresh the pipelines of its fetched subgroups.
+    """
+    self.fetch_subgroups_and_projects(group)
+    targets = []
+    for child in group.children:
+      self.refresh_group(child, targets)
+    self.refresh_project_targets(targets, save_json=True, loading=loading)
+
+  def refresh_project(self, node, save_json=False, loading=None):
+    """Refresh a project node."""
+    if not self.model.contains(node):
+      return
+    util.debug(f"Refreshing project node {node.id}, old status={node.status}")
+    self.refresh_project_targets([self.project_target(node)], save_json=save_json, loading=loading)
 
-      if old_status != pstatus:
-        # Fire event on change
-        self.event_bus.publish(
-          "pipeline_status_changed",
-          project_id=node_id,
-          project_name=pname_clean,
-          old_status=old_status,
-          new_status=pstatus
-        )
+  def project_target(self, node):
+    """
+    Snapshot a project node as (node, project, group_id, status) so its
+    pipeline can be fetched off the Tk thread.
+    """
+    project = {
+      "id": node.id,
+      "web_url": node.web_url,
+      "name": node.name
+    }
+    # The group_id is needed for branches
+    return (node, project, node.group_id(), str(node.status).lower())
 
-      # Determine new icon/tag
-      ps_lower = pstatus.lower()
-      if ps_lower in ("success", "manual"):
-        icon = self.success_img
-        tag = "success_tag"
-      elif ps_lower in ("failed", "canceled"):
-        icon = self.failed_img
-        tag = "fail_tag"
-      elif ps_lower in ("skipped", "running", "pending"):
-        icon = self.skipped_img
-        tag = "skipped_tag"
-      else:
-        icon = ""
-        tag = ""
+  def fetch_project_targets(self, token, targets, only=None, deadline=None):
+    """
+    Worker thread: fetch the latest pipeline of each project target.
+    When 'only' is a set of project ids, other projects are skipped unless
+    their pipeline is still active. A failed fetch (errors that outlived
+    the retries, the deadline running out) only skips its own project.
+    Returns ([(node, info)], [skipped nodes]).
+    """
+    if only is not None:
+      targets = [t for t in targets if str(t[1]["id"]) in only or t[3] in ACTIVE_STATUSES or t[3] == PENDING_STATUS]
+    futures = [
+      (t, self.executor.submit(self.get_single_project_pipeline_info, token, t[2], t[1], deadline))
+      for t in targets
+    ]
+    results = []
+    skipped = []
+    for t, future in futures:
+      try:
+        results.append((t[0], future.result()))
+      except Exception as e:
+        util.debug(f"Error fetching pipeline for project {t[1]['id']}: {e}")
+        skipped.append(t[0])
+    if skipped:
+      util.debug(f"{len(skipped)} of {len(targets)} projects could not be fetched and keep their last status.")
+    return results, skipped
+
+  def apply_project_results(self, results, skipped=()):
+    """
+    Tk thread: write fetched pipelines into the nodes that are still
+    shown. Skipped nodes keep their (now stale) status and are polled again.
+    """
+    for node, (pstatus, pweb, pref, pipeline_id) in results:
+      if not self.model.contains(node):
+        continue
+      self.update_project_node(node, pstatus, pweb, pref, pipeline_id)
+      self.schedule_project_poll(node.id, pstatus)
+    self.retry_project_polls(node.id for node in skipped if self.model.contains(node))
+
+  def refresh_project_targets(self, targets, only=None, save_json=False, loading=None, on_done=None, on_error=None):
+    """
+    Fetch the given project targets in the background and update their
+    rows. 'on_error' is called with the exception if the whole batch failed.
+    """
+    if not targets:
+      return
+    token = self.token_var.get().strip()
+
+    def done(fetched):
+      self.apply_project_results(*fetched)
+      if save_json:
+        self.schedule_save()
+      if on_done:
+        on_done()
+
+    self.run_in_background(
+      self.fetch_project_targets, token, targets, only,
+      on_done=done,
+      on_error=on_error or (lambda e: util.debug(f"Error refreshing projects: {e}")),
+      loading=loading
+    )
+
+  def update_project_node(self, node, pstatus, pweb, pref, pipeline_id):
+    """
+    Apply a project's latest pipeline to its node and row. Fires
+    pipeline_status_changed when the status moved and leaves the row alone
+    when nothing changed. Returns True if the row was updated.
+    """
+    if node.status != pstatus:
+      # Fire event on change; a first status isn't a change worth notifying
+      self.event_bus.publish(
+        "pipeline_status_changed",
+        project_id=node.id,
+        project_name=node.name,
+        old_status=FETCHED if node.status == PENDING_STATUS else node.status,
+        new_status=pstatus
+      )
 
-      new_text = f" Project: {pname_clean} ({pstatus})"# - Pipeline: {pstatus}
+    new_values = (pstatus, pweb, pref, pipeline_id)
+    old_values = (node.status, node.web_url, node.ref, node.pipeline_id)
+    if tuple(str(v) for v in new_values) == tuple(str(v) for v in old_values):
+      # Nothing changed (typically a 304 from the cache), leave the row alone
+      util.debug(f"Project {node.id} unchanged, skipping tree update.")
+      return False
 
-      # Update the node
+    url_changed = str(pweb) != str(node.web_url)
+    self.model.set_status(node, pstatus)
+    node.web_url, node.ref, node.pipeline_id = pweb, pref, pipeline_id
+    if url_changed:
+      self.model.search.update(node)
+    if node.parent not in self.virtual_windows:
+      icon, tag = self.row_style(node)
       self.tree.item(
-        item_id,
-        text=new_text,
+        node.item_id,
+        text=node.text(),
         image=icon,
-        tags=(tag,),
-        values=(node_id, "project", pstatus, pweb, pref, pipeline_id, pname_clean)
+        tags=(tag,)
       )
-      
-    if save_json:
-      util.execute_after_delay(0.05, self.save_tree_to_json)
+    if node in self.filter_rows:
+      icon, tag = self.row_style(node)
+      self.results_tree.item(self.filter_rows[node], text=node.text(), image=icon, tags=(tag,))
+    # Keep failed pipelines from getting buried among green ones (a
+    # virtual group's window redraws the row here too)
+    self.reposition_project(node)
+    self.redraw_rollups()
+    return True
+
+  def index_visible_projects(self):
+    """Map project id -> nodes, for projects under expanded groups only."""
+    index = {}
+
+    def visit(nodes):
+      for node in nodes:
+        if node.kind == "project":
+          index.setdefault(node.id, []).append(node)
+        elif self.tree.item(node.item_id, "open"):
+          visit(node.children)
+
+    visit(self.model.roots)
+    return index
 
-  def refresh_all_project_pipelines_below(self, parent_id):
+  def on_webhook_pipeline_event(self, event):
+    """Called on the webhook thread; hand the event over to the Tk thread."""
+    self.call_on_ui(self.apply_pipeline_event, event)
+
+  def apply_pipeline_event(self, event):
     """
-    Recursively walk the tree from parent_id.
-    If a node is a 'project', re-fetch its pipeline and update the node.
-    If a node is a 'group', recurse into its children.
+    Push a webhook pipeline event into the matching project rows, going
+    through the same update path (and pipeline_status_changed event) as a
+    polled refresh. Events for refs we don't track, or for pipelines older
+    than the one shown, are ignored.
     """
-    children = self.tree.get_children(parent_id)
+    ref = event["ref"]
+    for node in self.model.find_projects(event["project_id"]):
+      current_ref = node.ref
+      current_pipeline = node.pipeline_id
+
+      branches = BRANCHES.get(node.group_id())
+      if branches:
+        if ref not in branches:
+          continue
+        if current_ref in branches and branches.index(ref) > branches.index(current_ref):
+          continue
+      elif ref not in (event["default_branch"], current_ref):
+        continue
 
-    old_vals = list(self.tree.item(parent_id, "values"))
-    old_vals[2] = "fetched"
-    # Mark it as 'fetched' now
-    self.tree.item(parent_id, values=tuple(old_vals))
+      if str(current_pipeline).isdigit() and str(event["pipeline_id"]).isdigit() \
+          and int(event["pipeline_id"]) < int(current_pipeline) and ref == current_ref:
+        util.debug(f"Ignoring stale pipeline event {event['pipeline_id']} for project {event['project_id']}.")
+        continue
 
-    util.debug(f"refresh_all_project_pipelines_below: {parent_id} ({len(children)}) ({old_vals})")
+      web_url = node.web_url or event["web_url"]
+      if self.update_project_node(node, event["status"], web_url, ref, event["pipeline_id"]):
+        self.schedule_project_poll(event["project_id"], event["status"])
 
-    for child_id in children:
-      values = self.tree.item(child_id, "values")
-      if len(values) < 4:
-        util.debug(f"Node {child_id} has insufficient values to process. ({values})")
-        continue
+    self.schedule_save()
 
-      node_type = values[1]
-      if node_type == "project":
-        self.refresh_project(child_id)
-      elif node_type == "group":
-        util.debug(f"Refreshing a group node {child_id}")
-        self.refresh_all_project_pipelines_below(child_id)
+  def refresh_rate_seconds(self):
+    """Polling interval; webhooks reduce polling to a slow safety net."""
+    if self.webhook_server:
+      return WEBHOOK_FALLBACK_REFRESH_SECONDS
+    return REFRESH_RATE_SECONDS
 
-  def get_parent_group_id(self, item_id):
+  def collect_project_targets(self, group, targets):
     """
-    Walk upwards until we find a parent node whose 'type' is 'group',
-    then return that group's ID (as string).
+    Recursively walk the model from a group node.
+    If a node is a 'project', add it to 'targets' (see project_target).
+    If a node is a 'group', recurse into its children.
     """
-    parent = self.tree.parent(item_id)
-    while parent:
-      vals = self.tree.item(parent, "values")
-      if len(vals) >= 2 and vals[1] == "group":
-        # The group's ID is vals[0]
-        return str(vals[0])
-      parent = self.tree.parent(parent)
-    return ""
+    # Mark it as 'fetched' now
+    group.state = FETCHED
+    util.debug(f"collect_project_targets: {group.id} ({len(group.children)})")
+
+    for child in group.children:
+      if child.kind == "project":
+        targets.append(self.project_target(child))
+      elif child.state != UNFETCHED:
+        util.debug(f"Refreshing a group node {child.id}")
+        self.collect_project_targets(child, targets)
 
   # -------------------------------------------------------------------------
   #  Cache / JSON save & load
   # -------------------------------------------------------------------------
 
-  def save_tree_to_json(self, filename=CACHE_FILE):
+  def save_tree_to_json(self, filename=CACHE_FILE, background=False):
     """Save the entire tree structure to JSON, including open/closed states
-    and pipeline statuses."""
+    and pipeline statuses. With 'background' the file is written off the
+    Tk thread."""
     if not self.loaded:
       return
 
     util.debug(f"Saving tree structure to {filename}...")
-    # Build a recursive structure from the root items
-    root_items = self.tree.get_children("")
-    data_list = [self.build_node_dict(item_id) for item_id in root_items]
+    # Build a recursive structure from the root nodes
+    data_list = [self.build_node_dict(node) for node in self.model.roots]
 
-    with open(filename, "w", encoding="utf-8") as f:
-      json.dump(data_list, f, indent=2)
+    if background:
+      self.save_executor.submit(self.write_tree_json, filename, data_list)
+    else:
+      self.write_tree_json(filename, data_list)
 
-  def build_node_dict(self, item_id):
+  def write_tree_json(self, filename, data_list):
+    try:
+      with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data_list, f, indent=2)
+    except OSError as e:
+      util.debug(f"Could not save {filename}: {e}")
+
+  def schedule_save(self):
+    """Save the tree shortly, once, however many changes ask for it."""
+    if not self.save_pending:
+      self.save_pending = True
+      self.after(50, self.flush_save)
+
+  def flush_save(self):
+    self.save_pending = False
+    self.save_tree_to_json(background=True)
+
+  def build_node_dict(self, node):
     """Recursively build a dictionary describing this node and its children."""
-    item_text = self.tree.item(item_id, "text")
-    if item_text == "Loading...":
-      return None
-    
-    item_values = self.tree.item(item_id, "values")  # tuple: (id, type, status, web_url, branch)
-    is_open = self.tree.item(item_id, "open")
-    util.debug(f"Building node dict for {item_text} is_open={bool(is_open)}")
+    # Projects can't be opened, and may have no row in a virtual group
+    is_open = node.kind == "group" and self.tree.item(node.item_id, "open")
+    util.debug(f"Building node dict for {node.text()} is_open={bool(is_open)}")
 
-    node_data = {
-      "text": item_text,
-      "values": list(item_values),
+    if getattr(node, "evicted", None) is not None:
+      children = json.loads(zlib.decompress(node.evicted))
+    else:
+      children = [self.build_node_dict(child) for child in getattr(node, "children", ())]
+    return {
+      "text": node.cache_text(),
+      "values": list(node.values()),
       "is_open": bool(is_open),
-      "children": []
+      "children": children
     }
 
-    # Recurse into children
-    children_ids = self.tree.get_children(item_id)
-    for cid in children_ids:
-      child_node = self.build_node_dict(cid)
-      if child_node:
-        node_data["children"].append(child_node)
-
-    return node_data
-
   def load_tree_from_json(self, filename=CACHE_FILE):
     """Load the entire tree from a JSON file and rebuild the TreeView."""
     util.debug(f"Loading tree structure from {filename}...")
 
     # Clear any existing tree items
-    self.tree.delete(*self.tree.get_children())
+    self.clear_tree()
 
     try:
       with open(filename, "r", encoding="utf-8") as f:
@@ -934,11 +1708,12 @@ class PipelineCheckerApp(tk.Tk):
 
     # Rebuild the tree
     for node_data in data_list:
-      self.insert_node_from_dict("", node_data)
+      self.insert_node_from_dict(None, node_data)
+    self.redraw_rollups()
 
     return True
 
-  def insert_node_from_dict(self, parent_id, node_data):
+  def insert_node_from_dict(self, parent, node_data):
     """Recursively insert a node and its children from a node_data dict."""
     # node_data is something like:
     # {
@@ -953,113 +1728,124 @@ class PipelineCheckerApp(tk.Tk):
     is_open = node_data.get("is_open", False)
     children = node_data.get("children", [])
 
-    # Check length of vals:
-    # Expect: [some_id, "group"/"project", pipeline_status_or_flag]
-    if len(vals) < 2:
-      # This means we can't safely do vals[1]
-      # You can skip, or you can default them:
-      util.debug(f"Warning: Node '{text}' has invalid 'values': {vals}. Skipping or using defaults.")
-      # For example, skip entirely:
+    node = node_from_values(vals, text)
+    if node is None:
+      # Expect: [some_id, "group"/"project", pipeline_status_or_flag, ...]
+      util.debug(f"Warning: Node '{text}' has invalid 'values': {vals}. Skipping.")
       return
 
-    node_id = vals[0]
-    node_type = vals[1]  # "group" or "project"
-
-    # If there's a third item, treat it as pipeline status; else use empty string
-    pipeline_status = vals[2] if len(vals) >= 3 else ""
-
-    # Decide if we should show an icon or color tag
-    icon = None
-    tags = ()
-    if node_type == "project":
-      ps_lower = pipeline_status.lower()
-      if ps_lower in ("success", "manual"):
-        icon = self.success_img
-        tags = ("success_tag",)
-      elif ps_lower in ("failed", "canceled"):
-        icon = self.failed_img
-        tags = ("fail_tag",)
-      elif ps_lower in ("skipped", "running", "pending"):
-        icon = self.skipped_img
-        tags = ("skipped_tag",)
-
-    # Build insert kwargs
-    insert_kwargs = {
-      "text": text,
-      "values": tuple(vals),
-      "tags": tags
-    }
-    if icon is not None:
-      insert_kwargs["image"] = icon
-
-    # Insert the node (do NOT include open=... here)
-    item_id = self.tree.insert(parent_id, "end", **insert_kwargs)
-
-    # Now set open state
+    # Insert the node, then set its open state
+    self.insert_node(parent, node)
     util.debug(f"Node {text} is_open={bool(is_open)}")
-    self.tree.item(item_id, open=bool(is_open))
+    if is_open:
+      self.tree.item(node.item_id, open=True)
 
-    if node_type == "group":
+    if node.kind == "group":
       if not children or len(children) == 0:
         # No children, just insert this node
-        self.tree.insert(item_id, "end", text="Loading...")
+        self.tree.insert(node.item_id, "end", text=PLACEHOLDER_TEXT)
+      elif not is_open:
+        # Counts as collapsed since now, so it can be evicted later
+        self.collapsed_at[node] = time.monotonic()
+      self.insert_children_from_dicts(node, children)
+
+    if node.kind == "project":
+      self.schedule_project_poll(node.id, node.status)
+
+  def insert_children_from_dicts(self, group, children):
+    """Insert a group's children from cache dicts, through a VirtualWindow if there are many projects."""
+    if VIRTUAL_THRESHOLD:
+      projects = [c for c in children if c.get("values", [None, None])[1:2] == ["project"]]
+      if len(projects) > VIRTUAL_THRESHOLD:
+        for child_data in children:
+          if child_data.get("values", [None, None])[1:2] != ["project"]:
+            self.insert_node_from_dict(group, child_data)
+        project_nodes = [node_from_values(c.get("values", []), c.get("text", "")) for c in projects]
+        for project in project_nodes:
+          self.schedule_project_poll(project.id, project.status)
+        self.populate_virtual_group(group, sorted(group.children + project_nodes, key=sort_key))
+        return
 
     # Recurse into children
     for child_data in children:
-      self.insert_node_from_dict(item_id, child_data)
+      self.insert_node_from_dict(group, child_data)
 
   def refresh_groups(self, save_json=True):
     """
     After loading from JSON, this method finds all group nodes that
     are 'open' and re-fetches them from GitLab, so the 'currently
-    showing' projects are refreshed.
+    showing' projects are refreshed. The tree is walked here on the Tk
+    thread, the requests run on the worker pool and the results are
+    applied back on the Tk thread.
     """
-    util.debug("Refreshing open group nodes from GitLab...")
-    self.loading_label.config(text="Refreshing groups...")
-    self.update_idletasks()
-    root_items = self.tree.get_children("")
-    for item_id in root_items:
-      util.debug(f"refresh_groups: Refreshing {item_id}")
-      self.refresh_group(item_id)
-
-    self.loading_label.config(text="")
-
-    # Record the time we finished the refresh
-    now = time.strftime("%Y-%m-%d %I:%M:%S %p")
-    self.last_refresh_label.config(text=f"Last refresh: {now}")
-
-    if save_json:
-      util.execute_after_delay(0.05, self.save_tree_to_json)
-
-  def refresh_group(self, item_id, save_json=False):
-    """Recursively refresh this group if it is open, then check children."""
-    is_open = self.tree.item(item_id, "open")
-    text = self.tree.item(item_id, "text")
-    children = self.tree.get_children(item_id)
-    vals = list(self.tree.item(item_id, "values"))
-    if len(vals) < 4:
+    if self.refreshing:
+      util.debug("Refresh already in progress, skipping.")
       return
 
-    node_id = vals[0]
-    node_type = vals[1]
+    util.debug("Refreshing open group nodes from GitLab...")
+    # Let the next expansion re-crawl the org in flat mode
+    self.namespace_index = None
+    roots = []
+    for root in self.model.roots:
+      util.debug(f"refresh_groups: Refreshing {root.id}")
+      targets = []
+      self.refresh_group(root, targets)
+      roots.append((root.id, targets))
 
-    if node_type == "group":
-      # Re-fetch from GitLab (this will delete old children and insert fresh ones)
-      if not children or len(children) == 0:
-        self.tree.insert(item_id, "end", text="Loading...")
-      elif bool(is_open):
-        self.refresh_all_project_pipelines_below(item_id)
-      else:
-        vals[2] = "refresh"
-        self.tree.item(item_id, values=tuple(vals))
+    token = self.token_var.get().strip()
+    self.refreshing = True
+
+    def done(fetched):
+      results, skipped = fetched
+      self.refreshing = False
+      self.apply_project_results(results, skipped)
+      # Record the time we finished the refresh
+      self.set_last_refresh(len(skipped))
+      if save_json:
+        self.schedule_save()
+
+    def failed(e):
+      self.refreshing = False
+      # Timeouts, outages and an open circuit leave the tree as it was
+      util.debug(f"Refresh aborted: {e}")
+      self.update_stale_indicator()
+
+    self.run_in_background(self.fetch_refresh, token, roots, on_done=done, on_error=failed, loading="Refreshing groups...")
+
+  def fetch_refresh(self, token, roots):
+    """
+    Worker thread: fetch the pipelines of every root's project targets
+    (only the changed ones with incremental polling), within the refresh
+    deadline. Only the refresh's own calls are bound by that deadline.
+    Projects that couldn't be fetched in time are skipped, the rest are
+    still applied. Returns ([(node, info)], [skipped nodes]).
+    """
+    results = []
+    skipped = []
+    deadline = time.monotonic() + REFRESH_DEADLINE_SECONDS
+    for group_id, targets in roots:
+      only = None
+      if self.delta_poller:
+        only = self.delta_poller.changed_project_ids(token, group_id, deadline)
+      fetched, failed = self.fetch_project_targets(token, targets, only, deadline)
+      results.extend(fetched)
+      skipped.extend(failed)
+    return results, skipped
+
+  def refresh_group(self, node, targets):
+    """
+    Recursively prepare this group for a refresh: if it is open, its
+    projects are added to 'targets' for the caller to fetch, if it is
+    closed it is flagged to refresh when next expanded.
+    """
+    if node.kind != "group":
+      return
+    if not self.tree.get_children(node.item_id):
+      self.tree.insert(node.item_id, "end", text=PLACEHOLDER_TEXT)
+    elif self.tree.item(node.item_id, "open"):
+      self.collect_project_targets(node, targets)
     else:
-      # If it's not an open group, just recurse to children
-      # (In case you have subgroups under projects, typically not, but just in case)
-      for child_id in self.tree.get_children(item_id):
-        self.refresh_group(child_id)
-
-    if save_json:
-      util.execute_after_delay(0.05, self.save_tree_to_json)
+      node.state = REFRESH
 
   # -------------------------------------------------------------------------
   #  GitLab helpers
@@ -1070,10 +1856,7 @@ class PipelineCheckerApp(tk.Tk):
     if group_name.isdigit():
       util.debug("Group name is numeric, using directly.")
       return group_name
-    headers = {"Private-Token": token}
-    r = requests.get(f"{GITLAB_API_URL}/groups", headers=headers, params={"search": group_name})
-    r.raise_for_status()
-    groups = r.json()
+    groups = self.api.get_json("/groups", token=token, params={"search": group_name}).data
     util.debug(f"{len(groups)} groups returned from search.")
     for g in groups:
       # Compare either 'name' or 'path' to group_name, ignoring case
@@ -1082,85 +1865,144 @@ class PipelineCheckerApp(tk.Tk):
         return g["id"]
     raise ValueError(f"Group not found: {group_name}")
 
+  def get_namespace_index(self, token, group_id):
+    """
+    Flat crawl: list every project below group_id in one paged
+    include_subgroups=true listing and rebuild the subgroup hierarchy from
+    the projects' namespace paths, with the groups' ids from one
+    descendant_groups listing. The result is reused for every group below
+    that root until the next refresh.
+    """
+    if self.namespace_index and self.namespace_index.get(group_id):
+      return self.namespace_index
+
+    util.debug(f"Flat crawl of group {group_id}.")
+    root_group = self.api.get_json(f"/groups/{encode_id(group_id)}", token=token, params={"with_projects": "false"}).data
+    projects = self.api.get_paginated(
+      f"/groups/{encode_id(group_id)}/projects",
+      token=token,
+      params={"include_subgroups": "true", "simple": "true", "with_custom_attributes": "false"},
+      fields=PROJECT_FIELDS
+    )
+    try:
+      groups = self.api.get_paginated(
+        f"/groups/{encode_id(group_id)}/descendant_groups",
+        token=token,
+        params={"with_custom_attributes": "false"},
+        fields=GROUP_FIELDS
+      )
+    except requests.exceptions.RequestException as e:
+      # Groups without projects then keep their path as id, and ignored_groups
+      # entries only match them by full path
+      util.debug(f"Could not list descendant groups of {group_id}: {e}")
+      groups = []
+    self.namespace_index = NamespaceIndex(root_group, projects, groups)
+    return self.namespace_index
+
   def get_subgroups(self, token, group_id):
     util.debug(f"get_subgroups called for group_id={group_id}.")
-    headers = {"Private-Token": token}
-    subgroups = []
-    page = 1
-    while True:
-      r = requests.get(
-        f"{GITLAB_API_URL}/groups/{group_id}/subgroups",
-        headers=headers,
-        params={"page": page, "per_page": 100}
-      )
-      r.raise_for_status()
-      data = r.json()
-      if not data:
-        util.debug("No more subgroups found.")
-        break
-      util.debug(f"Found {len(data)} subgroups on page {page}.")
-      subgroups.extend(data)
-      page += 1
+    if CRAWL_MODE == "flat":
+      return self.get_namespace_index(token, group_id).subgroups(group_id)
+
+    subgroups = self.api.get_paginated(
+      f"/groups/{encode_id(group_id)}/subgroups",
+      token=token,
+      params={"with_custom_attributes": "false"},
+      fields=GROUP_FIELDS
+    )
+    util.debug(f"Found {len(subgroups)} subgroups.")
     return subgroups
 
   def get_group_projects(self, token, group_id):
     util.debug(f"get_group_projects called for group_id={group_id}.")
-    headers = {"Private-Token": token}
-    projects = []
-    page = 1
-    while True:
-      r = requests.get(
-        f"{GITLAB_API_URL}/groups/{group_id}/projects",
-        headers=headers,
-        params={"page": page, "per_page": 100, "include_subgroups": "false"}
-      )
-      r.raise_for_status()
-      page_projects = r.json()
-      if not page_projects:
-        util.debug("No more projects on this page.")
-        break
-      util.debug(f"Found {len(page_projects)} projects on page {page}.")
-      projects.extend(page_projects)
-      page += 1
+    if CRAWL_MODE == "flat":
+      return self.get_namespace_index(token, group_id).projects(group_id)
+
+    if self.graphql:
+      try:
+        return self.graphql.get_group_projects(token, group_id, BRANCHES.get(str(group_id)))
+      except (GraphQLError, requests.exceptions.RequestException) as e:
+        # Also covers transport errors, timeouts and an open circuit on the GraphQL endpoint
+        util.debug(f"GraphQL listing failed, falling back to REST: {e}")
+
+    projects = self.api.get_paginated(
+      f"/groups/{encode_id(group_id)}/projects",
+      token=token,
+      params={"include_subgroups": "false", "simple": "true", "with_custom_attributes": "false"},
+      fields=PROJECT_FIELDS
+    )
+    util.debug(f"Found {len(projects)} projects.")
     return projects
   
-  def get_branches_pipeline_status(self, token, project_id, branches):
-    for branch in branches:
-      status, ref, pipeline_id = self.get_latest_pipeline_status(token, project_id, branch)
+  def get_branches_pipeline_status(self, token, project_id, branches, deadline=None):
+    """
+    Returns the latest pipeline of the first branch (in BRANCHES order)
+    that has one. A single listing of the project's most recent pipelines
+    usually settles it. Only when that listing is truncated are the
+    higher-priority branches missing from it probed, concurrently.
+    """
+    try:
+      pipelines = self.api.get_json(
+        f"/projects/{project_id}/pipelines",
+        token=token,
+        params={"per_page": BRANCH_LISTING_SIZE, "order_by": "id", "sort": "desc"},
+        deadline=deadline
+      ).data or []
+    except requests.exceptions.HTTPError as e:
+      if e.response is not None and e.response.status_code in (403, 404):
+        return "No pipeline found", "", ""
+      raise e
 
-      if pipeline_id != "":
-        util.debug(f"Branch {branch} status: {status}")
-        return status, ref, pipeline_id
+    # Newest pipeline per ref (the listing is sorted by id, newest first)
+    latest = {}
+    for pipeline in pipelines:
+      latest.setdefault(pipeline["ref"], pipeline)
+
+    best = next((i for i, branch in enumerate(branches) if branch in latest), None)
+    if len(pipelines) >= BRANCH_LISTING_SIZE:
+      # Older pipelines exist, so higher-priority branches may still have one
+      missing = branches if best is None else branches[:best]
+      if missing:
+        util.debug(f"Probing {len(missing)} branches for project {project_id}.")
+        results = list(self.probe_executor.map(
+          lambda branch: self.get_latest_pipeline_status(token, project_id, branch, deadline),
+          missing
+        ))
+        for branch, (status, ref, pipeline_id) in zip(missing, results):
+          if pipeline_id != "":
+            util.debug(f"Branch {branch} status: {status}")
+            return status, ref, pipeline_id
+
+    if best is not None:
+      pipeline = latest[branches[best]]
+      util.debug(f"Branch {branches[best]} status: {pipeline['status']}")
+      return pipeline["status"], pipeline["ref"], pipeline["id"]
 
     return "No pipeline found", "", ""
 
-  def get_latest_pipeline_status(self, token, project_id, branch=None):
+  def get_latest_pipeline_status(self, token, project_id, branch=None, deadline=None):
     """
     Returns the status of the pipeline that truly finished last,
     among the specified branches.
     """
-    headers = {"Private-Token": token}
-
     params = {}
     if branch:
       util.debug(f"Getting latest pipeline for branch {branch}.")
       params["ref"] = branch
     
-    r = requests.get(
-      f"{GITLAB_API_URL}/projects/{project_id}/pipelines/latest",
-      headers=headers,
-      params=params
-    )
-
     try:
-      r.raise_for_status()
+      pipeline = self.api.get_json(
+        f"/projects/{project_id}/pipelines/latest",
+        token=token,
+        params=params,
+        deadline=deadline
+      ).data
     except requests.exceptions.HTTPError as e:
-      if r.status_code in (403, 404):
+      if e.response is not None and e.response.status_code in (403, 404):
         return "No pipeline found", "", ""
       else:
         raise e
 
-    pipeline = r.json()
     if not pipeline:
       return "No pipeline found", "", ""
   
@@ -1168,17 +2010,13 @@ class PipelineCheckerApp(tk.Tk):
     return pipeline["status"], pipeline["ref"], pipeline["id"]
     
   def retry_pipeline(self, token, project_id, pipeline_id):
-    headers = {"Private-Token": token}
-    url = f"{GITLAB_API_URL}/projects/{project_id}/pipelines/{pipeline_id}/retry"
-    r = requests.post(url, headers=headers)
+    r = self.api.post(f"/projects/{project_id}/pipelines/{pipeline_id}/retry", token=token)
     r.raise_for_status()
     return r.json()
   
   def create_pipeline(self, token, project_id, ref="development"):
-    headers = {"Private-Token": token}
     data = {"ref": ref}
-    url = f"{GITLAB_API_URL}/projects/{project_id}/pipeline"
-    r = requests.post(url, headers=headers, json=data)
+    r = self.api.post(f"/projects/{project_id}/pipeline", token=token, json=data)
     r.raise_for_status()
     return r.json()
   
@@ -1186,75 +2024,73 @@ class PipelineCheckerApp(tk.Tk):
     """Create a new pipeline (e.g. on 'main') for the clicked project."""
     if not hasattr(self, "current_item_id"):
       return
-    row_id = self.current_item_id
-
-    row_values = self.tree.item(row_id, "values")
-    if len(row_values) < 4:
+    node = self.model.get(self.current_item_id)
+    if node is None:
       return
 
-    project_id = row_values[0]
-    node_type = row_values[1]
-    branch = row_values[4]
+    project_id = node.id
+    branch = getattr(node, "ref", "")
 
-    if node_type != "project":
+    if node.kind != "project":
       messagebox.showinfo("Not a Project", "This menu action only applies to projects.")
       return
 
-    # For demonstration, let's always create a pipeline on 'main'
-    try:
-      created = self.create_pipeline(self.token_var.get(), project_id, branch)
+    def done(created):
       new_pid = created.get("id")
       #messagebox.showinfo("Pipeline Created", f"New pipeline (ID={new_pid}) on '{branch}'")
       self.show_notification("Pipeline Created", f"New pipeline (ID={new_pid}) on '{branch}'")
-    except Exception as e:
-      messagebox.showerror("Error", str(e))
+
+    self.run_in_background(
+      self.create_pipeline, self.token_var.get(), project_id, branch,
+      on_done=done,
+      on_error=lambda e: self.show_error("Error creating pipeline", e)
+    )
 
   def menu_retry_pipeline(self):
     """Retry the last pipeline for the clicked project (if possible)."""
     if not hasattr(self, "current_item_id"):
       return
-    row_id = self.current_item_id
+    node = self.model.get(self.current_item_id)
+    if node is None:
+      return
 
-    row_values = self.tree.item(row_id, "values")
-    # e.g. (project_id, "project", "failed", "https://gitlab.com/...", pipeline_id)
-    util.debug(f"Row values: {row_values}")
-    if len(row_values) < 5:
+    util.debug(f"Row values: {node.values()}")
+    if node.kind == "project" and not node.pipeline_id:
       messagebox.showerror("Error", "Cannot retry pipeline: not enough info stored.")
       return
     
-    project_id = row_values[0]
-    node_type = row_values[1]
-    pipeline_id = row_values[5]
-    project_name = row_values[6]
+    project_id = node.id
+    node_type = node.kind
+    pipeline_id = getattr(node, "pipeline_id", "")
+    project_name = node.name
 
     if node_type != "project":
       messagebox.showinfo("Not a Project", "This menu action only applies to projects.")
       return
 
-    # Here use a helper function to call GitLab's /retry endpoint
-    try:
-      util.debug(f"Retrying pipeline {pipeline_id} for project {project_name} ({project_id}).")
-      info = self.retry_pipeline(self.token_var.get(), project_id, pipeline_id)
+    def done(info):
       #util.debug(f"Retry info: {info}")
-      #messagebox.showinfo("Retry Successful", f"Pipeline {pipeline_id} for project '{project_name}' was retried.")
       self.show_notification(f"Retrying Pipeline", f"Pipeline {pipeline_id} retried for '{project_name}'.")
-      
-      util.execute_after_delay(3, self.refresh_project, row_id, save_json=True)
-    except Exception as e:
-      messagebox.showerror("Error", str(e))
-  
+      self.after(3000, self.refresh_project, node, True)
+
+    # Here use a helper function to call GitLab's /retry endpoint
+    util.debug(f"Retrying pipeline {pipeline_id} for project {project_name} ({project_id}).")
+    self.run_in_background(
+      self.retry_pipeline, self.token_var.get(), project_id, pipeline_id,
+      on_done=done,
+      on_error=lambda e: self.show_error("Error retrying pipeline", e)
+    )
+
   def menu_open_in_browser(self):
     """Open the clicked row's GitLab URL in a browser."""
     if not hasattr(self, "current_item_id"):
       return
-    row_id = self.current_item_id
-
-    row_values = self.tree.item(row_id, "values")
-    if len(row_values) < 3:
+    node = self.model.get(self.current_item_id)
+    if node is None:
       return
 
-    node_type = row_values[1]
-    web_url = row_values[3]
+    node_type = node.kind
+    web_url = node.web_url
     
     if node_type == "group":
       if web_url:
@@ -1263,8 +2099,8 @@ class PipelineCheckerApp(tk.Tk):
         messagebox.showinfo("No URL", "This item does not have a valid web_url.")
     elif node_type == "project":
       if web_url:
-        pipeline = row_values[5]
-        util.debug(f"Opening pipeline {pipeline} for project {row_values[0]} in browser.")
+        pipeline = node.pipeline_id
+        util.debug(f"Opening pipeline {pipeline} for project {node.id} in browser.")
         if pipeline:
           webbrowser.open(web_url + "/-/pipelines/" + str(pipeline))
         else:
@@ -1276,47 +2112,42 @@ class PipelineCheckerApp(tk.Tk):
     """Refresh the clicked group node."""
     if not hasattr(self, "current_item_id"):
       return
-    row_id = self.current_item_id
-
-    row_values = self.tree.item(row_id, "values")
-    if len(row_values) < 2:
+    node = self.model.get(self.current_item_id)
+    if node is None:
       return
-    
-    row_text = self.tree.item(row_id, "text")
-    self.loading_label.config(text=f"Refreshing {row_text}...")
-    self.update_idletasks()
-
-    node_type = row_values[1]
-    if node_type == "group":
-      self.refresh_group(row_id, save_json=True)
 
-    self.loading_label.config(text="")
+    if node.kind == "group":
+      if node.state == UNFETCHED:
+        targets = []
+        self.refresh_group(node, targets)
+        self.refresh_project_targets(targets, save_json=True, loading=f"Refreshing {node.text()}...")
+      else:
+        self.refetch_group(node, loading=f"Refreshing {node.text()}...")
 
   def menu_refresh_project(self):
     """Refresh the clicked project node."""
     if not hasattr(self, "current_item_id"):
       return
-    row_id = self.current_item_id
-
-    row_values = self.tree.item(row_id, "values")
-    if len(row_values) < 2:
+    node = self.model.get(self.current_item_id)
+    if node is None:
       return
 
-    row_text = self.tree.item(row_id, "text")
-    self.loading_label.config(text=f"Refreshing {row_text}...")
-    self.update_idletasks()
-
-    node_type = row_values[1]
-    if node_type == "project":
-      self.refresh_project(row_id, save_json=True)
-
-    self.loading_label.config(text="")
+    if node.kind == "project":
+      self.refresh_project(node, save_json=True, loading=f"Refreshing {node.text()}...")
 
   def on_closing(self):
     """Handler for the window close event."""
     try:
       util.debug("main app: on_closing called.")
       util.cancel_delay_timers()
+      if self.webhook_server:
+        self.webhook_server.shutdown()
+      util.debug(f"API stats: {self.api.stats()}")
+      self.executor.shutdown(wait=False, cancel_futures=True)
+      self.probe_executor.shutdown(wait=False, cancel_futures=True)
+      self.worker_executor.shutdown(wait=False, cancel_futures=True)
+      self.save_executor.shutdown(wait=True)
+      self.api.close()
       self.notification.shutdown()
       self.destroy()
     except Exception as e:
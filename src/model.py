@@ -0,0 +1,343 @@
+from bisect import bisect_left
+from operator import attrgetter
+
+from search import SearchIndex
+
+# Group states, also stored in the JSON cache
+UNFETCHED = "unfetched"
+FETCHED = "fetched"
+REFRESH = "refresh"
+
+# Text of the dummy row that makes an unfetched group expandable
+PLACEHOLDER_TEXT = "Loading..."
+
+# Status of a listed project whose pipeline hasn't been fetched yet
+PENDING_STATUS = "fetching"
+
+def status_priority(status):
+  """Sort rank of a pipeline status: running/pending, failed, success, the rest, then not fetched yet."""
+  ps_lower = str(status).lower()
+  if ps_lower in ("running", "pending"):
+    return 0
+  elif ps_lower in ("failed", "canceled"):
+    return 1
+  elif ps_lower in ("success", "manual"):
+    return 2
+  elif ps_lower == PENDING_STATUS:
+    return 4
+  # for "skipped", etc.
+  return 3
+
+def sort_key(node):
+  """Where a node goes among its siblings: subgroups by name, then projects by (priority, name)."""
+  if node.kind == "group":
+    return (-1, node.name.lower(), node.id)
+  return (status_priority(node.status), node.name.lower(), node.id)
+
+_order_key = attrgetter("order_key")
+
+# Statuses a group's rollup shows, worst first
+ROLLUP_STATUSES = ("failed", "canceled", "running", "pending")
+
+def rollup_text(counts):
+  """What a group's row shows of its subtree's statuses, e.g. "3 failed / 1 running"."""
+  return " / ".join(f"{counts[status]} {status}" for status in ROLLUP_STATUSES if counts.get(status))
+
+def subtree_counts(node):
+  """Per-status project counts of a node's subtree, a project counting itself."""
+  if node.kind == "group":
+    return node.counts
+  return {str(node.status).lower(): 1}
+
+class GroupNode:
+  """A GitLab group shown in the tree."""
+  __slots__ = (
+    "id", "name", "web_url", "parent_name", "state", "parent", "item_id", "children", "order_key", "evicted",
+    "detached", "counts", "no_pipeline"
+  )
+  kind = "group"
+
+  def __init__(self, id, name, web_url="", parent_name="", state=UNFETCHED):
+    self.id = str(id)
+    self.name = name
+    self.web_url = web_url
+    # Display name of the group this one was listed under
+    self.parent_name = parent_name
+    self.state = state
+    self.parent = None
+    self.item_id = None
+    self.children = []
+    # The sort_key the node was placed among its siblings with
+    self.order_key = None
+    # While the subtree is evicted from the tree: its children's cache
+    # dicts, as compressed JSON (the children list is then empty)
+    self.evicted = None
+    # Meanwhile the children themselves, out of the model but still in its
+    # search index (see TreeModel.remove_children)
+    self.detached = []
+    # Lowercase status -> number of projects below with it, evicted ones
+    # included (see TreeModel.add_counts)
+    self.counts = {}
+    # Ids of listed projects last found without a pipeline (they get no row)
+    self.no_pipeline = set()
+
+  def text(self):
+    rollup = rollup_text(self.counts)
+    return f"{self.cache_text()} ({rollup})" if rollup else self.cache_text()
+
+  def cache_text(self):
+    """Row text without the rollup, as stored in the JSON cache (node_from_values reads the name back)."""
+    return f"Group: {self.name}"
+
+  def values(self):
+    """Row values as stored in the JSON cache: (id, type, state, web_url, parent name)."""
+    return (self.id, "group", self.state, self.web_url, self.parent_name)
+
+
+class ProjectNode:
+  """A GitLab project and the pipeline shown for it."""
+  __slots__ = ("id", "name", "web_url", "status", "ref", "pipeline_id", "parent", "item_id", "order_key")
+  kind = "project"
+
+  def __init__(self, id, name, status="", web_url="", ref="", pipeline_id=""):
+    self.id = str(id)
+    self.name = name
+    self.status = status
+    self.web_url = web_url
+    self.ref = ref
+    self.pipeline_id = pipeline_id
+    self.parent = None
+    self.item_id = None
+    self.order_key = None
+
+  def text(self):
+    return f" Project: {self.name} ({self.status})"
+
+  def cache_text(self):
+    return self.text()
+
+  def values(self):
+    """Row values as stored in the JSON cache: (id, type, status, web_url, ref, pipeline id, name)."""
+    return (self.id, "project", self.status, self.web_url, self.ref, self.pipeline_id, self.name)
+
+  def group_id(self):
+    return self.parent.id if self.parent else ""
+
+
+def node_from_values(values, text=""):
+  """
+  Build a node from cached row values (see GroupNode.values and
+  ProjectNode.values). Returns None for rows without an id and a type.
+  Older caches may lack trailing values, so those fall back to defaults
+  and the name is taken from the row text.
+  """
+  if len(values) < 2:
+    return None
+  values = list(values) + [""] * (7 - len(values))
+  if values[1] == "group":
+    name = text.replace("Group: ", "", 1)
+    return GroupNode(values[0], name, values[3], values[4], values[2] or UNFETCHED)
+  if values[1] == "project":
+    name = values[6] or text.split(" Project: ", 1)[-1].split(" (")[0].strip()
+    return ProjectNode(values[0], name, values[2], values[3], values[4], values[5])
+  return None
+
+
+class TreeModel:
+  """
+  The groups and projects shown in the tree, indexed by Treeview item id,
+  by GitLab id and by name (see SearchIndex). The same project can appear
+  under more than one group, so the GitLab id indexes map to lists of nodes.
+
+  Each group also counts the statuses of the projects below it. Those
+  counts are kept up to date by walking up from whatever changed (a
+  project added, removed or changing status), never by rescanning a
+  subtree; take_rollup_changes tells which groups' rollups then changed.
+  """
+  def __init__(self):
+    self.roots = []
+    self.by_item = {}
+    self.groups = {}
+    self.projects = {}
+    self.search = SearchIndex()
+    # Group -> its rollup_text before the changes not taken yet
+    self.rollup_before = {}
+
+  def add(self, node, item_id, parent=None, position=None):
+    """
+    Index a node and insert it among its parent's children at 'position'
+    (see insertion_index), by default at the end.
+    """
+    self.index(node, item_id, parent)
+    siblings = parent.children if parent else self.roots
+    node.order_key = sort_key(node)
+    siblings.insert(len(siblings) if position is None else position, node)
+    return node
+
+  def insertion_index(self, parent, node):
+    """Where node belongs among parent's children (top-level nodes go last)."""
+    if parent is None:
+      return len(self.roots)
+    return bisect_left(parent.children, sort_key(node), key=_order_key)
+
+  def set_children(self, group, children):
+    """Replace a group's children with already indexed nodes, given in sort_key order."""
+    for child in children:
+      child.order_key = sort_key(child)
+    group.children = children
+
+  def reposition(self, node):
+    """
+    Move a node to where its current sort_key belongs among its siblings,
+    found by bisection without re-sorting them. Returns its new index, or
+    None if it stays where it is.
+    """
+    parent = node.parent
+    key = sort_key(node)
+    if parent is None or key == node.order_key:
+      return None
+    siblings = parent.children
+    old_index = bisect_left(siblings, node.order_key, key=_order_key)
+    if old_index >= len(siblings) or siblings[old_index] is not node:
+      old_index = siblings.index(node)
+    del siblings[old_index]
+    new_index = bisect_left(siblings, key, key=_order_key)
+    siblings.insert(new_index, node)
+    node.order_key = key
+    return None if new_index == old_index else new_index
+
+  def index(self, node, item_id, parent=None):
+    """
+    Index a node without touching its parent's children list. A node
+    without an item id is in the model but has no row (see VirtualWindow).
+    """
+    node.item_id = item_id
+    node.parent = parent
+    if item_id is not None:
+      self.by_item[item_id] = node
+    index = self.projects if node.kind == "project" else self.groups
+    index.setdefault(node.id, []).append(node)
+    self.search.add(node)
+    self.add_counts(parent, subtree_counts(node))
+    return node
+
+  def add_counts(self, group, counts, sign=1):
+    """Add (sign=-1: take away) per-status project counts to a group and each of its ancestors."""
+    counts = [(status, sign * n) for status, n in counts.items() if n]
+    if not counts:
+      return
+    shown = any(status in ROLLUP_STATUSES for status, n in counts)
+    while group is not None:
+      totals = group.counts
+      if shown and group not in self.rollup_before:
+        self.rollup_before[group] = rollup_text(totals)
+      for status, n in counts:
+        total = totals.get(status, 0) + n
+        if total:
+          totals[status] = total
+        else:
+          del totals[status]
+      group = group.parent
+
+  def set_status(self, node, status):
+    """Change a project's status, moving it between its ancestors' counts."""
+    old = str(node.status).lower()
+    node.status = status
+    new = str(status).lower()
+    if new != old and node.parent is not None and self.contains(node):
+      self.add_counts(node.parent, {old: -1, new: 1})
+
+  def take_rollup_changes(self):
+    """The groups whose rollup_text changed since the last call, still in the model."""
+    changed = [
+      group for group, before in self.rollup_before.items()
+      if rollup_text(group.counts) != before and self.contains(group)
+    ]
+    self.rollup_before = {}
+    return changed
+
+  def get(self, item_id):
+    """The node shown by a Treeview item (None for placeholder rows)."""
+    return self.by_item.get(item_id)
+
+  def contains(self, node):
+    """False once the node was removed, e.g. by a reload while it was being fetched."""
+    index = self.projects if node.kind == "project" else self.groups
+    return any(n is node for n in index.get(node.id, ()))
+
+  def bind(self, node, item_id):
+    """Show an indexed node in an existing row, e.g. one being recycled."""
+    node.item_id = item_id
+    self.by_item[item_id] = node
+
+  def unbind(self, node):
+    """Take a node off its row; it stays in the model without an item id."""
+    if node.item_id is not None and self.by_item.get(node.item_id) is node:
+      del self.by_item[node.item_id]
+    node.item_id = None
+
+  def find_projects(self, project_id):
+    return list(self.projects.get(str(project_id), ()))
+
+  def find_groups(self, group_id):
+    return list(self.groups.get(str(group_id), ()))
+
+  def remove_children(self, group, searchable=False):
+    """
+    Drop a group's children from the model. With 'searchable' they stay in
+    the search index, kept in group.detached until drop_detached.
+    """
+    for child in group.children:
+      self.unindex(child, searchable)
+    group.detached = group.children if searchable else []
+    group.children = []
+
+  def drop_detached(self, group):
+    """Take the children remove_children kept searchable out of the search index."""
+    for node in group.detached:
+      self._unsearch(node)
+    group.detached = []
+
+  def _unsearch(self, node):
+    self.search.remove(node)
+    if node.kind == "group":
+      for child in node.children + node.detached:
+        self._unsearch(child)
+
+  def remove(self, node):
+    siblings = node.parent.children if node.parent else self.roots
+    siblings.remove(node)
+    self.unindex(node)
+
+  def unindex(self, node, searchable=False):
+    """
+    Drop a node and its subtree from the indexes (not from its parent's
+    children). With 'searchable' they stay in the search index.
+    """
+    self.add_counts(node.parent, subtree_counts(node), -1)
+    self._unindex(node, searchable)
+
+  def _unindex(self, node, searchable=False):
+    self.unbind(node)
+    index = self.projects if node.kind == "project" else self.groups
+    nodes = index.get(node.id)
+    if nodes:
+      nodes.remove(node)
+      if not nodes:
+        del index[node.id]
+    if not searchable:
+      self.search.remove(node)
+    if node.kind == "group":
+      for child in node.children:
+        self._unindex(child, searchable)
+      if not searchable:
+        # An evicted group's children go with it
+        self.drop_detached(node)
+
+  def clear(self):
+    self.roots = []
+    self.by_item.clear()
+    self.groups.clear()
+    self.projects.clear()
+    self.search = SearchIndex()
+    self.rollup_before = {}
@@ -22,6 +22,10 @@ try:
 except ImportError as e:
   Notifier = None
   Toast = None
+  # Still referenced as AsyncNotifier.show defaults
+  show_async = None
+  handle_activated = handle_dismissed = handle_failed = None
+  ToastNotificationManager = None
 
 class AsyncNotifier:
   """
@@ -168,33 +172,46 @@ class NotificationLinux:
   """
   Displays a Linux notification using `notify-send`.
   """
-  def __init__(self, title, message, icon=None, duration=5):
+  def __init__(self, title, message, icon=None, duration=5, app_name=None, **kwargs):
     """
     :param title: Title text of the notification.
     :param message: Body text of the notification.
     :param icon: (Optional) Path/URL to the icon image.
     :param duration: Time in seconds for how long the notification should persist (if supported).
                      `notify-send` takes milliseconds, so it will be converted automatically.
+    :param app_name: (Optional) Application name passed to `notify-send`.
+
+    Other keyword arguments (callbacks, event loop) are accepted for
+    compatibility with NotificationWin32 and ignored.
     """
+    self.app_name = app_name
     self.title = title
     self.message = message
-    self.icon = icon
+    self.icon = os.path.abspath(icon) if icon else None
     self.duration = duration
 
-  def show(self, title=None, message=None, duration=None):
+  def show(self, title=None, message=None, duration=None, threaded=False):
+    util.debug(f"Showing Linux notification {title}|{message}|{duration}")
     # notify-send arguments
     command = ["notify-send", title or self.title, message or self.message]
 
+    if self.app_name:
+      command.extend(["-a", self.app_name])
+
     # If an icon is specified, attach it
     if self.icon:
       command.extend(["-i", self.icon])
 
     # Delay (ttl) in milliseconds
-    if self.delay:
-      command.extend(["-t", str((duration or self.duration) * 1000)])
+    duration = duration or self.duration
+    if duration:
+      command.extend(["-t", str(int(duration * 1000))])
 
-    # Run notify-send
-    subprocess.run(command, check=False)
+    # Run notify-send; it's missing on minimal/headless systems
+    try:
+      subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+      util.debug(f"Error displaying notification: {e}")
 
   def shutdown(self):
     pass
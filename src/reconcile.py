@@ -0,0 +1,157 @@
+from model import PLACEHOLDER_TEXT
+
+def node_key(node):
+  return (node.kind, node.id)
+
+
+class Changes:
+  """What a reconcile did to a group's children."""
+  __slots__ = ("inserted", "updated", "removed", "moved", "status_changed")
+
+  def __init__(self):
+    self.inserted = []
+    self.updated = []
+    self.removed = []
+    self.moved = False
+    # (node, old status) for existing projects whose status changed
+    self.status_changed = []
+
+  def __bool__(self):
+    return bool(self.inserted or self.updated or self.removed or self.moved)
+
+
+def _copy_fields(model, old, new):
+  """Take the listed fields of 'new' into 'old', keeping old's row, state and children."""
+  if (old.name, old.web_url) != (new.name, new.web_url):
+    old.name = new.name
+    old.web_url = new.web_url
+    model.search.update(old)
+  if old.kind == "group":
+    old.parent_name = new.parent_name
+  else:
+    model.set_status(old, new.status)
+    old.ref = new.ref
+    old.pipeline_id = new.pipeline_id
+
+def reconcile_children(tree, model, group, new_children, row_style):
+  """
+  Make a group's children, in the model and in the Treeview, match
+  'new_children' (freshly built nodes in sort_key order) with as few Tcl
+  calls as possible.
+
+  Children are matched by kind and GitLab id. A matched child keeps its
+  node and row, so its selection, open state and fetched subtree survive,
+  and its row is only reconfigured when its text or style changed. Rows
+  that disappeared are deleted in one call and the order is only fixed up
+  (one set_children call) when kept rows changed places. Unchanged
+  children cost no Tcl calls at all.
+
+  'row_style' maps a node to the (image, tag) its row is drawn with.
+  Returns a Changes.
+  """
+  changes = Changes()
+  parent_item = group.item_id
+  if not group.children:
+    # Only the placeholder row (if any) is there
+    placeholders = tree.get_children(parent_item)
+    if placeholders:
+      tree.delete(*placeholders)
+
+  existing = {}
+  for child in group.children:
+    existing.setdefault(node_key(child), child)
+
+  final = []
+  for new in new_children:
+    old = existing.pop(node_key(new), None)
+    if old is None:
+      final.append(new)
+      continue
+    before = (old.text(), row_style(old))
+    old_status = getattr(old, "status", None)
+    _copy_fields(model, old, new)
+    if old_status is not None and old.status != old_status:
+      changes.status_changed.append((old, old_status))
+    after = (old.text(), row_style(old))
+    if after != before:
+      image, tag = after[1]
+      tree.item(old.item_id, text=after[0], image=image, tags=(tag,) if tag else ())
+      changes.updated.append(old)
+    final.append(old)
+
+  kept = set(id(node) for node in final if node.item_id is not None)
+  changes.removed = [child for child in group.children if id(child) not in kept]
+  if changes.removed:
+    tree.delete(*[child.item_id for child in changes.removed])
+    for child in changes.removed:
+      model.unindex(child)
+
+  # With the kept rows already in order, new rows can go straight to their
+  # index; otherwise they are appended and everything is reordered at once
+  kept_before = [child for child in group.children if id(child) in kept]
+  kept_after = [node for node in final if id(node) in kept]
+  in_order = kept_before == kept_after
+
+  for index, node in enumerate(final):
+    if id(node) in kept:
+      continue
+    image, tag = row_style(node)
+    item_id = tree.insert(
+      parent_item,
+      index if in_order else "end",
+      text=node.text(),
+      image=image,
+      tags=(tag,) if tag else ()
+    )
+    model.index(node, item_id, group)
+    if node.kind == "group" and not node.children:
+      # Dummy child so it can be expanded
+      tree.insert(item_id, "end", text=PLACEHOLDER_TEXT)
+    changes.inserted.append(node)
+
+  if not in_order:
+    tree.set_children(parent_item, *[node.item_id for node in final])
+    changes.moved = True
+
+  model.set_children(group, final)
+  return changes
+
+def merge_children(tree, model, group, new_children):
+  """
+  The model half of reconcile_children, for groups whose rows are drawn
+  by a VirtualWindow: matched children keep their node (taking the listed
+  fields), new ones are indexed without a row and removed ones leave the
+  model. Removed subgroups lose their row; project rows belong to the
+  window's pool and are rebound by its next render. 'new_children' must
+  be in sort_key order. Returns a Changes.
+  """
+  changes = Changes()
+  existing = {}
+  for child in group.children:
+    existing.setdefault(node_key(child), child)
+
+  final = []
+  for new in new_children:
+    old = existing.pop(node_key(new), None)
+    if old is None:
+      model.index(new, None, group)
+      changes.inserted.append(new)
+      final.append(new)
+      continue
+    old_status = getattr(old, "status", None)
+    _copy_fields(model, old, new)
+    if old_status is not None and old.status != old_status:
+      changes.status_changed.append((old, old_status))
+      changes.updated.append(old)
+    final.append(old)
+
+  kept = set(id(node) for node in final)
+  changes.removed = [child for child in group.children if id(child) not in kept]
+  rows = [child.item_id for child in changes.removed if child.kind == "group" and child.item_id is not None]
+  if rows:
+    tree.delete(*rows)
+  for child in changes.removed:
+    model.unindex(child)
+
+  model.set_children(group, final)
+  return changes
@@ -0,0 +1,130 @@
+import time
+import heapq
+from collections import deque
+
+# internal imports
+import util
+from api.delta import ACTIVE_STATUSES
+
+FAILED_STATUSES = ("failed", "canceled")
+
+class PollEntry:
+  __slots__ = ("status", "interval", "due", "seq")
+
+  def __init__(self, status, interval, due, seq):
+    self.status = status
+    self.interval = interval
+    self.due = due
+    self.seq = seq
+
+
+class PollScheduler:
+  """
+  Decides when each project's pipeline should be polled next.
+
+  Running/pending pipelines are polled every 'active_interval' seconds,
+  failed ones every 'failed_interval', and stable ones (success, skipped,
+  ...) start at 'stable_interval' and back off exponentially up to
+  'max_interval' for as long as their status doesn't change. Due projects
+  come out of a heap ordered by due time, and no more than
+  'budget_per_minute' polls are handed out in any 60 second window.
+  No interval is shorter than 'min_interval' (raised while webhooks push
+  the updates, so polling is only a safety net).
+  """
+  def __init__(self, active_interval=10, failed_interval=60, stable_interval=300,
+               max_interval=3600, budget_per_minute=60, min_interval=0):
+    self.active_interval = active_interval
+    self.failed_interval = failed_interval
+    self.stable_interval = stable_interval
+    self.max_interval = max_interval
+    self.budget_per_minute = budget_per_minute
+    self.min_interval = min_interval
+    self.heap = []
+    self.entries = {}
+    self.sent = deque()
+    self.seq = 0
+
+  def interval_for(self, status, previous):
+    """Next polling interval for a project, given its previous entry."""
+    status = (status or "").lower()
+    if status in ACTIVE_STATUSES:
+      return self.active_interval
+    if status in FAILED_STATUSES:
+      return self.failed_interval
+    if previous is None or previous.status != status or previous.interval < self.stable_interval:
+      return self.stable_interval
+    return min(previous.interval * 2, self.max_interval)
+
+  def schedule(self, project_id, status, now=None):
+    """(Re)schedule a project after it was polled or its status changed."""
+    now = time.monotonic() if now is None else now
+    key = str(project_id)
+    previous = self.entries.get(key)
+    interval = max(self.interval_for(status, previous), self.min_interval)
+    self.seq += 1
+    entry = PollEntry((status or "").lower(), interval, now + interval, self.seq)
+    self.entries[key] = entry
+    # Old heap items for this project are skipped lazily via 'seq'
+    heapq.heappush(self.heap, (entry.due, entry.seq, key))
+
+  def retry(self, project_id, now=None):
+    """
+    Re-arm a project whose poll failed, with its last status and interval
+    (no backoff, since nothing was learned). Unknown projects are ignored.
+    """
+    now = time.monotonic() if now is None else now
+    key = str(project_id)
+    entry = self.entries.get(key)
+    if entry is None:
+      return
+    self.seq += 1
+    entry = PollEntry(entry.status, entry.interval, now + entry.interval, self.seq)
+    self.entries[key] = entry
+    heapq.heappush(self.heap, (entry.due, entry.seq, key))
+
+  def remove(self, project_id):
+    self.entries.pop(str(project_id), None)
+
+  def available_budget(self, now):
+    while self.sent and self.sent[0] <= now - 60:
+      self.sent.popleft()
+    return max(0, self.budget_per_minute - len(self.sent))
+
+  def pop_due(self, now=None, accept=None, defer=None):
+    """
+    Return the ids of projects that are due, oldest first, within the
+    remaining budget. Projects rejected by 'accept' use no budget: those
+    'defer' accepts (e.g. hidden in a collapsed group) are re-armed at
+    their interval, the others are dropped from the schedule.
+    """
+    now = time.monotonic() if now is None else now
+    budget = self.available_budget(now)
+    due = []
+    while self.heap and self.heap[0][0] <= now and len(due) < budget:
+      _, seq, key = heapq.heappop(self.heap)
+      entry = self.entries.get(key)
+      if entry is None or entry.seq != seq:
+        continue
+      if accept is not None and not accept(key):
+        if defer is not None and defer(key):
+          self.retry(key, now)
+        else:
+          del self.entries[key]
+        continue
+      self.sent.append(now)
+      due.append(key)
+
+    if self.heap and self.heap[0][0] <= now:
+      util.debug(f"Poll budget reached, {len(self.entries)} projects scheduled.")
+    return due
+
+  def next_due_in(self, now=None):
+    """Seconds until the next project is due (None if nothing is scheduled)."""
+    now = time.monotonic() if now is None else now
+    while self.heap:
+      due, seq, key = self.heap[0]
+      entry = self.entries.get(key)
+      if entry is not None and entry.seq == seq:
+        return max(0.0, due - now)
+      heapq.heappop(self.heap)
+    return None
@@ -0,0 +1,99 @@
+import re
+from bisect import bisect_left, insort
+from urllib.parse import urlsplit, unquote
+
+# Words are runs of letters and digits in any script; '_' separates words too
+_split_words = re.compile(r"[\W_]+").split
+
+def node_words(node):
+  """
+  The words a node is found by: those of its name and of its full
+  (unquoted) namespace path, so "team/service" finds team/backend/service.
+  """
+  path = unquote(urlsplit(node.web_url or "").path).strip("/")
+  if path.startswith("groups/"):
+    # Group pages are served under /groups/
+    path = path[len("groups/"):]
+  return frozenset(word for word in _split_words(f"{node.name} {path}".casefold()) if word)
+
+
+class SearchIndex:
+  """
+  Word-prefix index over the names and paths of the nodes in a TreeModel.
+
+  A node matches a query when every word of the query is the start of one
+  of the node's words, so "pay api" finds "payments-api". Words are kept
+  in a sorted list, so each query word is a bisect plus a walk over the
+  words it prefixes. The index is updated node by node as the model
+  changes, never rebuilt.
+  """
+  def __init__(self):
+    # node -> the words it is indexed under
+    self.node_words = {}
+    # word -> nodes having it
+    self.postings = {}
+    self.sorted_words = []
+
+  def __len__(self):
+    return len(self.node_words)
+
+  def __contains__(self, node):
+    return node in self.node_words
+
+  def add(self, node):
+    words = node_words(node)
+    self.node_words[node] = words
+    for word in words:
+      self._add_posting(word, node)
+
+  def remove(self, node):
+    for word in self.node_words.pop(node, ()):
+      self._remove_posting(word, node)
+
+  def update(self, node):
+    """Re-index a node whose name or path changed."""
+    old = self.node_words.get(node)
+    if old is None:
+      return
+    new = node_words(node)
+    if new == old:
+      return
+    for word in old - new:
+      self._remove_posting(word, node)
+    for word in new - old:
+      self._add_posting(word, node)
+    self.node_words[node] = new
+
+  def _add_posting(self, word, node):
+    nodes = self.postings.get(word)
+    if nodes is None:
+      self.postings[word] = {node}
+      insort(self.sorted_words, word)
+    else:
+      nodes.add(node)
+
+  def _remove_posting(self, word, node):
+    nodes = self.postings.get(word)
+    if nodes is None:
+      return
+    nodes.discard(node)
+    if not nodes:
+      del self.postings[word]
+      del self.sorted_words[bisect_left(self.sorted_words, word)]
+
+  def search(self, query):
+    """The set of nodes matching every word of 'query' (empty for a blank query)."""
+    matches = None
+    for word in _split_words(query.casefold()):
+      if not word:
+        continue
+      lo = bisect_left(self.sorted_words, word)
+      # Every word starting with 'word' sorts before word + the highest code point
+      hi = bisect_left(self.sorted_words, word + "\U0010ffff", lo)
+      found = set()
+      for indexed in self.sorted_words[lo:hi]:
+        found.update(self.postings[indexed])
+      matches = found if matches is None else matches & found
+      if not matches:
+        break
+    return matches or set()
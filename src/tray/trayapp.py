@@ -33,11 +33,12 @@ class TrayAppBase:
     util.debug("Setting up tray icon")
     image = Image.open(self.icon_path + ".png")
 
-    # Build a menu for the tray icon
+    # Build a menu for the tray icon. Menu actions run on the tray thread,
+    # so they hand over to the Tk thread.
     menu = (
-      item(text="Left-Click-Action", action=self.show_window, default=True, visible=False),
-      item("Show", self.show_window),
-      item("Exit", self.exit_app)
+      item(text="Left-Click-Action", action=lambda: self.root.call_on_ui(self.show_window), default=True, visible=False),
+      item("Show", lambda: self.root.call_on_ui(self.show_window)),
+      item("Exit", lambda: self.root.call_on_ui(self.exit_app))
     )
 
     self.icon = pystray.Icon("tray_icon", image, self.root.title(), menu)
@@ -0,0 +1,144 @@
+from bisect import bisect_left
+
+from model import PLACEHOLDER_TEXT
+
+def first_project_index(group):
+  """Subgroups sort before projects (see model.sort_key), so projects start here."""
+  return bisect_left(group.children, 0, key=lambda child: child.order_key[0])
+
+
+class VirtualWindow:
+  """
+  Shows a large group's projects through a fixed pool of Treeview rows.
+
+  Only a window of 'size' projects is materialized, with a spacer row
+  above and below standing in for the rest. When a spacer scrolls into
+  view the window slides by half its size: the pooled rows are rebound
+  to the next projects (one tree.item per row whose content changed)
+  and the view is scrolled back by the same amount, so the user keeps
+  looking at the same projects. Subgroups are shown as normal rows above.
+
+  Projects outside the window stay in the model with no item id. The
+  group's other rows are expected to be gone before the first render.
+  """
+  def __init__(self, tree, model, group, row_style, size=200):
+    self.tree = tree
+    self.model = model
+    self.group = group
+    self.row_style = row_style
+    self.size = max(2, size)
+    self.start = 0
+    self.rows = []
+    # What each pooled row currently shows: item id -> (text, image, tag)
+    self.drawn = {}
+    # Spacers are detached while there is nothing above/below the window
+    self.above = tree.insert(group.item_id, "end", text="")
+    self.below = tree.insert(group.item_id, "end", text="")
+    tree.detach(self.above, self.below)
+    self.spacer_counts = {self.above: 0, self.below: 0}
+
+  def render(self):
+    """
+    Give new subgroups a row and bind the pooled rows to the projects in
+    the window, touching only rows that changed.
+    """
+    base = first_project_index(self.group)
+    for index, subgroup in enumerate(self.group.children[:base]):
+      if subgroup.item_id is None:
+        image, tag = self.row_style(subgroup)
+        item_id = self.tree.insert(self.group.item_id, index, text=subgroup.text(), image=image,
+                                   tags=(tag,) if tag else ())
+        self.model.bind(subgroup, item_id)
+        # Dummy child so it can be expanded
+        self.tree.insert(subgroup.item_id, "end", text=PLACEHOLDER_TEXT)
+
+    projects = self.group.children[base:]
+    self.start = max(0, min(self.start, len(projects) - self.size))
+    window = projects[self.start:self.start + self.size]
+
+    self.show_spacer(self.above, base, self.start)
+    first_row = base + (1 if self.spacer_counts[self.above] else 0)
+    while len(self.rows) < len(window):
+      self.rows.append(self.tree.insert(self.group.item_id, first_row + len(self.rows), text=""))
+    while len(self.rows) > len(window):
+      item_id = self.rows.pop()
+      self.unbind(item_id)
+      self.drawn.pop(item_id, None)
+      self.tree.delete(item_id)
+
+    for item_id, node in zip(self.rows, window):
+      if self.model.get(item_id) is not node:
+        self.unbind(item_id)
+        if node.item_id is not None:
+          self.unbind(node.item_id)
+        self.model.bind(node, item_id)
+      image, tag = self.row_style(node)
+      drawn = (node.text(), image, tag)
+      if self.drawn.get(item_id) != drawn:
+        self.tree.item(item_id, text=drawn[0], image=image, tags=(tag,) if tag else ())
+        self.drawn[item_id] = drawn
+
+    remaining = len(projects) - self.start - len(window)
+    self.show_spacer(self.below, first_row + len(window), remaining)
+
+  def show_spacer(self, item_id, index, count):
+    if count == self.spacer_counts[item_id]:
+      return
+    if count:
+      self.tree.move(item_id, self.group.item_id, index)
+      self.tree.item(item_id, text=f"  ... {count} more projects")
+    elif self.spacer_counts[item_id]:
+      self.tree.detach(item_id)
+    self.spacer_counts[item_id] = count
+
+  def update(self, node, moved=False):
+    """Redraw after a project changed; 'moved' if it changed position among its siblings."""
+    if moved:
+      self.render()
+    elif node.item_id is not None:
+      image, tag = self.row_style(node)
+      drawn = (node.text(), image, tag)
+      if self.drawn.get(node.item_id) != drawn:
+        self.tree.item(node.item_id, text=drawn[0], image=image, tags=(tag,) if tag else ())
+        self.drawn[node.item_id] = drawn
+
+  def unbind(self, item_id):
+    node = self.model.get(item_id)
+    if node is not None:
+      self.model.unbind(node)
+
+  def on_scroll(self):
+    """
+    Slide the window when a spacer is on screen. Returns True if it moved.
+    Call this from the tree's yscrollcommand.
+    """
+    step = self.size // 2
+    if self.spacer_counts[self.above] and self.tree.bbox(self.above):
+      return self.slide(-step)
+    if self.spacer_counts[self.below] and self.tree.bbox(self.below):
+      return self.slide(step)
+    return False
+
+  def slide(self, delta):
+    old_start = self.start
+    self.start += delta
+    self.render()
+    moved = self.start - old_start
+    if moved:
+      # The projects on screen moved by 'moved' rows, follow them
+      self.tree.yview_scroll(-moved, "units")
+    return bool(moved)
+
+  def destroy(self):
+    """
+    Delete the pooled and spacer rows; the projects stay in the model.
+    Detached spacers outlive their group's row, so this is needed even
+    when the group itself is deleted.
+    """
+    for item_id in self.rows:
+      self.unbind(item_id)
+    items = [i for i in (*self.rows, self.above, self.below) if self.tree.exists(i)]
+    if items:
+      self.tree.delete(*items)
+    self.rows = []
+    self.drawn.clear()
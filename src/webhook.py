@@ -0,0 +1,106 @@
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# internal imports
+import util
+
+class PipelineWebhookHandler(BaseHTTPRequestHandler):
+  """
+  Accepts GitLab "Pipeline Hook" POSTs, checks the X-Gitlab-Token secret
+  and hands a trimmed-down event to the server's callback.
+  """
+  def do_POST(self):
+    token = self.headers.get("X-Gitlab-Token", "")
+    if not hmac.compare_digest(token.encode("utf-8"), self.server.secret.encode("utf-8")):
+      util.debug("Webhook: rejected request with an invalid X-Gitlab-Token.")
+      self.reply(401, "invalid token")
+      return
+
+    try:
+      length = int(self.headers.get("Content-Length", 0) or 0)
+      payload = json.loads(self.rfile.read(length) or b"{}")
+    except (ValueError, json.JSONDecodeError) as e:
+      self.reply(400, f"invalid payload: {e}")
+      return
+    if not isinstance(payload, dict):
+      self.reply(400, "invalid payload: not an object")
+      return
+
+    if self.headers.get("X-Gitlab-Event") != "Pipeline Hook" or payload.get("object_kind") != "pipeline":
+      self.reply(202, "ignored")
+      return
+
+    attrs = payload.get("object_attributes") or {}
+    project = payload.get("project") or {}
+    if not isinstance(attrs, dict) or not isinstance(project, dict) or "id" not in project or "status" not in attrs:
+      self.reply(400, "missing project or pipeline")
+      return
+
+    event = {
+      "project_id": project["id"],
+      "status": attrs["status"],
+      "ref": attrs.get("ref", ""),
+      "pipeline_id": attrs.get("id", ""),
+      "web_url": project.get("web_url", ""),
+      "default_branch": project.get("default_branch", ""),
+    }
+    util.debug(f"Webhook: pipeline event {event}")
+    try:
+      self.server.on_pipeline_event(event)
+    except Exception as e:
+      util.debug(f"Webhook: error handling event: {e}")
+      self.reply(500, "error")
+      return
+    self.reply(200, "ok")
+
+  def reply(self, code, message):
+    body = message.encode("utf-8")
+    self.send_response(code)
+    self.send_header("Content-Type", "text/plain")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    util.debug(f"Webhook: {self.address_string()} {format % args}")
+
+
+class WebhookServer:
+  """
+  A small embedded HTTP listener for GitLab pipeline webhooks, served from
+  a daemon thread. 'on_pipeline_event' is called on that thread, so the
+  callback must hand the event over to the UI thread itself.
+  """
+  def __init__(self, host, port, secret, on_pipeline_event):
+    """
+    :param host: Interface to bind, e.g. 127.0.0.1 or 0.0.0.0
+    :param port: TCP port to listen on.
+    :param secret: Value GitLab sends in X-Gitlab-Token; requests without it are rejected.
+    :param on_pipeline_event: Callable taking a dict with project_id, status,
+                              ref, pipeline_id, web_url and default_branch.
+    """
+    if not secret:
+      raise ValueError("A webhook secret token is required.")
+    self.httpd = ThreadingHTTPServer((host, port), PipelineWebhookHandler)
+    self.httpd.daemon_threads = True
+    self.httpd.secret = secret
+    self.httpd.on_pipeline_event = on_pipeline_event
+    self.thread = None
+
+  @property
+  def address(self):
+    return self.httpd.server_address
+
+  def start(self):
+    self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    self.thread.start()
+    util.debug(f"Webhook listener running on {self.address[0]}:{self.address[1]}")
+
+  def shutdown(self):
+    try:
+      self.httpd.shutdown()
+      self.httpd.server_close()
+    except Exception as e:
+      util.debug(f"Error stopping webhook listener: {e}")
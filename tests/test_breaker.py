@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from api.client import GitLabClient
+from api.breaker import CircuitBreaker, CircuitOpenError, DeadlineExceeded, CLOSED, OPEN
+
+RESET_SECONDS = 0.05
+
+
+class ScriptedTransport:
+  """Answers each call with the next scripted status code, or raises it if it is an exception."""
+  def __init__(self, *script):
+    self.script = list(script)
+
+  def send(self, method, url, **kwargs):
+    step = self.script.pop(0)
+    if isinstance(step, Exception):
+      raise step
+    r = requests.Response()
+    r.status_code = step
+    r._content = b"{}"
+    r.headers = CaseInsensitiveDict({"Retry-After": "0"} if step == 429 else {})
+    return r
+
+  def close(self):
+    pass
+
+
+def make_client(*script):
+  client = GitLabClient(
+    "http://gitlab.invalid/api/v4", max_retries=0, retry_backoff=0,
+    circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=RESET_SECONDS)
+  )
+  client.transport = ScriptedTransport(*script)
+  return client
+
+def open_and_wait(client):
+  assert client.get("/projects/1").status_code == 500
+  assert client.breaker.state == OPEN
+  time.sleep(RESET_SECONDS * 1.5)
+
+
+def test_rate_limited_trial_closes_the_circuit():
+  client = make_client(500, 429, 200, 200, 200)
+  open_and_wait(client)
+  # The trial is rate limited once, then goes through
+  assert client.get("/projects/1").status_code == 200
+  assert client.breaker.state == CLOSED
+  for _ in range(2):
+    assert client.get("/projects/1").status_code == 200
+
+def test_trial_ending_in_an_unexpected_error_is_released():
+  client = make_client(500, requests.exceptions.InvalidURL("bad"), 200)
+  open_and_wait(client)
+  with pytest.raises(requests.exceptions.InvalidURL):
+    client.get("/projects/1")
+  assert not client.breaker.trial_in_flight
+  assert client.get("/projects/1").status_code == 200
+  assert client.breaker.state == CLOSED
+
+def test_expired_deadline_neither_takes_the_trial_nor_limits_other_calls():
+  client = make_client(500, 200)
+  open_and_wait(client)
+  with pytest.raises(DeadlineExceeded):
+    client.get("/projects/1", deadline=time.monotonic() - 1)
+  assert not client.breaker.trial_in_flight
+  # A call without a deadline, e.g. from another thread, is unaffected
+  assert client.get("/projects/1").status_code == 200
+  assert client.breaker.state == CLOSED
+
+def test_only_one_trial_at_a_time():
+  breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+  breaker.record_failure()
+  assert breaker.before_call() is True
+  with pytest.raises(CircuitOpenError):
+    breaker.before_call()
+  breaker.release_trial()
+  assert breaker.before_call() is True
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from fake_gitlab import FakeOrg, start_server
+from api.client import GitLabClient
+from api.graphql import GraphQLBackend, GraphQLError, graphql_url_for
+
+GROUP_ID = 2
+
+
+@pytest.fixture
+def org():
+  org = FakeOrg(groups=1, projects_per_group=7, refs=("main", "develop"))
+  ids = sorted(org.projects)
+  # Pipelines of the first three projects: main wins over develop, develop
+  # is used when main has none, and no pipeline at all
+  org.pipelines[ids[0]] = {"main": {"id": 901, "status": "success", "ref": "main"},
+                           "develop": {"id": 902, "status": "failed", "ref": "develop"}}
+  org.pipelines[ids[1]] = {"develop": {"id": 903, "status": "running", "ref": "develop"}}
+  org.pipelines[ids[2]] = {}
+  return org
+
+@pytest.fixture
+def backend(org):
+  server, api_url = start_server(org)
+  client = GitLabClient(api_url)
+  yield GraphQLBackend(client, graphql_url_for(api_url), page_size=3, pipeline_window=1)
+  client.close()
+  server.shutdown()
+
+
+def test_pages_through_every_project_by_cursor(org, backend):
+  projects = backend.get_group_projects("token", GROUP_ID, ["main", "develop"])
+  assert sorted(p["id"] for p in projects) == sorted(org.projects)
+  # 7 projects in pages of 3, plus the group's full path lookup over REST
+  assert backend.client.stats()["calls"] == 4
+
+def test_aliased_refs_follow_branch_priority(org, backend):
+  ids = sorted(org.projects)
+  projects = {p["id"]: p for p in backend.get_group_projects("token", GROUP_ID, ["main", "develop"])}
+  assert projects[ids[0]]["pipeline"] == ("success", "main", 901)
+  assert projects[ids[1]]["pipeline"] == ("running", "develop", 903)
+  assert projects[ids[2]]["pipeline"] == ("No pipeline found", "", "")
+
+def test_default_branch_outside_the_window_is_left_to_rest(org, backend):
+  ids = sorted(org.projects)
+  # Newest pipeline is on develop, the default branch's is older than the window of 1
+  org.pipelines[ids[0]]["develop"]["id"] = 999
+  projects = {p["id"]: p for p in backend.get_group_projects("token", GROUP_ID)}
+  assert "pipeline" not in projects[ids[0]]
+  assert projects[ids[2]]["pipeline"] == ("No pipeline found", "", "")
+
+def test_errors_raise_so_the_caller_falls_back_to_rest(org, backend):
+  org.graphql_enabled = False
+  with pytest.raises(GraphQLError):
+    backend.get_group_projects("token", GROUP_ID, ["main"])
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import queue
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from webhook import WebhookServer
+
+SECRET = "s3cret"
+
+# A "Pipeline Hook" delivery as sent by GitLab (trimmed: builds, user, commit)
+PIPELINE_HOOK = {
+  "object_kind": "pipeline",
+  "object_attributes": {
+    "id": 31,
+    "iid": 3,
+    "name": "Pipeline for branch: main",
+    "ref": "main",
+    "tag": False,
+    "sha": "bcbb5ec396a2c0f828686f14fac9b80b780504f2",
+    "source": "push",
+    "status": "success",
+    "detailed_status": "passed",
+    "stages": ["build", "test", "deploy"],
+    "created_at": "2016-08-12 15:23:28 UTC",
+    "finished_at": "2016-08-12 15:26:29 UTC",
+    "duration": 63,
+    "url": "http://192.168.64.1:3005/gitlab-org/gitlab-test/-/pipelines/31"
+  },
+  "merge_request": None,
+  "project": {
+    "id": 1,
+    "name": "Gitlab Test",
+    "web_url": "http://192.168.64.1:3005/gitlab-org/gitlab-test",
+    "path_with_namespace": "gitlab-org/gitlab-test",
+    "default_branch": "master",
+    "visibility_level": 20
+  }
+}
+
+
+@pytest.fixture
+def listener():
+  events = queue.Queue()
+  server = WebhookServer("127.0.0.1", 0, SECRET, events.put)
+  server.start()
+  host, port = server.address
+  yield f"http://{host}:{port}/", events
+  server.shutdown()
+
+
+def post(url, body, token=SECRET, event="Pipeline Hook"):
+  data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+  return requests.post(url, data=data, timeout=5, headers={
+    "Content-Type": "application/json",
+    "X-Gitlab-Event": event,
+    "X-Gitlab-Token": token
+  })
+
+
+def test_pipeline_hook_becomes_an_update(listener):
+  url, events = listener
+  r = post(url, PIPELINE_HOOK)
+  assert r.status_code == 200
+  assert events.get(timeout=5) == {
+    "project_id": 1,
+    "status": "success",
+    "ref": "main",
+    "pipeline_id": 31,
+    "web_url": "http://192.168.64.1:3005/gitlab-org/gitlab-test",
+    "default_branch": "master",
+  }
+
+
+def test_running_pipeline_on_another_branch(listener):
+  url, events = listener
+  payload = json.loads(json.dumps(PIPELINE_HOOK))
+  payload["object_attributes"].update(id=32, ref="develop", status="running", finished_at=None)
+  assert post(url, payload).status_code == 200
+  event = events.get(timeout=5)
+  assert (event["pipeline_id"], event["ref"], event["status"]) == (32, "develop", "running")
+
+
+def test_invalid_token_is_rejected(listener):
+  url, events = listener
+  assert post(url, PIPELINE_HOOK, token="wrong").status_code == 401
+  assert events.empty()
+
+
+def test_other_events_are_ignored(listener):
+  url, events = listener
+  assert post(url, {"object_kind": "push"}, event="Push Hook").status_code == 202
+  assert events.empty()
+
+
+@pytest.mark.parametrize("body", [
+  b"not json",
+  [1, 2],
+  "pipeline",
+  dict(PIPELINE_HOOK, object_attributes=[1, 2]),
+  dict(PIPELINE_HOOK, project="gitlab-org/gitlab-test"),
+  dict(PIPELINE_HOOK, project={"name": "no id"}),
+])
+def test_malformed_payloads_get_a_400(listener, body):
+  url, events = listener
+  assert post(url, body).status_code == 400
+  assert events.empty()